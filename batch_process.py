@@ -0,0 +1,212 @@
+
+# Batch version of complete_process.py
+# Takes a directory of PDF/TXT judgments (or a manifest file listing one path per line) and streams every document
+# through read_contact -> extract_section -> extract_statements -> LLMProcessingPremise.process_clause -> validity/ND
+# solving. Each stage has its own bounded worker pool, the sentence encoder is loaded once for the whole run, and
+# every document gets its own JSONL result file (one line per finished stage).
+# The LLM stage runs on an asyncio loop with one pooled AsyncOllamaClient, so clauses from many documents can be
+# waiting on Ollama at once; --llm-workers caps the number of concurrent requests.
+# With --report every document also gets <name>.report.json (time, calls and memory per stage, solver counters), and
+# --profile adds cProfile dumps of its extract and solve stages (<name>.<stage>.prof).
+import argparse
+import json
+import os
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import premise_to_proposition
+from complete_process import load_statements, formalize_async, solve_argument
+from utils.ollama_client import AsyncOllamaClient, EventLoopThread
+from utils.llm_cache import LLMResponseCache, get_default_cache
+from utils.encoder import get_encoder
+from utils.instrumentation import merge_reports, profiled_call, profiled_call_async
+
+DOCUMENT_EXTENSIONS = (".pdf", ".txt")
+
+
+def collect_documents(source):
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.lower().endswith(DOCUMENT_EXTENSIONS))
+
+    # Manifest: one document per line, blank lines and '#' comments ignored, relative to the manifest's folder
+    base = os.path.dirname(os.path.abspath(source))
+    documents = []
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                documents.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return documents
+
+
+class Stage:
+    def __init__(self, name, executor, function, workers):
+        self.name = name
+        self.executor = executor
+        self.function = function
+        self.limit = workers * 2  # Keep a few items queued per worker, but never the whole corpus
+        self.backlog = deque()
+        self.in_flight = 0
+
+
+class BatchPipeline:
+    def __init__(self, out_dir, model_name="llama3.1", extract_workers=2, llm_workers=4, solve_workers=2,
+                 encoder=None, ollama_host=None, request_timeout=120.0, retries=2, use_cache=True, report=False,
+                 profile=False):
+        self.out_dir = out_dir
+        self.model_name = model_name
+        self.extract_workers = extract_workers
+        self.llm_workers = llm_workers
+        self.solve_workers = solve_workers
+        # One model load shared by every document's PropositionRegistry
+        self.encoder = encoder if encoder is not None else get_encoder()
+        self.client = AsyncOllamaClient(host=ollama_host, max_concurrency=llm_workers, timeout=request_timeout,
+                                        retries=retries)
+        self.cache = get_default_cache() if use_cache else LLMResponseCache(enabled=False)
+        self.report = report or profile
+        self.profile = profile
+        self.reports = {}  # document -> reports of its finished stages
+
+    def result_path(self, document, suffix=".jsonl"):
+        stem = os.path.splitext(os.path.basename(document))[0]
+        return os.path.join(self.out_dir, stem + suffix)
+
+    def _submit(self, stage, document, payload):
+        if not self.report:
+            return stage.executor.submit(stage.function, payload)
+        if stage.name == "formalize":
+            # Runs next to other documents on the event loop, so only its time is recorded
+            return stage.executor.submit(profiled_call_async, stage.function, payload, stage.name, document)
+        profile_path = self.result_path(document, f".{stage.name}.prof") if self.profile else None
+        return stage.executor.submit(profiled_call, stage.function, payload, stage.name, document, True, profile_path)
+
+    def _write_report(self, document):
+        with open(self.result_path(document, ".report.json"), "w", encoding="utf-8") as f:
+            json.dump(merge_reports(self.reports.pop(document, []), document), f, indent=2)
+
+    def _write(self, document, records, mode="a"):
+        with open(self.result_path(document), mode, encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    async def _formalize(self, statements):
+        # Each document gets its own registry (variables are numbered per document), but they share the encoder and
+        # the Ollama connection pool
+        processor = premise_to_proposition.LLMProcessingPremise(model_name=self.model_name, encoder=self.encoder,
+                                                                client=self.client, cache=self.cache)
+        return await formalize_async(statements, processor)
+
+    @staticmethod
+    def _solve(formalization):
+        argument, variable_map = formalization
+        return solve_argument(argument, list(variable_map.keys()))
+
+    def _records(self, stage, document, result):
+        if stage == "extract":
+            return [{"document": document, "stage": "statements", "statements": result}]
+        if stage == "formalize":
+            argument, variable_map = result
+            return [{"document": document, "stage": "formalization", "argument": argument,
+                     "variable_map": variable_map}]
+        records = [{"document": document, "stage": "validity", "valid": result["valid"]}]
+        if result["valid"]:
+            records.append({"document": document, "stage": "derivation", "steps": result["derivation"]})
+            records.append({"document": document, "stage": "simplified_derivation",
+                            "steps": result["simplified_derivation"]})
+        return records
+
+    def run(self, documents):
+        os.makedirs(self.out_dir, exist_ok=True)
+        summary = {}
+        if hasattr(self.encoder, "warm_up"):
+            self.encoder.warm_up()  # Load the weights now rather than inside the first document's LLM stage
+
+        llm_loop = EventLoopThread()
+        with ProcessPoolExecutor(self.extract_workers) as extract_pool, \
+                ProcessPoolExecutor(self.solve_workers) as solve_pool:
+            # Documents are already spread over the extract workers, so each one reads its pages itself
+            stages = [Stage("extract", extract_pool, partial(load_statements, page_workers=1), self.extract_workers),
+                      Stage("formalize", llm_loop, self._formalize, self.llm_workers),
+                      Stage("solve", solve_pool, self._solve, self.solve_workers)]
+            pending = {}  # future -> (stage index, document)
+
+            for document in documents:
+                self._write(document, [], mode="w")  # Truncate results of previous runs
+                stages[0].backlog.append((document, document))
+
+            def submit_ready():
+                for index, stage in enumerate(stages):
+                    while stage.backlog and stage.in_flight < stage.limit:
+                        document, payload = stage.backlog.popleft()
+                        pending[self._submit(stage, document, payload)] = (index, document)
+                        stage.in_flight += 1
+
+            submit_ready()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, document = pending.pop(future)
+                    stage = stages[index]
+                    stage.in_flight -= 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self._write(document, [{"document": document, "stage": stage.name, "error": repr(e)}])
+                        summary[document] = f"failed at {stage.name}"
+                        if self.report:
+                            if hasattr(e, "profile_report"):
+                                self.reports.setdefault(document, []).append(e.profile_report)
+                            self._write_report(document)
+                        continue
+                    if self.report:
+                        result, stage_report = result
+                        self.reports.setdefault(document, []).append(stage_report)
+                    self._write(document, self._records(stage.name, document, result))
+                    if index + 1 < len(stages):
+                        stages[index + 1].backlog.append((document, result))
+                    else:
+                        summary[document] = "valid" if result["valid"] else "invalid"
+                        if self.report:
+                            self._write_report(document)
+                submit_ready()
+
+        llm_loop.run(self.client.aclose())
+        llm_loop.close()
+        return summary
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run complete_process.py over a directory or manifest of files")
+    arg_parser.add_argument("source", help="directory of .pdf/.txt files, or a manifest with one path per line")
+    arg_parser.add_argument("--out", default="results", help="directory for the per-document JSONL files")
+    arg_parser.add_argument("--model", default="llama3.1")
+    arg_parser.add_argument("--extract-workers", type=int, default=2)
+    arg_parser.add_argument("--llm-workers", type=int, default=4, help="concurrent requests to the Ollama server")
+    arg_parser.add_argument("--ollama-host", default=None)
+    arg_parser.add_argument("--timeout", type=float, default=120.0, help="seconds per Ollama request")
+    arg_parser.add_argument("--retries", type=int, default=2)
+    arg_parser.add_argument("--no-cache", action="store_true", help="do not reuse stored LLM responses")
+    arg_parser.add_argument("--solve-workers", type=int, default=2)
+    arg_parser.add_argument("--encoder-backend", choices=["torch", "onnx"], default="torch")
+    arg_parser.add_argument("--quantize", action="store_true", help="int8 sentence encoder (faster on CPU)")
+    arg_parser.add_argument("--report", action="store_true", help="write <name>.report.json for every document")
+    arg_parser.add_argument("--profile", action="store_true", help="also write cProfile dumps of every document")
+    args = arg_parser.parse_args()
+
+    documents = collect_documents(args.source)
+    pipeline = BatchPipeline(args.out, model_name=args.model, extract_workers=args.extract_workers,
+                             llm_workers=args.llm_workers, solve_workers=args.solve_workers,
+                             ollama_host=args.ollama_host, request_timeout=args.timeout, retries=args.retries,
+                             use_cache=not args.no_cache,
+                             encoder=get_encoder(backend=args.encoder_backend, quantize=args.quantize),
+                             report=args.report, profile=args.profile)
+    summary = pipeline.run(documents)
+    for document, status in summary.items():
+        print(f"{document}: {status}")
+    print("LLM cache:", pipeline.cache.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+# Helpers shared by the benchmark scripts, which import them as benchmarks.common after putting the repo on sys.path
+from logics.classes.propositional.semantics import MixedManyValuedSemantics
+
+
+def nested(atomics, symbol):
+    # (a1 symbol (a2 symbol (... symbol an)))
+    if len(atomics) == 1:
+        return atomics[0]
+    return f"({atomics[0]} {symbol} {nested(atomics[1:], symbol)})"
+
+
+def implication_chain(atomics, valid=True):
+    # p1 → p2, ..., pn-1 → pn / p1 → pn (valid in CL and ST) or / pn → p1 (invalid)
+    premises = ", ".join(f"({atomics[i]} → {atomics[i + 1]})" for i in range(len(atomics) - 1))
+    conclusion = f"({atomics[0]} → {atomics[-1]})" if valid else f"({atomics[-1]} → {atomics[0]})"
+    return f"{premises} / {conclusion}"
+
+
+def instances(module):
+    # Every many-valued semantics defined in the module (e.g. logics.instances.propositional.many_valued_semantics)
+    return [value for value in vars(module).values() if isinstance(value, MixedManyValuedSemantics)]
@@ -0,0 +1,71 @@
+# Memory and speed of many random formulae as Formula lists vs encoded together in a FormulaCorpus
+#   python benchmarks/compact_formula_corpus.py --formulae 2000 20000 --depth 6
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from copy import copy, deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from logics.classes.propositional import FormulaCorpus
+from logics.instances.propositional.languages import classical_language
+from logics.instances.propositional.many_valued_semantics import LP_mvl_semantics
+from logics.utils.formula_generators.generators_biased import random_formula_generator
+
+ATOMICS = ["p", "q", "r", "s"]
+
+
+def traced(build):
+    """The result of calling `build` and the memory allocated while doing it"""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--formulae", type=int, nargs="*", default=[2000, 20000])
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logic = copy(LP_mvl_semantics)
+    logic.backend = "compiled"
+    consistent = True
+    for count in args.formulae:
+        random.seed(args.seed)
+        formulae = [random_formula_generator.random_formula(args.depth, ATOMICS, classical_language, exact_depth=False)
+                    for _ in range(count)]
+        _, list_memory = traced(lambda: deepcopy(formulae))
+        corpus, corpus_memory = traced(lambda: FormulaCorpus(formulae))
+
+        list_properties, list_time = timed(lambda: ([formula.depth for formula in formulae],
+                                                    [formula.atomics_inside(classical_language) for formula in formulae]))
+        corpus_properties, corpus_time = timed(lambda: (corpus.depths(), corpus.letter_matrix()))
+        depths, letters = corpus_properties
+        corpus_properties = (depths.tolist(), [{corpus.table.symbols[code] for code in row.nonzero()[0]}
+                                               for row in letters])
+
+        list_valid, list_eval_time = timed(lambda: [logic.is_locally_valid(formula) for formula in formulae])
+        corpus_valid, corpus_eval_time = timed(lambda: [logic.is_locally_valid(formula) for formula in corpus])
+
+        same = list_properties == corpus_properties and list_valid == corpus_valid and corpus.to_formulae() == formulae
+        consistent = consistent and same
+        print(f"{count:>6} formulae  memory {list_memory / 1024:9.1f}KiB -> {corpus_memory / 1024:8.1f}KiB  "
+              f"depth and atomics {list_time:6.3f}s -> {corpus_time:6.3f}s  "
+              f"LP validity {list_eval_time:6.3f}s -> {corpus_eval_time:6.3f}s{'' if same else '  DIFFERENT RESULTS'}")
+    return consistent
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
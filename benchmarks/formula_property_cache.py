@@ -0,0 +1,62 @@
+# Natural deduction and tableaux solvers with and without the cached formula properties (cache_properties)
+#   python benchmarks/formula_property_cache.py --atomics 6 10 14 --repeat 3
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from logics.classes.propositional.formula import cache_properties
+from logics.instances.propositional.tableaux import classical_tableaux_system
+from logics.utils.parsers import classical_parser
+from logics.utils.solvers import classical_natural_deduction_solver
+from logics.utils.solvers.tableaux import standard_tableaux_solver
+from benchmarks.common import nested
+
+
+def inferences(count):
+    atomics = [f"p{i}" for i in range(1, count + 1)]
+    conditionals = [f"({atomics[i]} → {atomics[i + 1]})" for i in range(count - 1)]
+    return [f"{nested(atomics, '∧')} / {nested(atomics[::-1], '∧')}",
+            f"{nested(atomics, '∧')} / {nested(atomics[::-1], '∨')}",
+            f"{nested(conditionals, '∧')}, {atomics[0]} / {atomics[-1]}"]
+
+
+def solve_all(texts, repeat):
+    """Best time of solving every inference with each solver, and the results"""
+    best = [float("inf"), float("inf")]
+    for _ in range(repeat):
+        start = time.perf_counter()
+        derivations = [str(classical_natural_deduction_solver.solve(classical_parser.parse(text))) for text in texts]
+        best[0] = min(best[0], time.perf_counter() - start)
+        start = time.perf_counter()
+        closed = [classical_tableaux_system.tree_is_closed(
+            standard_tableaux_solver.solve(classical_parser.parse(text), classical_tableaux_system)) for text in texts]
+        best[1] = min(best[1], time.perf_counter() - start)
+    return best, (derivations, closed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--atomics", type=int, nargs="*", default=[6, 10, 14])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    consistent = True
+    for count in args.atomics:
+        texts = inferences(count)
+        cache_properties(False)
+        (nd_plain, tableaux_plain), plain_results = solve_all(texts, args.repeat)
+        cache_properties(True)
+        (nd_cached, tableaux_cached), cached_results = solve_all(texts, args.repeat)
+        cache_properties(False)
+        same = plain_results == cached_results
+        consistent = consistent and same
+        print(f"{count:>3} atomics  natural deduction {nd_plain:7.3f}s -> {nd_cached:7.3f}s "
+              f"(speedup {nd_plain / nd_cached:5.2f})  tableaux {tableaux_plain:7.3f}s -> {tableaux_cached:7.3f}s "
+              f"(speedup {tableaux_plain / tableaux_cached:5.2f}){'' if same else '  DIFFERENT RESULTS'}")
+    return consistent
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
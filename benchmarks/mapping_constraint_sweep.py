@@ -0,0 +1,93 @@
+# Valuation matrices of mapped logics in bulk vs one valuation at a time, and validity in every mixed logic P/C
+#   python benchmarks/mapping_constraint_sweep.py --inferences 50 --depth 4 --atomics 4
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from logics.classes.propositional import Inference
+from logics.classes.propositional.semantics.mapped_logic import MappingMatrix, MappedManyValuedSemantics, powerset
+from logics.instances.propositional import mapped_logic_semantics as mapped, many_valued_semantics
+from logics.utils.formula_generators.generators_biased import random_formula_generator
+
+
+def mapped_logic(truth_values, truth_functions, sentential_constants, name):
+    everything = MappingMatrix(truth_values)
+    everything._fill_matrix(1)
+    return MappedManyValuedSemantics(mapped.classical_language, truth_values, everything, truth_functions,
+                                     sentential_constants, name=name)
+
+
+def mixed_constraints(logic):
+    """The constraint matrix of every mixed logic P/C, where P and C are sets of truth values"""
+    constraints = {}
+    for premise_values in powerset(logic.truth_values):
+        for conclusion_values in powerset(logic.truth_values):
+            matrix = [[int(not set(premise_mapping) <= set(premise_values) or
+                           bool(set(conclusion_mapping) & set(conclusion_values)))
+                       for conclusion_mapping in logic.mappings] for premise_mapping in logic.mappings]
+            constraints[(premise_values, conclusion_values)] = MappingMatrix(logic.truth_values, matrix)
+    return constraints
+
+
+def valuation_matrix_by_valuation(logic, inference):
+    matrix = MappingMatrix(logic.truth_values)
+    matrix._fill_matrix(0)
+    for combination in logic._get_truth_value_combinations(inference):
+        atomic_valuation_dict = logic._get_atomic_valuation_dict(inference, combination)
+        coord = logic.mapped_standard_to_inferences(inference, atomic_valuation_dict, coordinate=True)
+        matrix.boolean_matrix[coord[0]][coord[1]] = 1
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inferences", type=int, default=50, help="random inferences per logic")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--atomics", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    logics = [
+        mapped_logic(['1', '0'], mapped.classical_truth_functions, mapped.classical_sentential_constants_values, "2V"),
+        mapped_logic(mapped.three_valued_truth_values, mapped.three_valued_truth_functions,
+                     mapped.three_valued_sentential_constants_values, "3V"),
+        mapped_logic(many_valued_semantics.FDE_truth_values, many_valued_semantics.FDE_truth_functions,
+                     many_valued_semantics.FDE_mvl_semantics.sentential_constant_values_dict, "FDE"),
+    ]
+    atomics = ["p", "q", "r", "s", "t", "u"][:args.atomics]
+    consistent = True
+    for logic in logics:
+        inferences = []
+        for _ in range(args.inferences):
+            formulae = [random_formula_generator.random_formula(args.depth, atomics, logic.language, exact_depth=False)
+                        for _ in range(random.randint(1, 4))]
+            cut = random.randint(0, len(formulae))
+            inferences.append(Inference(formulae[:cut], formulae[cut:]))
+
+        start = time.perf_counter()
+        by_valuation = [valuation_matrix_by_valuation(logic, inference) for inference in inferences]
+        by_valuation_time = time.perf_counter() - start
+        start = time.perf_counter()
+        bulk = [logic.valuation_matrix(inference) for inference in inferences]
+        bulk_time = time.perf_counter() - start
+        same = all((one.boolean_matrix == other.boolean_matrix).all() for one, other in zip(by_valuation, bulk))
+        consistent = consistent and same
+
+        constraints = mixed_constraints(logic)
+        start = time.perf_counter()
+        valid_counts = [sum(matrix.is_included_in(constraint) for constraint in constraints.values())
+                        for matrix in bulk]
+        sweep_time = time.perf_counter() - start
+        print(f"{logic.name:<4} valuation matrices: by valuation {by_valuation_time:6.2f}s  bulk {bulk_time:6.2f}s  "
+              f"speedup {by_valuation_time / bulk_time:6.2f}{'' if same else '  DIFFERENT MATRICES'}")
+        print(f"{'':<4} {len(constraints)} mixed logics x {len(inferences)} inferences swept in {sweep_time:6.2f}s, "
+              f"{sum(valid_counts) / len(valid_counts):.1f} logics validate an inference on average")
+    return consistent
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,66 @@
+# Scaling of the parallel evaluation of valuations (the `processes` attribute of the semantics) across cores
+#   python benchmarks/parallel_scaling.py --atomics 16 --processes 1 2 4 8
+import argparse
+import os
+import sys
+import time
+import warnings
+from copy import copy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from logics.instances.propositional.many_valued_semantics import classical_mvl_semantics, ST_mvl_semantics, \
+    TS_mvl_semantics
+from logics.instances.propositional.mapped_logic_semantics import \
+    three_valued_strict_tolerant_from_all_premises_to_some_conclusions_logic
+from logics.classes.propositional.semantics import MixedMetainferentialSemantics
+from logics.utils.parsers import classical_parser
+from benchmarks.common import implication_chain
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--atomics", type=int, default=16, help="atomics of the classical inference (fewer are used "
+                                                                "for the three-valued logics)")
+    parser.add_argument("--processes", type=int, nargs="*", default=None,
+                        help="process counts to try (default: powers of 2 up to the number of cores)")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")  # Metainferences with premises of different levels warn
+    process_counts = args.processes
+    if process_counts is None:
+        process_counts = [1]
+        while process_counts[-1] * 2 <= os.cpu_count():
+            process_counts.append(process_counts[-1] * 2)
+    print(f"{os.cpu_count()} cores")
+
+    three_valued_atomics = max(2, round(args.atomics / 1.585))  # About as many valuations as the classical case
+    atomics = [f"p{i}" for i in range(1, args.atomics + 1)]
+    tasks = [
+        ("CL is_valid", classical_mvl_semantics, "is_locally_valid", implication_chain(atomics)),
+        ("ST is_valid", ST_mvl_semantics, "is_locally_valid", implication_chain(atomics[:three_valued_atomics])),
+        ("TS/ST meta-identity", MixedMetainferentialSemantics([TS_mvl_semantics, ST_mvl_semantics]),
+         "is_locally_valid", f"({implication_chain(atomics[:three_valued_atomics])}) // "
+                             f"({implication_chain(atomics[:three_valued_atomics])})"),
+        ("mapped ST valuation_matrix", three_valued_strict_tolerant_from_all_premises_to_some_conclusions_logic,
+         "valuation_matrix", implication_chain(atomics[:three_valued_atomics - 2])),
+    ]
+
+    consistent = True
+    for name, logic, method, text in tasks:
+        inference = classical_parser.parse(text)
+        expected = None
+        serial_time = None
+        for processes in process_counts:
+            parallel_logic = copy(logic)
+            parallel_logic.processes = processes
+            start = time.perf_counter()
+            result = getattr(parallel_logic, method)(inference)
+            elapsed = time.perf_counter() - start
+            if expected is None:
+                expected, serial_time = repr(result), elapsed
+            consistent = consistent and repr(result) == expected
+            print(f"{name:<30} {processes:>3} processes  {elapsed:8.2f}s  speedup {serial_time / elapsed:5.2f}")
+    return consistent
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
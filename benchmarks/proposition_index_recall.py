@@ -0,0 +1,66 @@
+# Recall / latency of the approximate RandomProjectionIndex against the exact ExactIndex, on synthetic vectors
+#   python benchmarks/proposition_index_recall.py --size 20000 --queries 500
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.proposition_index import ExactIndex, RandomProjectionIndex
+
+
+def unit(rows):
+    return rows / np.linalg.norm(rows, axis=-1, keepdims=True)
+
+
+def synthetic_embeddings(size, dim, clusters, rng):
+    centers = unit(rng.standard_normal((clusters, dim)))
+    members = centers[rng.integers(0, clusters, size)]
+    return unit(members + 0.6 * rng.standard_normal((size, dim)) / np.sqrt(dim)).astype(np.float32)
+
+
+def run(index, vectors, queries, k):
+    build_start = time.perf_counter()
+    for vector in vectors:
+        index.add(vector)
+    build_time = time.perf_counter() - build_start
+
+    results = []
+    query_start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, k=k)[0])
+    query_time = (time.perf_counter() - query_start) / len(queries)
+    return results, build_time, query_time
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--size", type=int, default=20000)
+    arg_parser.add_argument("--queries", type=int, default=500)
+    arg_parser.add_argument("--dim", type=int, default=384)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = synthetic_embeddings(args.size, args.dim, max(1, args.size // 20), rng)
+    picked = vectors[rng.integers(0, args.size, args.queries)]
+    queries = unit(picked + 0.3 * rng.standard_normal(picked.shape) / np.sqrt(args.dim)).astype(np.float32)
+
+    exact, build_time, query_time = run(ExactIndex(), vectors, queries, args.k)
+    print(f"{'backend':<36}{'recall@1':>10}{'recall@k':>10}{'build s':>10}{'query ms':>10}")
+    print(f"{'exact':<36}{1.0:>10.3f}{1.0:>10.3f}{build_time:>10.2f}{query_time * 1000:>10.3f}")
+
+    for n_tables, n_bits, n_probe in [(4, 12, 1), (8, 12, 1), (8, 12, 4), (16, 12, 4), (16, 10, 8), (32, 10, 8)]:
+        index = RandomProjectionIndex(n_tables=n_tables, n_bits=n_bits, n_probe=n_probe, seed=args.seed)
+        approximate, build_time, query_time = run(index, vectors, queries, args.k)
+        recall_1 = np.mean([len(a) > 0 and a[0] == e[0] for a, e in zip(approximate, exact)])
+        recall_k = np.mean([len(set(a.tolist()) & set(e.tolist())) / len(e) for a, e in zip(approximate, exact)])
+        name = f"random_projection t={n_tables} b={n_bits} p={n_probe}"
+        print(f"{name:<36}{recall_1:>10.3f}{recall_k:>10.3f}{build_time:>10.2f}{query_time * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Matching formulae against rule premises: one Formula.is_instance_of per rule vs a single DiscriminationTree walk
+#   python benchmarks/rule_matching.py --formulae 2000 --depth 5
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from anytree import PreOrderIter
+
+from logics.instances.propositional.tableaux import classical_tableaux_system
+from logics.utils.formula_generators.generators_biased import random_formula_generator
+from logics.utils.solvers import classical_natural_deduction_solver
+from logics.utils.solvers.discrimination_tree import DiscriminationTree
+
+
+def rule_sets():
+    nd_premises = {rule_name: rule.premises[0]
+                   for rule_name, rule in classical_natural_deduction_solver.simplification_rules.items()}
+    tableaux_premises = {rule_name: [n for n in PreOrderIter(rule) if n.justification is None][-1].content
+                         for rule_name, rule in classical_tableaux_system.rules.items()}
+    return [("natural deduction", nd_premises, classical_natural_deduction_solver.language),
+            ("tableaux", tableaux_premises, classical_tableaux_system.language)]
+
+
+def match_one_by_one(formula, premises, language):
+    matches = []
+    for rule_name, premise in premises.items():
+        instance, subst_dict = formula.is_instance_of(premise, language, return_subst_dict=True)
+        if instance:
+            matches.append((rule_name, subst_dict))
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--formulae", type=int, default=2000)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    consistent = True
+    for name, premises, language in rule_sets():
+        formulae = [random_formula_generator.random_formula(args.depth, ["p", "q", "r"], language, exact_depth=False)
+                    for _ in range(args.formulae)]
+        start = time.perf_counter()
+        one_by_one = [match_one_by_one(formula, premises, language) for formula in formulae]
+        one_by_one_time = time.perf_counter() - start
+        start = time.perf_counter()
+        tree = DiscriminationTree(premises, language)
+        with_tree = [tree.match(formula) for formula in formulae]
+        tree_time = time.perf_counter() - start
+        same = one_by_one == with_tree
+        consistent = consistent and same
+        print(f"{name:<18} {len(premises):>3} rules  is_instance_of {one_by_one_time:6.3f}s  "
+              f"discrimination tree {tree_time:6.3f}s  speedup {one_by_one_time / tree_time:5.2f}  "
+              f"{sum(len(matches) for matches in with_tree)} matches{'' if same else '  DIFFERENT MATCHES'}")
+    return consistent
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
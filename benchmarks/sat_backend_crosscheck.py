@@ -0,0 +1,77 @@
+# Cross-check of the SAT validity backend against the enumeration of valuations, and its time on long chains
+#   python benchmarks/sat_backend_crosscheck.py --inferences 200 --atomics 6 --large 30 45 60
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+from copy import copy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from logics.instances.propositional import many_valued_semantics, mapped_logic_semantics
+from logics.classes.propositional.semantics.mapped_logic import MappedManyValuedSemantics
+from logics.utils.formula_generators.generators_biased import random_formula_generator
+from logics.utils.parsers import classical_parser
+from benchmarks.common import implication_chain, instances
+
+
+def random_inference(logic, atomics, level):
+    return random_formula_generator.random_inference(num_premises=random.randint(0, 3),
+                                                    num_conclusions=random.randint(0, 2),
+                                                    max_depth=3, atomics=atomics, language=logic.language,
+                                                    level=level, exact_num_premises=False,
+                                                    exact_num_conclusions=False)
+
+
+def crosscheck(logic, inferences, atomic_count):
+    sat_logic = copy(logic)
+    sat_logic.backend = "sat"
+    atomics = ["p", "q", "r", "s", "t", "u", "v", "w"][:atomic_count]
+    levels = [1] if isinstance(logic, MappedManyValuedSemantics) else [1, 1, 2, 3]
+    mismatches = 0
+    for _ in range(inferences):
+        inference = random_inference(logic, atomics, random.choice(levels))
+        for method in ("is_locally_valid", "is_locally_antivalid"):
+            if getattr(logic, method)(inference) != getattr(sat_logic, method)(inference):
+                mismatches += 1
+                print(f"  {logic.name} {method} differs on {classical_parser.unparse(inference)}")
+        counterexample = sat_logic.counterexample(inference)
+        if counterexample is not None and logic.satisfies(inference, counterexample):
+            mismatches += 1
+            print(f"  {logic.name}: {counterexample} is not a counterexample to {classical_parser.unparse(inference)}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inferences", type=int, default=200, help="random inferences per logic")
+    parser.add_argument("--atomics", type=int, default=5, help="atomics the random inferences are built from")
+    parser.add_argument("--large", type=int, nargs="*", default=[30, 45, 60], help="atomics of the timed chains")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    warnings.simplefilter("ignore")  # Metainferences with premises of different levels warn
+
+    mismatches = 0
+    for logic in instances(many_valued_semantics) + instances(mapped_logic_semantics):
+        start = time.perf_counter()
+        logic_mismatches = crosscheck(logic, args.inferences, args.atomics)
+        mismatches += logic_mismatches
+        print(f"{logic.name:<40} {logic_mismatches} mismatches  {time.perf_counter() - start:.2f}s")
+
+    for name in ("classical_mvl_semantics", "ST_mvl_semantics", "FDE_mvl_semantics"):
+        logic = copy(getattr(many_valued_semantics, name))
+        logic.backend = "sat"
+        for atomic_count in args.large:
+            for valid in (True, False):
+                atomics = [f"p{i}" for i in range(1, atomic_count + 1)]
+                inference = classical_parser.parse(implication_chain(atomics, valid))
+                start = time.perf_counter()
+                result = logic.is_valid(inference)
+                print(f"{logic.name:<5} {atomic_count} atomics  valid={result!s:<5} {time.perf_counter() - start:.3f}s")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,53 @@
+# Short-circuit valuation (use_molecular_valuation_fast_version=True) against the generic valuation
+#   python benchmarks/short_circuit_valuation.py --formulae 100 --depth 6 --atomics 4
+import argparse
+import os
+import random
+import sys
+import time
+from copy import copy
+from itertools import product
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from logics.instances.propositional import many_valued_semantics, mapped_logic_semantics
+from logics.utils.formula_generators.generators_biased import random_formula_generator
+from benchmarks.common import instances
+
+
+def timed_valuations(logic, formulae, valuations):
+    start = time.perf_counter()
+    values = [[logic.valuation(formula, valuation) for valuation in valuations] for formula in formulae]
+    return values, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--formulae", type=int, default=100, help="random formulae per logic")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--atomics", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    atomics = ["p", "q", "r", "s", "t", "u"][:args.atomics]
+    consistent = True
+    for logic in instances(many_valued_semantics) + instances(mapped_logic_semantics):
+        generic, short_circuit = copy(logic), copy(logic)
+        generic.use_molecular_valuation_fast_version = False
+        short_circuit.use_molecular_valuation_fast_version = True
+        short_circuit._short_circuit_tables = {}
+        formulae = [random_formula_generator.random_formula(args.depth, atomics, logic.language, exact_depth=False)
+                    for _ in range(args.formulae)]
+        valuations = [dict(zip(atomics, values)) for values in product(logic.truth_values, repeat=len(atomics))]
+
+        generic_values, generic_time = timed_valuations(generic, formulae, valuations)
+        short_circuit_values, short_circuit_time = timed_valuations(short_circuit, formulae, valuations)
+        same = generic_values == short_circuit_values
+        consistent = consistent and same
+        print(f"{logic.name:<35} generic {generic_time:6.2f}s  short-circuit {short_circuit_time:6.2f}s  "
+              f"speedup {generic_time / short_circuit_time:5.2f}{'' if same else '  DIFFERENT VALUES'}")
+    return consistent
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
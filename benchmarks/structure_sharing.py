@@ -0,0 +1,87 @@
+# Natural deduction with and without structure sharing in substitution / instantiation (share_structure)
+#   python benchmarks/structure_sharing.py --facts 5 20 40 --repeat 3
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from logics.classes.propositional import Formula
+from logics.classes.propositional.formula import share_structure
+from logics.instances.propositional.languages import classical_language
+from logics.utils.parsers import classical_parser
+from logics.utils.solvers import classical_natural_deduction_solver
+from benchmarks.common import nested
+
+# example_problem.txt: P1 Judge amends issue, P2 the defendant is E2M, P3 the defendant offered an ATIS Alert,
+# P4 there is wrong-doing, P5 Claim states TST
+EXAMPLE = "((P1 ∧ P2) ∧ P3), (P1 → ~P4), (P3 → (~P1 ∨ ~P5)) / ~(P5 ∨ P4)"
+
+
+def contract(count):
+    facts = [f"P{i}" for i in range(1, count + 1)]
+    wrongs = [f"Q{i}" for i in range(1, count + 1)]
+    premises = [nested(facts + ["R"], "∧")] + [f"({fact} → ~{wrong})" for fact, wrong in zip(facts, wrongs)]
+    return f"{', '.join(premises)} / ~{nested(wrongs, '∨')}"
+
+
+def solve(text):
+    """Solves the argument, removes the unused fact R from its first premise and solves it again"""
+    inference = classical_parser.parse(text)
+    derivation = classical_natural_deduction_solver.solve(inference)
+    reduced = inference.premises[0].schematic_reduction(classical_language, inference.premises[0], Formula(["R"]))
+    inference = inference.substitute(inference.premises[0], reduced)
+    return [derivation, classical_natural_deduction_solver.solve(inference)]
+
+
+def distinct_formulae(derivations):
+    seen = set()
+    stack = [step.content for derivation in derivations for step in derivation]
+    while stack:
+        formula = stack.pop()
+        if id(formula) not in seen:
+            seen.add(id(formula))
+            stack.extend(formula[1:])
+    return len(seen)
+
+
+def measure(texts, repeat):
+    """Best time, peak traced memory and distinct Formula objects of solving every argument, and the derivations"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            solve(text)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    results = [solve(text) for text in texts]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    objects = sum(distinct_formulae(derivations) for derivations in results)
+    return best, peak, objects, [[str(derivation) for derivation in derivations] for derivations in results]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--facts", type=int, nargs="*", default=[5, 20, 40])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    consistent = True
+    for name, texts in [("example", [EXAMPLE])] + [(f"{count} facts", [contract(count)]) for count in args.facts]:
+        share_structure(False)
+        copied_time, copied_peak, copied_objects, copied = measure(texts, args.repeat)
+        share_structure(True)
+        shared_time, shared_peak, shared_objects, shared = measure(texts, args.repeat)
+        share_structure(False)
+        same = copied == shared
+        consistent = consistent and same
+        print(f"{name:<9} time {copied_time:7.3f}s -> {shared_time:7.3f}s  "
+              f"peak memory {copied_peak / 1024:8.1f}KiB -> {shared_peak / 1024:8.1f}KiB  "
+              f"formula objects {copied_objects:>6} -> {shared_objects:>6}{'' if same else '  DIFFERENT DERIVATIONS'}")
+    return consistent
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,84 +1,150 @@
-from utils.extract_statement import extract_section, extract_statements, read_contact
+
+from utils.extract_statement import SEGMENTER, iter_statements
 import premise_to_proposition
 import string
 from logics.utils.solvers.natural_deduction import classical_natural_deduction_solver
 from logics.utils.parsers import classical_parser
-from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST
+from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics
 import json
 from logics.instances.propositional.languages import classical_language
 import logics
-import sys
-
-file = "shorter.pdf" if not sys.argv[1:] else sys.argv[1]
-if file.endswith(".txt"):
-    with open(file) as f:
-        section_text = f.read()
-else:
-    text = read_contact(file)
-    section_text = extract_section(text)
-statements = extract_statements(section_text)
-print("Extracted Statements:")
-for s in statements:
-    print(s)
-
-LLMProcessingPremise = premise_to_proposition.LLMProcessingPremise(model_name="llama3.1")
-result = LLMProcessingPremise.process_clause(' '.join(statements), use_llm=True)
-formula, variable_map = result["formula"], result["variable_map"]
-# Post-process formula string to ensure formatting
 import re
-formula = formula.replace("->", "→").translate(str.maketrans("⋀⋁¬", "∧∨~"))
-# removing bad parens around negations e.g. (~P2) -> ~P2
-formula = re.sub(r'\(\s*(~P\d+)\s*\)', r'\1', formula)
-# Make sure conclusions and things have outer parentheses if they don't
-if "/" in formula:
-    premises_str, conclusion_str = formula.split("/", 1)
-    premises = [p.strip() for p in re.split(r',|\n', premises_str) if p.strip()]
-    
-    rewritten_initial_conditions = ", ".join(premises) + " / " + conclusion_str.strip()
-else:
-    rewritten_initial_conditions = formula
-rewritten_initial_conditions = re.sub(r'\s+', ' ', rewritten_initial_conditions)
-
-print("formula: ", rewritten_initial_conditions)
-print("mapping: ")
-print(json.dumps(variable_map, indent=2))
-
-
-
-
-logics.instances.predicate.languages.metavariables = list(variable_map.keys())
-logics.instances.propositional.languages.metavariables = list(variable_map.keys())
-parsed = classical_parser.parse(rewritten_initial_conditions)
-is_valid = ST.is_valid(parsed)
-if not is_valid:
-    print(rewritten_initial_conditions, " is not a valid inference")
-    exit(1)
-derivation = classical_natural_deduction_solver.solve(parsed)
-
-# original solution
-derivation.print_derivation(classical_parser)
-
-# Find unused premise lines of the original solution
-args_used = set([x for sublist in [i.on_steps for i in list(derivation)] for x in sublist])
-prem_size = len(derivation)-1
-unused_args = set(range(prem_size)) - args_used
-unused_formulas = [derivation[i].content for i in unused_args]
-
-print("Propositional map:\n",variable_map)
-
-
-print("\nSimplified version:")
-
-# Find and all instances of the unused formulas and remove them. Also remove any premises that consist entirely of unused formulas.
-for i in unused_formulas:
-    for prem in range(len(parsed.premises)):
-        red = parsed.premises[prem].schematic_reduction(classical_language,parsed.premises[prem],i)
-        parsed = parsed.substitute(parsed.premises[prem],red)
-
-    parsed.premises = [p for p in parsed.premises if i != p]
-
-#Solve again using the simplified premises
-derivation = classical_natural_deduction_solver.solve(parsed)
-
-derivation.print_derivation(classical_parser)
-
+import sys
+import argparse
+import threading
+from utils.encoder import get_encoder
+from utils.instrumentation import Profiler, stage
+from copy import copy
+
+# ST with validity decided by a SAT solver instead of enumerating valuations (arguments often have 30+ variables)
+ST = copy(ST_mvl_semantics)
+ST.backend = "sat"
+
+
+def load_statements(file, page_workers=None):
+    if file.endswith(".txt"):
+        with open(file) as f:
+            return SEGMENTER.statements(f.read())
+    return list(iter_statements(file, workers=page_workers))
+
+
+def rewrite_formula(formula):
+    # Post-process formula string to ensure formatting
+    formula = formula.replace("->", "→").translate(str.maketrans("⋀⋁¬", "∧∨~"))
+    # removing bad parens around negations e.g. (~P2) -> ~P2
+    formula = re.sub(r'\(\s*(~P\d+)\s*\)', r'\1', formula)
+    # Make sure conclusions and things have outer parentheses if they don't
+    if "/" in formula:
+        premises_str, conclusion_str = formula.split("/", 1)
+        premises = [p.strip() for p in re.split(r',|\n', premises_str) if p.strip()]
+
+        rewritten_initial_conditions = ", ".join(premises) + " / " + conclusion_str.strip()
+    else:
+        rewritten_initial_conditions = formula
+    return re.sub(r'\s+', ' ', rewritten_initial_conditions)
+
+
+def formalize(statements, processor):
+    result = processor.process_clause(' '.join(statements), use_llm=True)
+    formula, variable_map = result["formula"], result["variable_map"]
+    return rewrite_formula(formula), variable_map
+
+
+async def formalize_async(statements, processor):
+    result = await processor.process_clause_async(' '.join(statements), use_llm=True)
+    formula, variable_map = result["formula"], result["variable_map"]
+    return rewrite_formula(formula), variable_map
+
+
+def derivation_lines(derivation):
+    # Same format as Derivation.print_derivation, but returned instead of printed
+    lines = []
+    for step_index, step in enumerate(derivation):
+        lines.append("|  " * len(step.open_suppositions) +
+                     f"{step_index}. {classical_parser.unparse(step.content)}; {step.justification}; {step.on_steps}")
+    return lines
+
+
+def solve_argument(argument, variables):
+    logics.instances.predicate.languages.metavariables = list(variables)
+    logics.instances.propositional.languages.metavariables = list(variables)
+    parsed = classical_parser.parse(argument)
+    with stage("validity"):
+        valid = ST.is_valid(parsed)
+    if not valid:
+        return {"valid": False}
+    with stage("natural_deduction"):
+        derivation = classical_natural_deduction_solver.solve(parsed)
+    original_lines = derivation_lines(derivation)
+
+    # Find unused premise lines of the original solution
+    args_used = set([x for sublist in [i.on_steps for i in list(derivation)] for x in sublist])
+    prem_size = len(derivation)-1
+    unused_args = set(range(prem_size)) - args_used
+    unused_formulas = [derivation[i].content for i in unused_args]
+
+    # Find and all instances of the unused formulas and remove them. Also remove any premises that consist entirely of unused formulas.
+    with stage("simplification"):
+        for i in unused_formulas:
+            for prem in range(len(parsed.premises)):
+                red = parsed.premises[prem].schematic_reduction(classical_language,parsed.premises[prem],i)
+                parsed = parsed.substitute(parsed.premises[prem],red)
+
+            parsed.premises = [p for p in parsed.premises if i != p]
+
+    #Solve again using the simplified premises
+    with stage("natural_deduction"):
+        derivation = classical_natural_deduction_solver.solve(parsed)
+
+    return {"valid": True, "derivation": original_lines, "simplified_derivation": derivation_lines(derivation)}
+
+
+def main(file, use_cache=True):
+    # Load the sentence encoder in the background while the document is being read
+    threading.Thread(target=get_encoder().warm_up, daemon=True).start()
+    with stage("extract"):
+        statements = load_statements(file)
+    print("Extracted Statements:")
+    for s in statements:
+        print(s)
+
+    LLMProcessingPremise = premise_to_proposition.LLMProcessingPremise(model_name="llama3.1", use_cache=use_cache)
+    with stage("formalize"):
+        rewritten_initial_conditions, variable_map = formalize(statements, LLMProcessingPremise)
+
+    print("formula: ", rewritten_initial_conditions)
+    print("mapping: ")
+    print(json.dumps(variable_map, indent=2))
+
+    result = solve_argument(rewritten_initial_conditions, variable_map.keys())
+    if not result["valid"]:
+        print(rewritten_initial_conditions, " is not a valid inference")
+        return False
+
+    # original solution
+    print("\n".join(result["derivation"]))
+
+    print("Propositional map:\n",variable_map)
+
+    print("\nSimplified version:")
+    print("\n".join(result["simplified_derivation"]))
+    return True
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("file", nargs="?", default="shorter.pdf")
+    arg_parser.add_argument("--no-cache", action="store_true", help="ask Ollama again instead of reusing stored responses")
+    arg_parser.add_argument("--report", help="write a JSON report of the time / memory / solver work of each stage")
+    arg_parser.add_argument("--profile", help="also dump cProfile stats of the run to this file")
+    args = arg_parser.parse_args()
+
+    if args.report or args.profile:
+        with Profiler(args.file, profile_path=args.profile) as profiler:
+            valid = main(args.file, use_cache=not args.no_cache)
+        if args.report:
+            profiler.write_report(args.report)
+    else:
+        valid = main(args.file, use_cache=not args.no_cache)
+    if not valid:
+        sys.exit(1)
@@ -1,23 +1,30 @@
 # extract statements from pdfs
-from pypdf import PdfReader
+from utils.pdf_text import literal_segmenter, read_pages, read_section as read_pdf_section
 import ollama
 from premise_to_proposition import LLMProcessingPremise
+from utils.ollama_client import AsyncOllamaClient
 import json
 
 def read_contact(filename):
-    reader = PdfReader(filename)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    # pages are extracted in parallel for long files and cached per file hash (see utils/pdf_text.py)
+    return read_pages(filename)
+
+# Markers of the section we want, used by extract_section and read_section
+SECTION_START = "III. Analysis"
+SECTION_END = "IV"
+SEGMENTER = literal_segmenter(SECTION_START, SECTION_END)
+
+def read_section(filename, workers=None):
+    # extract_section(read_contact(filename)), but stops reading the PDF once the end of the section is reached
+    return read_pdf_section(filename, SEGMENTER, workers=workers)
 
 # we want to get the text within the section "III. Analysis"
 def extract_section(text):
     # find the start and end positions of the section
-    start_pos = text.find("III. Analysis")
+    start_pos = text.find(SECTION_START)
     if start_pos == -1:
         return []
-    end_pos = text.find("IV", start_pos)
+    end_pos = text.find(SECTION_END, start_pos)
     if end_pos == -1:
         end_pos = len(text)
     # get the text within the section
@@ -40,9 +47,7 @@ def extract_statements(section_text):
     return statements
 
 # send the statements to Ollama to extract propostions from them
-def extract_propositions_with_ollama(statements, model="llama3.1"):
-    extracted_propositions = []
-
+def _propositions_prompt(statements):
     # for s in statements
     prompt = f"""
         Summarize the following legal text into a sequence of simple, short, and continuous propositional sentences separated by periods. Add a claim at the end that captures the main conclusion of the text.
@@ -55,11 +60,15 @@ def extract_propositions_with_ollama(statements, model="llama3.1"):
         Legal text:
         {' '.join(statements)}
         """
+    return prompt
+
+def extract_propositions_with_ollama(statements, model="llama3.1"):
+    extracted_propositions = []
 
     try:
         response = ollama.generate(
             model=model,
-            prompt=prompt,
+            prompt=_propositions_prompt(statements),
             options={"temperature": 0}
         )
         response_text = response['response'].strip()
@@ -70,3 +79,22 @@ def extract_propositions_with_ollama(statements, model="llama3.1"):
         extracted_propositions.append(None)
 
     return extracted_propositions
+
+# same as above, through a (shareable) AsyncOllamaClient so several documents can be summarized concurrently
+async def extract_propositions_with_ollama_async(statements, model="llama3.1", client=None):
+    if client is None:
+        # A client is bound to the event loop it runs on, so one opened here is closed before returning
+        async with AsyncOllamaClient() as client:
+            return await extract_propositions_with_ollama_async(statements, model, client)
+    extracted_propositions = []
+
+    try:
+        response_text = (await client.generate(model, _propositions_prompt(statements),
+                                               options={"temperature": 0})).strip()
+        extracted_propositions.append(response_text)
+        print(f"--- Propositions for statement ---\n{response_text}\n")
+    except Exception as e:
+        print(f"Error connecting to Ollama: {e}")
+        extracted_propositions.append(None)
+
+    return extracted_propositions
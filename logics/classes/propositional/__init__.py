@@ -1,3 +1,5 @@
 from logics.classes.propositional.formula import Formula
+from logics.classes.propositional.interned_formula import InternedFormula
+from logics.classes.propositional.compact_formula import CompactFormula, FormulaCorpus
 from logics.classes.propositional.inference import Inference
 from logics.classes.propositional.language import Language, InfiniteLanguage
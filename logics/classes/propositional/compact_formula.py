@@ -0,0 +1,399 @@
+"""
+Compact, array-backed encoding of formulae, for working with large numbers of them.
+"""
+from array import array
+
+import numpy as np
+
+from logics.classes.propositional.formula import Formula
+
+
+class SymbolTable:
+    """Two-way mapping between the symbols of some formulae and the integer codes used to encode them.
+
+    The symbol of a node of a formula is its first element (an atomic string, a constant or a quantifier) if it has no
+    other element besides its arguments, and the tuple of every element that is not an argument otherwise (e.g.
+    ``('P', 'x', 'a')`` for the atomic predicate formula ``['P', 'x', 'a']``, ``('∀', 'x')`` for ``['∀', 'x', ['P',
+    'x']]``).
+
+    Examples
+    --------
+    >>> from logics.classes.propositional.compact_formula import SymbolTable
+    >>> table = SymbolTable()
+    >>> table.code('∧'), table.code('p'), table.code('∧')
+    (0, 1, 0)
+    >>> table.symbols
+    ['∧', 'p']
+    """
+    def __init__(self, symbols=None):
+        self.symbols = []
+        self._codes = {}
+        for symbol in symbols or []:
+            self.code(symbol)
+
+    def code(self, symbol):
+        """The code of `symbol`, adding it to the table if it is not there"""
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self._codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __repr__(self):
+        return f'SymbolTable({self.symbols})'
+
+
+def _encode(formula, table, codes, arities):
+    """Appends the nodes of `formula`, in prefix order, to `codes` and `arities`. Returns the number of nodes"""
+    count = 0
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        elements = []
+        arguments = []
+        for element in node:
+            if isinstance(element, Formula):
+                arguments.append(element)
+            elif arguments:
+                raise ValueError(f'Cannot encode {node}, its arguments must be its last elements')
+            else:
+                elements.append(element)
+        codes.append(table.code(elements[0] if len(elements) == 1 else tuple(elements)))
+        arities.append(len(arguments))
+        stack.extend(reversed(arguments))
+        count += 1
+    return count
+
+
+def _sizes(arities):
+    """The number of nodes of the subformula that begins at every node, given the arities of the nodes in prefix
+    order (of one or several formulae)"""
+    sizes = array('i', bytes(4 * len(arities)))
+    stack = []
+    for position in range(len(arities) - 1, -1, -1):
+        size = 1
+        for _ in range(arities[position]):
+            size += stack.pop()
+        sizes[position] = size
+        stack.append(size)
+    return sizes
+
+
+def _levels(sizes):
+    """The number of ancestors of every node (a subformula is an ancestor of the nodes after it, up to its size)"""
+    positions = np.arange(len(sizes))
+    steps = np.ones(len(sizes) + 1, dtype=np.intc)
+    steps[0] = 0
+    steps -= np.bincount(positions + sizes, minlength=len(sizes) + 1).astype(np.intc)
+    return np.cumsum(steps[:-1], dtype=np.intc)
+
+
+def _as_array(buffer):
+    return np.frombuffer(buffer, dtype=np.intc) if len(buffer) else np.zeros(0, dtype=np.intc)
+
+
+class CompactFormula:
+    """Formula (or PredicateFormula) encoded as integer arrays.
+
+    Every node of the formula (each subformula occurrence) takes three integers: the code of its symbol in a
+    ``SymbolTable`` (see above), its number of arguments and its size (its number of nodes, itself included). The
+    nodes are in prefix order, so a subformula is a contiguous slice of the arrays, and is taken without copying
+    anything. `depth`, `levels` and `letters` are computed with NumPy over the whole arrays. The formulae of a
+    ``FormulaCorpus`` (see below) are CompactFormula too.
+
+    The compiled backends of the many-valued semantics (see ``logics.classes.propositional.semantics.compiled``)
+    evaluate CompactFormula directly, also inside an Inference. For anything else, ``to_formula()`` gives back the
+    original formula.
+
+    Parameters
+    ----------
+    codes, arities, sizes: numpy.ndarray
+        The symbol codes, number of arguments and sizes of the nodes, in prefix order
+    table: logics.classes.propositional.compact_formula.SymbolTable
+        The table of the symbol codes
+    formula_class: type, optional
+        The class of the formula, ``Formula`` by default
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.languages import classical_language
+    >>> from logics.classes.propositional.compact_formula import CompactFormula
+    >>> f = CompactFormula.from_formula(classical_parser.parse('(p ∧ ~q) ∨ ~~p'))
+    >>> f.codes
+    array([0, 1, 2, 3, 4, 3, 3, 2], dtype=int32)
+    >>> f.arities
+    array([2, 2, 0, 1, 0, 1, 1, 0], dtype=int32)
+    >>> f.sizes
+    array([8, 4, 1, 2, 1, 3, 2, 1], dtype=int32)
+    >>> f.table
+    SymbolTable(['∨', '∧', 'p', '~', 'q'])
+    >>> f.depth, f.levels
+    (3, array([0, 1, 2, 2, 3, 1, 2, 3], dtype=int32))
+    >>> f.arguments()[1]
+    ['~', ['~', ['p']]]
+    >>> np.shares_memory(f.arguments()[1].codes, f.codes)  # a view, not a copy
+    True
+    >>> f.atomics_inside(classical_language) == {'p', 'q'}
+    True
+    >>> f.to_formula() == classical_parser.parse('(p ∧ ~q) ∨ ~~p')
+    True
+
+    Predicate formulae are encoded as well:
+
+    >>> from logics.utils.parsers.predicate_parser import classical_predicate_parser
+    >>> h = classical_predicate_parser.parse('forall x (if P(x) then exists y R(x, f(y)))')
+    >>> g = CompactFormula.from_formula(h)
+    >>> g.table
+    SymbolTable([('∀', 'x'), '→', ('P', 'x'), ('∃', 'y'), ('R', 'x', ('f', 'y'))])
+    >>> g.depth == h.depth, g.to_formula() == h, type(g.to_formula())
+    (True, True, <class 'logics.classes.predicate.formula.PredicateFormula'>)
+    """
+    __slots__ = ('codes', 'arities', 'sizes', 'table', 'formula_class')
+
+    def __init__(self, codes, arities, sizes, table, formula_class=Formula):
+        self.codes = codes
+        self.arities = arities
+        self.sizes = sizes
+        self.table = table
+        self.formula_class = formula_class
+
+    @classmethod
+    def from_formula(cls, formula, table=None):
+        """Encodes a Formula (or PredicateFormula), with the symbols of `table` (a new SymbolTable by default)
+
+        Raises
+        ------
+        ValueError
+            If some element of the formula that is not a formula comes after one that is (i.e. it is not well formed)
+        """
+        table = SymbolTable() if table is None else table
+        codes = array('i')
+        arities = array('i')
+        _encode(formula, table, codes, arities)
+        return cls(_as_array(codes), _as_array(arities), _as_array(_sizes(arities)), table, type(formula))
+
+    def to_formula(self):
+        """Returns the (new) Formula or PredicateFormula this encodes"""
+        stack = []
+        symbols = self.table.symbols
+        arities = self.arities.tolist()
+        for position, code in reversed(list(enumerate(self.codes.tolist()))):
+            symbol = symbols[code]
+            elements = list(symbol) if type(symbol) is tuple else [symbol]
+            for _ in range(arities[position]):
+                elements.append(stack.pop())
+            stack.append(self.formula_class(elements))
+        return stack[0]
+
+    def subformula(self, position):
+        """The subformula that begins at the node in `position` (in prefix order), sharing the arrays of this one"""
+        stop = position + self.sizes[position]
+        return self.__class__(self.codes[position:stop], self.arities[position:stop], self.sizes[position:stop],
+                              self.table, self.formula_class)
+
+    def arguments(self):
+        """Same as ``Formula.arguments``"""
+        arguments = []
+        position = 1
+        for _ in range(self.arities[0]):
+            arguments.append(self.subformula(position))
+            position += self.sizes[position]
+        return arguments
+
+    @property
+    def is_atomic(self):
+        return self.arities[0] == 0
+
+    @property
+    def main_symbol(self):
+        if self.is_atomic:
+            return None
+        symbol = self.table.symbols[self.codes[0]]
+        return symbol[0] if type(symbol) is tuple else symbol
+
+    @property
+    def levels(self):
+        """The number of ancestors of every node, e.g. ``0`` for the formula itself"""
+        return _levels(self.sizes)
+
+    @property
+    def depth(self):
+        """Same as ``Formula.depth``"""
+        return int(self.levels.max())
+
+    @property
+    def level(self):
+        return 0
+
+    @property
+    def letters(self):
+        """The set of the symbols of the atomic subformulae"""
+        symbols = self.table.symbols
+        return {symbols[code] for code in np.unique(self.codes[self.arities == 0]).tolist()}
+
+    def atomics_inside(self, language, prev_at=None):
+        """Same as ``Formula.atomics_inside`` (including the order of the set)"""
+        at = prev_at or set()
+        leaves = self.codes[self.arities == 0]
+        _, first = np.unique(leaves, return_index=True)
+        for code in leaves[np.sort(first)].tolist():
+            symbol = self.table.symbols[code]
+            symbol = symbol[0] if type(symbol) is tuple else symbol
+            if not language.is_sentential_constant_string(symbol):
+                at.add(symbol)
+        return at
+
+    def is_schematic(self, language):
+        """Same as ``Formula.is_schematic`` for propositional formulae"""
+        return any(language.is_metavariable_string(symbol) for symbol in self.letters if type(symbol) is str)
+
+    @property
+    def subformulae(self):
+        """Same as ``Formula.subformulae``, as CompactFormula"""
+        sf = []
+        seen = set()
+        # Formula.subformulae lists every subformula after its own subformulae, i.e. in the order in which they end
+        positions = np.arange(len(self.codes))
+        for position in np.lexsort((-positions, positions + self.sizes)).tolist():
+            subformula = self.subformula(position)
+            key = subformula._key()
+            if key not in seen:
+                seen.add(key)
+                sf.append(subformula)
+        return sf
+
+    def _key(self):
+        return self.codes.tobytes(), self.arities.tobytes()
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactFormula):
+            return NotImplemented
+        if self.table is other.table:
+            return self._key() == other._key()
+        return (np.array_equal(self.arities, other.arities) and
+                [self.table.symbols[code] for code in self.codes.tolist()] ==
+                [other.table.symbols[code] for code in other.codes.tolist()])
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        # By the symbols, not their codes, since formulae encoded with different tables can be equal (see above)
+        symbols = self.table.symbols
+        return hash((self.arities.tobytes(), tuple(symbols[code] for code in self.codes.tolist())))
+
+    def __repr__(self):
+        return repr(self.to_formula())
+
+
+class FormulaCorpus:
+    """Many formulae encoded as CompactFormula (see above), with the same SymbolTable, in a single set of arrays.
+
+    The nodes of the formulae are stored one formula after another, in ``array('i')`` buffers (4 bytes per integer,
+    instead of a list and a string object per node), and seen as NumPy arrays without copying. ``corpus[i]`` is the
+    i-th formula, as a CompactFormula that shares the arrays of the corpus. The depths and atomic letters of every
+    formula are computed at once, with NumPy.
+
+    Parameters
+    ----------
+    formulae: iterable of logics.classes.propositional.Formula
+        The formulae to encode (can be a generator, the formulae are encoded one by one)
+    table: logics.classes.propositional.compact_formula.SymbolTable, optional
+        The table of the symbol codes. A new one by default
+
+    Raises
+    ------
+    TypeError
+        If the formulae are not all of the same class (e.g. some Formula and some PredicateFormula)
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.classes.propositional.compact_formula import FormulaCorpus
+    >>> corpus = FormulaCorpus(classical_parser.parse(text) for text in ['p ∧ q', '~~p', 'r', 'p ∧ q'])
+    >>> len(corpus), corpus.node_count
+    (4, 10)
+    >>> corpus[1]
+    ['~', ['~', ['p']]]
+    >>> corpus.depths()
+    array([1, 2, 0, 1], dtype=int32)
+    >>> corpus.letter_matrix()  # columns: the symbols of the table
+    array([[False,  True,  True, False, False],
+           [False,  True, False, False, False],
+           [False, False, False, False,  True],
+           [False,  True,  True, False, False]])
+    >>> corpus.table
+    SymbolTable(['∧', 'p', 'q', '~', 'r'])
+    >>> corpus.unique()  # the first occurrence of every distinct formula
+    [0, 1, 2]
+    >>> corpus.to_formulae()[3] == classical_parser.parse('p ∧ q')
+    True
+    """
+    def __init__(self, formulae, table=None):
+        self.table = SymbolTable() if table is None else table
+        self.formula_class = Formula
+        codes = array('i')
+        arities = array('i')
+        starts = array('i')
+        for index, formula in enumerate(formulae):
+            if index == 0:
+                self.formula_class = type(formula)
+            elif type(formula) is not self.formula_class:
+                raise TypeError(f'Formula {index} is a {type(formula).__name__}, the previous ones are '
+                                f'{self.formula_class.__name__} (all the formulae of a corpus must be of the same class)')
+            starts.append(len(codes))
+            _encode(formula, self.table, codes, arities)
+        self._buffers = (codes, arities, _sizes(arities), starts)
+        self.codes, self.arities, self.sizes, self.starts = (_as_array(buffer) for buffer in self._buffers)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def node_count(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        start = self.starts[index]
+        return CompactFormula(self.codes, self.arities, self.sizes, self.table, self.formula_class).subformula(start)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _formula_of_node(self):
+        """The index of the formula of every node"""
+        return np.repeat(np.arange(len(self), dtype=np.intc), np.diff(np.append(self.starts, self.node_count)))
+
+    def depths(self):
+        """The depth of every formula"""
+        if not len(self):
+            return np.zeros(0, dtype=np.intc)
+        return np.maximum.reduceat(_levels(self.sizes), self.starts)
+
+    def letter_matrix(self):
+        """Boolean matrix with a row per formula and a column per symbol of the table, that says which symbols are
+        atomic subformulae of which formulae"""
+        matrix = np.zeros((len(self), len(self.table)), dtype=bool)
+        leaves = self.arities == 0
+        matrix[self._formula_of_node()[leaves], self.codes[leaves]] = True
+        return matrix
+
+    def unique(self):
+        """The indexes of the first occurrence of every distinct formula"""
+        first = {}
+        for index in range(len(self)):
+            key = self[index]._key()
+            if key not in first:
+                first[key] = index
+        return list(first.values())
+
+    def to_formulae(self):
+        """The (new) Formula or PredicateFormula of every formula"""
+        return [compact.to_formula() for compact in self]
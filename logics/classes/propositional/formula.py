@@ -3,6 +3,86 @@ Classes for handling propositional formulae.
 """
 from copy import deepcopy
 
+# See cache_properties and share_structure below
+_caching = False
+_sharing = False
+_epoch = 0
+_MUTATORS = ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop', 'remove',
+             'clear', 'sort', 'reverse')
+
+
+def cache_properties(enabled=True):
+    """Turns on (or off) the caching of ``depth``, ``subformulae``, ``atomics_inside`` and ``is_schematic`` of Formula
+    (and PredicateFormula).
+
+    With caching on, each of these is computed only once for every formula object (and language, for the last two),
+    from the cached values of its subformulae, and then reused. Caching is off by default, since it makes the list
+    methods that modify formulae a bit slower: while it is on, modifying a formula that has some cached value (or is a
+    subformula of one that has) throws away every cached value.
+
+    Examples
+    --------
+    >>> from logics.classes.propositional import Formula
+    >>> from logics.classes.propositional.formula import cache_properties
+    >>> from logics.instances.propositional.languages import classical_language
+    >>> cache_properties()
+    >>> f = Formula(['∧', ['p'], ['~', ['A']]])
+    >>> f.is_schematic(classical_language)
+    True
+    >>> f[2] = Formula(['q'])
+    >>> f.is_schematic(classical_language), f.depth
+    (False, 1)
+    >>> cache_properties(False)
+    """
+    global _caching, _epoch
+    _epoch += 1  # The cached values cannot be trusted if formulae are modified while caching is off
+    _caching = enabled
+    for name in _MUTATORS:
+        if enabled:
+            setattr(Formula, name, _invalidating(getattr(list, name)))
+        elif name in Formula.__dict__:
+            delattr(Formula, name)
+
+
+def share_structure(enabled=True):
+    """Turns on (or off) structure sharing in ``substitute``, ``instantiate``, ``schematic_substitute`` and
+    ``schematic_reduction`` of Formula (and PredicateFormula).
+
+    By default these methods build an entirely new formula. With structure sharing on, every subformula that the
+    method leaves unchanged is the original subformula object (the whole formula, if nothing changes), and only the
+    formulae above the changed ones are new. This saves time and memory when, e.g., instantiating rules many times,
+    but the result and the original formula may then have subformulae in common, so modifying one of them in place
+    modifies the other. It is off by default for that reason.
+
+    Examples
+    --------
+    >>> from logics.classes.propositional import Formula
+    >>> from logics.classes.propositional.formula import share_structure
+    >>> f = Formula(['∧', ['p'], ['~', ['A']]])
+    >>> share_structure()
+    >>> g = f.substitute(Formula(['p']), Formula(['q']))
+    >>> g, g is f, g[2] is f[2]
+    (['∧', ['q'], ['~', ['A']]], False, True)
+    >>> f.substitute(Formula(['r']), Formula(['q'])) is f
+    True
+    >>> share_structure(False)
+    >>> f.substitute(Formula(['r']), Formula(['q'])) is f
+    False
+    """
+    global _sharing
+    _sharing = enabled
+
+
+def _invalidating(method):
+    def mutator(self, *args, **kwargs):
+        global _epoch
+        if '_property_cache' in self.__dict__:
+            _epoch += 1
+            del self.__dict__['_property_cache']
+        return method(self, *args, **kwargs)
+    mutator.__name__ = method.__name__
+    return mutator
+
 
 class Formula(list):
     """Class for representing propositional formulae.
@@ -37,6 +117,27 @@ class Formula(list):
                 argument = self.__class__(argument)
                 self[index] = argument
 
+    def _cached(self, key, compute):
+        """The value of `compute()`, computed only once while caching is on (see ``cache_properties``).
+
+        Every formula whose cached value is computed from the cached values of its subformulae has a cache itself,
+        so modifying any formula with a cache (see ``_invalidating``) is enough to invalidate every stale value"""
+        if not _caching:
+            return compute()
+        cache = self.__dict__.get('_property_cache')
+        if cache is None or cache[0] != _epoch:
+            cache = self._property_cache = (_epoch, {})
+        values = cache[1]
+        if key not in values:
+            values[key] = compute()
+        return values[key]
+
+    def __getstate__(self):
+        # Copies (and pickles) of the formula do not take its cache
+        state = self.__dict__.copy()
+        state.pop('_property_cache', None)
+        return state
+
     @property
     def is_atomic(self):
         """Returns ``True`` if the formula is atomic.
@@ -84,6 +185,9 @@ class Formula(list):
         >>> Formula(['∧', ['p'], ['~', ['A']]]).is_schematic(classical_language)
         True
         """
+        return self._cached(('is_schematic', language), lambda: self._is_schematic(language))
+
+    def _is_schematic(self, language):
         if self.is_atomic:
             return language.is_metavariable_string(self[0])
         else:
@@ -120,6 +224,9 @@ class Formula(list):
         >>> Formula(['∧', ['p'], ['~', ['A']]]).depth
         2
         """
+        return self._cached('depth', self._depth)
+
+    def _depth(self):
         if self.is_atomic:
             return 0
         return max(x.depth for x in [x for x in self if type(x) == type(self)]) + 1
@@ -133,6 +240,19 @@ class Formula(list):
         """Shortcut for ``language.is_well_formed(formula)``"""
         return language.is_well_formed(self)
 
+    def intern(self):
+        """Returns the interned, immutable version of the formula (see ``InternedFormula``), which can be used as a
+        dict key or set member
+
+        Examples
+        --------
+        >>> from logics.classes.propositional import Formula
+        >>> Formula(['~', ['p']]).intern() is Formula(['~', ['p']]).intern()
+        True
+        """
+        from logics.classes.propositional.interned_formula import InternedFormula
+        return InternedFormula.from_formula(self)
+
     @property
     def subformulae(self):
         """Returns a list of the subformulae of the formula, without repetitions.
@@ -147,8 +267,23 @@ class Formula(list):
         >>> Formula(["∧", ["p"], ["p"]]).subformulae  # p will only appear once
         [['p'], ['∧', ['p'], ['p']]]
         """
+        if _caching:
+            return list(self._cached('subformulae', self._cached_subformulae))
         return self._get_subformulae()
 
+    def _cached_subformulae(self):
+        # Same order as _get_subformulae, from the cached subformulae of the arguments
+        sf = []
+        if not self.is_atomic:
+            for argument in self:
+                if type(argument) == self.__class__:
+                    for subformula in argument._cached('subformulae', argument._cached_subformulae):
+                        if subformula not in sf:
+                            sf.append(subformula)
+        if self not in sf:
+            sf.append(self)
+        return sf
+
     def _get_subformulae(self, prev_sf=None):
         sf = prev_sf or []
         if not self.is_atomic:
@@ -170,6 +305,13 @@ class Formula(list):
         >>> Formula(['∧', ['p'], ['~', ['A']]]).atomics_inside(classical_language)
         {'A', 'p'}
         """
+        if _caching:
+            at = prev_at or set()
+            at.update(self._cached(('atomics_inside', language), lambda: frozenset(self._atomics_inside(language))))
+            return at
+        return self._atomics_inside(language, prev_at)
+
+    def _atomics_inside(self, language, prev_at=None):
         at = prev_at or set()
         if self.is_atomic:
             if not language.is_sentential_constant_string(self[0]):
@@ -181,10 +323,21 @@ class Formula(list):
                     at = argument.atomics_inside(language, prev_at=at)
             return at
 
+    def _rebuild(self, elements):
+        """A formula with the first element of this one followed by `elements`. With structure sharing on (see
+        ``share_structure``), this same formula if `elements` are the ones it already has"""
+        if _sharing and len(elements) == len(self) - 1 and all(new is old for new, old in zip(elements, self[1:])):
+            return self
+        formula = self.__class__([self[0]])
+        for element in elements:
+            formula.append(element)
+        return formula
+
     def substitute(self, sf_to_substitute, sf_with):
         """Substitutes a subformula for another subformula.
 
-        Will return a different ``Formula`` object, and not modify the original.
+        Will return a different ``Formula`` object, and not modify the original (unless structure sharing is on, see
+        ``share_structure``).
 
         The substituted one must match exactly, for example, calling ``Formula(['∧', ['p'], ['B']]).substitute``
         with arguments
@@ -215,21 +368,24 @@ class Formula(list):
         """
         # If the entire formula is the one you want to substitute (e.g. you wish to substitute ['p'] for ['q'] in ['p'])
         if self == sf_to_substitute:
+            if _sharing:
+                return sf_with
             return deepcopy(sf_with)  # This is just in case the user does something like f.substitute(..., f)
 
-        substitution = self.__class__([self[0]])  # Leave [0] instead of .main_symbol bc it may be atomic
         # For molecular formulae, substitute the arguments
+        elements = []
         for subelement in self[1:]:
             if isinstance(subelement, self.__class__):
-                substitution.append(subelement.substitute(sf_to_substitute, sf_with))
+                elements.append(subelement.substitute(sf_to_substitute, sf_with))
             else:
-                substitution.append(subelement)  # This will happen with the variables next to a quantifier in predicate
-        return substitution
+                elements.append(subelement)  # This will happen with the variables next to a quantifier in predicate
+        return self._rebuild(elements)  # Uses self[0] instead of .main_symbol bc it may be atomic
 
     def instantiate(self, language, subst_dict):
         """Given a schematic Formula, a language and a substitution dict, returns the schema instantiated with the dict.
 
-        Will return a different Formula object, and not modify the original.
+        Will return a different Formula object, and not modify the original (unless structure sharing is on, see
+        ``share_structure``).
 
         Parameters
         ----------
@@ -276,22 +432,25 @@ class Formula(list):
             if self[0] in subst_dict:
                 return subst_dict[self[0]]
         # Non-schematic atomic
+        if _sharing:
+            return self
         return deepcopy(self)
 
     def _molecular_instantiate(self, language, subst_dict):
-        instantiation = self.__class__([self.main_symbol])
+        elements = []
         for subelement in self[1:]:
             if isinstance(subelement, self.__class__):
-                instantiation.append(subelement.instantiate(language, subst_dict))
+                elements.append(subelement.instantiate(language, subst_dict))
             else:
-                instantiation.append(subelement)
-        return instantiation
+                elements.append(subelement)
+        return self._rebuild(elements)
 
     def schematic_substitute(self, language, schema_to_substitute, schema_with):
         """Takes a Formula and two schematic Formula, and substitutes any subformula instance of the first schema for
         the corresponding instance of the second schema.
 
-        Will return a different Formula object, and not modify the original.
+        Will return a different Formula object, and not modify the original (unless structure sharing is on, see
+        ``share_structure``).
 
         Parameters
         ----------
@@ -319,18 +478,21 @@ class Formula(list):
         ['→', ['p'], ['→', ['p'], ['q']]]
         """
         if self.is_atomic:
-            new_formula = deepcopy(self)  # Atomic PredicateFormula are not equal to self[0]
-        else:
-            new_formula = self.__class__([self[0]])
+            if _sharing:
+                new_formula = self
+            else:
+                new_formula = deepcopy(self)  # Atomic PredicateFormula are not equal to self[0]
 
         # Molecular
-        if not self.is_atomic:
+        else:
             # First substitute the subformulae
+            elements = []
             for subelement in self[1:]:
                 if isinstance(subelement, self.__class__):
-                    new_formula.append(subelement.schematic_substitute(language, schema_to_substitute, schema_with))
+                    elements.append(subelement.schematic_substitute(language, schema_to_substitute, schema_with))
                 else:
-                    new_formula.append(subelement)
+                    elements.append(subelement)
+            new_formula = self._rebuild(elements)
 
         # Once arguments have been substituted (or if the formula is atomic), substitute it
         instance, subst_dict = new_formula.is_instance_of(schema_to_substitute, language, return_subst_dict=True)
@@ -343,7 +505,8 @@ class Formula(list):
         """Takes a Formula and two schematic Formula, and removes any instance of the second literal formula in
         the instance of the first schema. Primarily for use in removing 1 side of a conjunction.
 
-        Will return a different Formula object, and not modify the original.
+        Will return a different Formula object, and not modify the original (unless structure sharing is on, see
+        ``share_structure``).
 
         Parameters
         ----------
@@ -369,32 +532,31 @@ class Formula(list):
         ['A']
         """
         if self.is_atomic:
-            new_formula = deepcopy(self)  # Atomic PredicateFormula are not equal to self[0]
-        else:
-            new_formula = self.__class__([self[0]])
+            if _sharing:
+                return self
+            return deepcopy(self)  # Atomic PredicateFormula are not equal to self[0]
 
         # Molecular
-        if not self.is_atomic:
-            # If we find the formulas to remove, we want to keep the other side of the conjuction. So 'symbol' will represent that other side.
-            symbol = 3
-            for subelement in self[1:]:
-                symbol -= 1
-                # If conjunction and one of the sides is the one we want to remove, keep the other side
-                if subelement[0] == '∧' and subelement[1] == schema_remove:
-                    new_formula.append(subelement[2])
-                elif subelement[0] == '∧' and subelement[2] == schema_remove:
-                    new_formula.append(subelement[1])
-                # For the main operator of the premise, it likes to have both sides on their own, so we have to check if the entire 
-                # formula is the one we want to remove, and if it is a conjunction, and if so, keep the other side 'symbol'
-                elif len(subelement)==1 and subelement == schema_remove and self[0] == '∧':
-                    new_formula = self[symbol]
-                    break
-                elif isinstance(subelement, (x:=self.__class__)):
-                    new_formula.append(subelement.schematic_reduction(language, schema_to_substitute, schema_remove))
-                else:
-                    new_formula.append(subelement)
+        # If we find the formulas to remove, we want to keep the other side of the conjuction. So 'symbol' will represent that other side.
+        symbol = 3
+        elements = []
+        for subelement in self[1:]:
+            symbol -= 1
+            # If conjunction and one of the sides is the one we want to remove, keep the other side
+            if subelement[0] == '∧' and subelement[1] == schema_remove:
+                elements.append(subelement[2])
+            elif subelement[0] == '∧' and subelement[2] == schema_remove:
+                elements.append(subelement[1])
+            # For the main operator of the premise, it likes to have both sides on their own, so we have to check if the entire 
+            # formula is the one we want to remove, and if it is a conjunction, and if so, keep the other side 'symbol'
+            elif len(subelement)==1 and subelement == schema_remove and self[0] == '∧':
+                return self[symbol]
+            elif isinstance(subelement, self.__class__):
+                elements.append(subelement.schematic_reduction(language, schema_to_substitute, schema_remove))
+            else:
+                elements.append(subelement)
 
-        return new_formula
+        return self._rebuild(elements)
 
     def is_instance_of(self, formula, language, subst_dict=None, return_subst_dict=False, order=None):
         """Determines if a Formula is an instance of another (tipically schematic) Formula.
@@ -0,0 +1,152 @@
+"""
+Interned (hash-consed), immutable propositional formulae.
+"""
+from weakref import WeakValueDictionary
+
+from logics.classes.propositional.formula import Formula
+
+
+class InternedFormula:
+    """Immutable version of a propositional ``Formula``, where every distinct formula is a single object.
+
+    ``InternedFormula(symbol, arguments)`` returns the existing object for that formula if there is one (the *interning
+    table* keeps every InternedFormula alive while something else refers to it). Thus, two interned formulae are equal
+    iff they are the same object, and comparing them takes constant time, no matter their size. They are hashable (the
+    hash is computed once), so they can be used as dict keys and set members, and a subformula shared by several
+    formulae is stored only once. The depth and the atomic letters inside are also computed once, when the formula is
+    built.
+
+    Parameters
+    ----------
+    symbol: str
+        The atomic letter / sentential constant, or the main symbol of a molecular formula
+    arguments: tuple of InternedFormula, optional
+        The arguments of a molecular formula. Leave it empty for atomic formulae
+
+    Attributes
+    ----------
+    symbol: str
+    arguments: tuple of InternedFormula
+    depth: int
+        Same as ``Formula.depth``
+    letters: frozenset of str
+        The atomic strings inside the formula, including sentential constants (``atomics_inside`` leaves them out)
+
+    Examples
+    --------
+    >>> from logics.classes.propositional import Formula, InternedFormula
+    >>> f = InternedFormula.from_formula(Formula(['∧', ['p'], ['~', ['A']]]))
+    >>> f
+    ['∧', ['p'], ['~', ['A']]]
+    >>> f is InternedFormula('∧', (InternedFormula('p'), InternedFormula('~', (InternedFormula('A'),))))
+    True
+    >>> f.arguments[1] is Formula(['~', ['A']]).intern()
+    True
+    >>> f.depth
+    2
+    >>> f.to_formula() == Formula(['∧', ['p'], ['~', ['A']]])
+    True
+    >>> {f: 'some value'}[Formula(['∧', ['p'], ['~', ['A']]]).intern()]
+    'some value'
+    >>> f.symbol = '∨'
+    Traceback (most recent call last):
+    ...
+    AttributeError: InternedFormula is immutable
+
+    Notes
+    -----
+    Only propositional formulae can be interned (every element of the Formula after the first must be a Formula)
+    """
+    __slots__ = ('symbol', 'arguments', 'depth', 'letters', '_hash', '__weakref__')
+    _table = WeakValueDictionary()
+
+    def __new__(cls, symbol, arguments=()):
+        key = (symbol, arguments)
+        formula = cls._table.get(key)
+        if formula is None:
+            if not all(type(argument) is cls for argument in arguments):
+                raise ValueError(f'The arguments of {symbol} must be {cls.__name__}')
+            formula = super().__new__(cls)
+            setattr_ = super(InternedFormula, formula).__setattr__
+            setattr_('symbol', symbol)
+            setattr_('arguments', arguments)
+            setattr_('_hash', hash(key))
+            if arguments:
+                setattr_('depth', max(argument.depth for argument in arguments) + 1)
+                setattr_('letters', frozenset().union(*(argument.letters for argument in arguments)))
+            else:
+                setattr_('depth', 0)
+                setattr_('letters', frozenset([symbol]))
+            cls._table[key] = formula
+        return formula
+
+    @classmethod
+    def from_formula(cls, formula):
+        """Returns the interned version of a Formula (also available as ``formula.intern()``)
+
+        Raises
+        ------
+        ValueError
+            If the formula is not a propositional formula
+        """
+        if formula.is_atomic:
+            return cls(formula[0])
+        arguments = []
+        for argument in formula[1:]:
+            if not isinstance(argument, Formula):
+                raise ValueError(f'Cannot intern {formula}, {argument} is not a formula')
+            arguments.append(cls.from_formula(argument))
+        return cls(formula[0], tuple(arguments))
+
+    def to_formula(self):
+        """Returns a (new, mutable) Formula equal to this one"""
+        formula = Formula([self.symbol])
+        for argument in self.arguments:
+            formula.append(argument.to_formula())
+        return formula
+
+    @property
+    def is_atomic(self):
+        """Same as ``Formula.is_atomic``"""
+        return not self.arguments
+
+    @property
+    def main_symbol(self):
+        """Same as ``Formula.main_symbol``"""
+        if self.is_atomic:
+            return None
+        return self.symbol
+
+    @property
+    def level(self):
+        return 0
+
+    def atomics_inside(self, language):
+        """Same as ``Formula.atomics_inside``, read from `letters`"""
+        return {letter for letter in self.letters if not language.is_sentential_constant_string(letter)}
+
+    def is_schematic(self, language):
+        """Same as ``Formula.is_schematic``, read from `letters`"""
+        return any(language.is_metavariable_string(letter) for letter in self.letters)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Copies and unpickled formulae are interned again, so they are the same object
+        return self.__class__, (self.symbol, self.arguments)
+
+    def __repr__(self):
+        return repr(self.to_formula())
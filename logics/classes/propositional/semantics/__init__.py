@@ -1,2 +1,3 @@
 from logics.classes.propositional.semantics.many_valued import MixedManyValuedSemantics, MixedMetainferentialSemantics, \
     IntersectionLogic, UnionLogic
+from logics.classes.propositional.semantics.logic_space import LogicSpace
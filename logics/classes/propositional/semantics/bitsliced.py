@@ -0,0 +1,216 @@
+"""Bit-parallel (bitsliced) evaluation of many-valued semantics with few truth values.
+
+A compiled formula (see ``logics.classes.propositional.semantics.compiled``) is evaluated on packed bits: for every
+node and every truth value there is a *plane*, an array of 64-bit words where bit ``i`` says whether the node takes
+that value in valuation ``i`` (so exactly one plane of each node has the bit set). A connective is then a handful of
+bitwise operations on whole words, that is, 64 valuations at a time: the plane of value v of ``$(A, B)`` is the union,
+over the rows of the truth table of ``$`` that give v, of the intersection of the corresponding planes of A and B.
+
+Valuations are evaluated in blocks that cover every combination of values of the last atomics (whose planes are the
+same for every block, so they are built once), for one fixed combination of the first atomics (whose planes are then
+all ones or all zeros). Blocks come in ``itertools.product`` order, so positions, counterexamples and truth tables
+come out in the same order as with the regular evaluation.
+"""
+
+import numpy as np
+
+from logics.classes.propositional.semantics.compiled import CompiledInference, CompilationError
+from logics.utils import counters
+
+#: Logics with more truth values are not bitsliced (the number of bitwise operations grows quickly with it)
+MAX_VALUES = 4
+#: Maximum number of valuations in one block
+BLOCK_SIZE = 1 << 18
+
+_ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def pack(bits):
+    """Packs a boolean array into 64-bit words (bit ``i`` of the result is ``bits[i]``, the last word is padded with
+    zeros)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from logics.classes.propositional.semantics.bitsliced import pack, unpack
+    >>> words = pack(np.array([True, False, True]))
+    >>> words
+    array([5], dtype=uint64)
+    >>> unpack(words, 3)
+    array([ True, False,  True])
+    """
+    padded = np.zeros(-(-len(bits) // 64) * 64, dtype=bool)
+    padded[:len(bits)] = bits
+    return np.packbits(padded, bitorder='little').view('<u8').astype(np.uint64)
+
+
+def unpack(words, size):
+    """Inverse of ``pack``, for the first `size` bits"""
+    return np.unpackbits(words.astype('<u8').view(np.uint8), bitorder='little')[:size].astype(bool)
+
+
+class BitslicedInference(CompiledInference):
+    """A formula or (meta)inference compiled for bit-parallel evaluation, for semantics with at most ``MAX_VALUES``
+    truth values. Same interface as ``CompiledInference``
+
+    Raises
+    ------
+    CompilationError
+        If the semantics has more than ``MAX_VALUES`` truth values, or for the same reasons as ``CompiledInference``
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST
+    >>> from logics.classes.propositional.semantics.bitsliced import BitslicedInference
+    >>> counterexample = BitslicedInference(ST, classical_parser.parse('(A / B), (B / C) // (A / C)')).counterexample()
+    >>> sorted(counterexample.items())
+    [('A', '1'), ('B', 'i'), ('C', '0')]
+    >>> BitslicedInference(ST, classical_parser.parse('p, p then q / q')).is_locally_valid()
+    True
+    """
+    def __init__(self, semantics, formula_or_inference, block_size=BLOCK_SIZE):
+        super().__init__(semantics, formula_or_inference)
+        if self.value_count > MAX_VALUES:
+            raise CompilationError(f'Bitslicing supports at most {MAX_VALUES} truth values')
+        self._check_enumerable()
+
+        # The last `low_count` atomics vary inside a block, the others are fixed for the whole block
+        self.low_count = 0
+        while self.low_count < len(self.atomics) and self.value_count ** (self.low_count + 1) <= block_size:
+            self.low_count += 1
+        self.block_size = self.value_count ** self.low_count
+        self.block_count = self.valuation_count // self.block_size
+        self._words = -(-self.block_size // 64)
+        self._valid = pack(np.ones(self.block_size, dtype=bool))
+
+        low_codes = CompiledInference.atomic_codes(self, 0, self.block_size)[len(self.atomics) - self.low_count:]
+        self._low_planes = [[pack(codes == value) for value in range(self.value_count)] for codes in low_codes]
+        self._rows = {}
+
+    def _rows_by_value(self, table, arity):
+        """For each value, the argument codes of the rows of the (flat) table that give that value"""
+        if id(table) not in self._rows:
+            rows = [[] for _ in range(self.value_count)]
+            for index, value in enumerate(table):
+                arguments = []
+                for _ in range(arity):
+                    index, code = divmod(index, self.value_count)
+                    arguments.insert(0, code)
+                rows[value].append(tuple(arguments))
+            self._rows[id(table)] = (table, rows)  # The table is kept so that its id is not reused
+        return self._rows[id(table)][1]
+
+    def _constant_planes(self, code):
+        return [np.full(self._words, _ALL_ONES if value == code else 0, dtype=np.uint64)
+                for value in range(self.value_count)]
+
+    def high_codes(self, block):
+        """Codes of the atomics that are fixed in `block`"""
+        codes = []
+        for _ in range(len(self.atomics) - self.low_count):
+            block, code = divmod(block, self.value_count)
+            codes.insert(0, code)
+        return codes
+
+    def node_planes(self, block):
+        """Planes of every node of the program in `block`"""
+        high_codes = self.high_codes(block)
+        planes = []
+        for kind, data, arguments in self._nodes:
+            if kind == 'atomic':
+                if data < len(high_codes):
+                    planes.append(self._constant_planes(high_codes[data]))
+                else:
+                    planes.append(self._low_planes[data - len(high_codes)])
+            elif kind == 'constant':
+                planes.append(self._constant_planes(data))
+            else:
+                node_planes = []
+                for rows in self._rows_by_value(data, len(arguments)):
+                    plane = np.zeros(self._words, dtype=np.uint64)
+                    for row in rows:
+                        term = planes[arguments[0]][row[0]] if row else np.full(self._words, _ALL_ONES)
+                        for argument, code in zip(arguments[1:], row[1:]):
+                            term = term & planes[argument][code]
+                        plane |= term
+                    node_planes.append(plane)
+                planes.append(node_planes)
+        return planes
+
+    def _satisfied_planes(self, program, planes):
+        if program[0] == 'formula':
+            _, node, mask = program
+            satisfied = np.zeros(self._words, dtype=np.uint64)
+            for value in np.flatnonzero(mask):
+                satisfied |= planes[node][value]
+            return satisfied
+
+        if program[0] == 'mapped':
+            _, premises, conclusions, allowed = program
+            # For every set of values (as a bitmask), the valuations where the formulae take exactly those values
+            exact_sets = []
+            for formulae in (premises, conclusions):
+                present = []
+                for value in range(self.value_count):
+                    plane = np.zeros(self._words, dtype=np.uint64)
+                    for node in formulae:
+                        plane |= planes[node][value]
+                    present.append(plane)
+                sets = []
+                for bitmask in range(1 << self.value_count):
+                    plane = np.full(self._words, _ALL_ONES)
+                    for value in range(self.value_count):
+                        plane &= present[value] if bitmask >> value & 1 else ~present[value]
+                    sets.append(plane)
+                exact_sets.append(sets)
+            satisfied = np.zeros(self._words, dtype=np.uint64)
+            for premise_bitmask, conclusion_bitmasks in enumerate(allowed):
+                conclusions_allowed = np.zeros(self._words, dtype=np.uint64)
+                for conclusion_bitmask in np.flatnonzero(conclusion_bitmasks):
+                    conclusions_allowed |= exact_sets[1][conclusion_bitmask]
+                satisfied |= exact_sets[0][premise_bitmask] & conclusions_allowed
+            return satisfied
+
+        _, premises, conclusions = program
+        satisfied = np.zeros(self._words, dtype=np.uint64)
+        for premise in premises:
+            satisfied |= ~self._satisfied_planes(premise, planes)
+        for conclusion in conclusions:
+            satisfied |= self._satisfied_planes(conclusion, planes)
+        return satisfied
+
+    def iter_satisfied_words(self):
+        """Yields, for every block, ``(start, satisfied)`` with `satisfied` packed (see ``pack``)"""
+        program = self.program
+        for block in range(self.block_count):
+            yield block * self.block_size, self._satisfied_planes(program, self.node_planes(block)) & self._valid
+
+    def iter_satisfied(self):
+        for start, satisfied in self.iter_satisfied_words():
+            yield start, unpack(satisfied, self.block_size)
+
+    def iter_node_codes(self, nodes):
+        for block in range(self.block_count):
+            planes = self.node_planes(block)
+            columns = []
+            for node in nodes:
+                codes = np.zeros(self.block_size, dtype=self._dtype)
+                for value in range(1, self.value_count):
+                    codes[unpack(planes[node][value], self.block_size)] = value
+                columns.append(codes)
+            yield columns
+
+    def _first(self, wanted):
+        for start, satisfied in self.iter_satisfied_words():
+            found = satisfied if wanted else ~satisfied & self._valid
+            words = np.flatnonzero(found)
+            if words.size:
+                word = int(found[words[0]])
+                position = int(words[0]) * 64 + (word & -word).bit_length() - 1
+                if counters.active is not None:
+                    counters.increment('valuations', position + 1)
+                return start + position
+            if counters.active is not None:
+                counters.increment('valuations', self.block_size)
+        return None
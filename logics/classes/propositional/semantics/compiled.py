@@ -0,0 +1,497 @@
+"""Compiled evaluation of many-valued semantics.
+
+Instead of walking the formula lists once per valuation, a formula or (meta)inference is compiled once into a flat
+program over integer truth value codes (the index of each value in `truth_values`):
+
+* every distinct subformula becomes a single node (identical subformulae are shared), in an order where the
+  arguments of a node always come before it
+* the truth function of every constant becomes a lookup table of codes (callables are called once per combination of
+  arguments, when the table is built)
+* the premise and conclusion standards become boolean masks over the codes (for ``MappedManyValuedSemantics``, the
+  mapping constraints become a table indexed by the sets of values of the premises and of the conclusions)
+
+The program is then run on blocks of valuations at once, as NumPy arrays, in the same order in which
+``itertools.product`` yields them (the first atomic varies slowest).
+"""
+
+import numpy as np
+
+from logics.classes.propositional import Formula, Inference
+from logics.classes.propositional.compact_formula import CompactFormula
+from logics.utils import counters
+
+#: Number of valuations evaluated together
+CHUNK_SIZE = 1 << 16
+# Formulae are either lists or encoded as arrays (see logics.classes.propositional.compact_formula)
+_FORMULAE = (Formula, CompactFormula)
+
+
+class CompilationError(Exception):
+    """Raised when a formula / inference cannot be compiled for some semantics (e.g. it is not well formed, or some
+    truth function returns a value not in `truth_values`). The semantics falls back to the regular evaluation then."""
+    pass
+
+
+class CompiledInference:
+    """A formula or (meta)inference compiled for a given ``MixedManyValuedSemantics`` (or
+    ``MappedManyValuedSemantics``)
+
+    Parameters
+    ----------
+    semantics: logics.classes.propositional.semantics.MixedManyValuedSemantics
+        The semantics according to which the formula / inference is evaluated
+    formula_or_inference: logics.classes.propositional.Formula or logics.classes.propositional.Inference
+        The formula or inference to compile. Inferences may be of level > 1 (except for mapped semantics, which do not
+        implement metainferences). The formulae may also be ``CompactFormula``
+    chunk_size: int, optional
+        Number of valuations evaluated together. Defaults to ``CHUNK_SIZE``
+
+    Attributes
+    ----------
+    atomics: list of str
+        The atomics of the formula / inference, in the order in which they are valuated
+    valuation_count: int
+        The number of valuations (``len(truth_values) ** len(atomics)``, 1 if there are no atomics)
+
+    Raises
+    ------
+    CompilationError
+        If the formula / inference cannot be compiled. The satisfaction conditions are compiled the first time they
+        are needed, so the methods below may raise it too
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST
+    >>> from logics.classes.propositional.semantics.compiled import CompiledInference
+    >>> compiled = CompiledInference(ST, classical_parser.parse('(A / B), (B / C) // (A / C)'))
+    >>> compiled.valuation_count
+    27
+    >>> compiled.is_locally_valid()
+    False
+    >>> CompiledInference(ST, classical_parser.parse('p, p then q / q')).is_locally_valid()
+    True
+    >>> CompiledInference(ST, classical_parser.parse('p / p and not p')).is_locally_antivalid()
+    False
+    """
+    def __init__(self, semantics, formula_or_inference, chunk_size=CHUNK_SIZE):
+        self.semantics = semantics
+        self.formula_or_inference = formula_or_inference
+        self.chunk_size = chunk_size
+        # The semantics whose truth functions give the values of the formulae (itself, or the ones inside a mixed
+        # metainferential semantics)
+        self.valuation_semantics = _valuation_semantics(semantics)
+        self.atomics = list(formula_or_inference.atomics_inside(semantics.language))
+        self.value_count = len(semantics.truth_values)
+        self.valuation_count = self.value_count ** len(self.atomics)
+        self._dtype = np.uint8 if self.value_count <= 256 else np.int64
+
+        # Nodes are (kind, data, argument nodes); kind is 'atomic', 'constant' or 'molecular'
+        self._nodes = []
+        self._node_ids = {}
+        self._tables = {}
+        self._atomic_ids = {atomic: index for index, atomic in enumerate(self.atomics)}
+        self._program = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Compilation
+
+    def _code(self, value):
+        try:
+            return self.semantics.truth_values.index(value)
+        except ValueError:
+            raise CompilationError(f'{value} is not in truth_values')
+
+    def _designated_mask(self, designated_values):
+        return np.array([value in designated_values for value in self.semantics.truth_values], dtype=bool)
+
+    def _table(self, constant, arity):
+        """Lookup table of the truth function of `constant`, as a flat array indexed by the argument codes read as the
+        digits of a number in base ``len(truth_values)``"""
+        if (constant, arity) not in self._tables:
+            table = []
+            for args in _combinations(self.semantics.truth_values, arity):
+                try:
+                    value = self.valuation_semantics.apply_truth_function(constant, *args)
+                except Exception as e:
+                    raise CompilationError(f'Could not tabulate the truth function of {constant}: {e}')
+                table.append(self._code(value))
+            self._tables[(constant, arity)] = np.array(table, dtype=self._dtype)
+        return self._tables[(constant, arity)]
+
+    def _add_node(self, key, node):
+        if key not in self._node_ids:
+            self._node_ids[key] = len(self._nodes)
+            self._nodes.append(node)
+        return self._node_ids[key]
+
+    def compile_formula(self, formula):
+        """Returns the node of `formula`, adding it (and its subformulae) to the program if not already there"""
+        if isinstance(formula, CompactFormula):
+            return self._compile_compact_formula(formula)
+        if not isinstance(formula, Formula):
+            raise CompilationError(f'{formula} is not a well-formed formula')
+        if formula.is_atomic:
+            return self._atomic_node(formula[0])
+        return self._molecular_node(formula.main_symbol,
+                                    tuple(self.compile_formula(argument) for argument in formula.arguments()))
+
+    def _compile_compact_formula(self, formula):
+        # The arguments of a node are right after it, so going through the nodes backwards they are compiled first
+        nodes = []
+        symbols = formula.table.symbols
+        arities = formula.arities.tolist()
+        for position, code in reversed(list(enumerate(formula.codes.tolist()))):
+            symbol = symbols[code]
+            if type(symbol) is not str:
+                raise CompilationError(f'{formula} is not a well-formed formula')
+            if not arities[position]:
+                nodes.append(self._atomic_node(symbol))
+            else:
+                nodes.append(self._molecular_node(symbol, tuple(nodes.pop() for _ in range(arities[position]))))
+        return nodes[0]
+
+    def _atomic_node(self, symbol):
+        language = self.semantics.language
+        if language.is_atomic_string(symbol) or language.is_metavariable_string(symbol):
+            if symbol not in self._atomic_ids:
+                raise CompilationError(f'Atomic {symbol} does not receive a valuation')
+            return self._add_node(('atomic', symbol), ('atomic', self._atomic_ids[symbol], ()))
+        elif language.is_sentential_constant_string(symbol):
+            code = self._code(self.valuation_semantics.sentential_constant_values_dict[symbol])
+            return self._add_node(('constant', symbol), ('constant', code, ()))
+        raise CompilationError(f'{symbol} is not a well-formed formula')
+
+    def _molecular_node(self, constant, arguments):
+        if constant not in self.valuation_semantics.truth_function_dict:
+            raise CompilationError(f'Constant {constant} has no truth function')
+        table = self._table(constant, len(arguments))
+        return self._add_node(('molecular', constant, arguments), ('molecular', table, arguments))
+
+    def _compile_satisfaction(self, formula_or_inference, evaluate_premise, standard=None):
+        """Same recursion as ``MixedManyValuedSemantics.satisfies`` (or ``MixedMetainferentialSemantics.satisfies``, if
+        `standard` is mixed metainferential) for `standard`, by default the semantics. Returns
+        ``('formula', node, mask)`` or ``('inference', premise programs, conclusion programs)``"""
+        standard = self.semantics if standard is None else standard
+        if hasattr(standard, 'premise_standard'):
+            # Mixed metainferential standard, the premises and conclusions are evaluated with its two standards
+            if not isinstance(formula_or_inference, Inference):
+                raise CompilationError('Mixed metainferential semantics only evaluate inferences')
+            premise_standard, conclusion_standard = standard.premise_standard, standard.conclusion_standard
+        else:
+            if isinstance(formula_or_inference, _FORMULAE):
+                designated_values = standard.premise_designated_values if evaluate_premise else \
+                    standard.conclusion_designated_values
+                return 'formula', self.compile_formula(formula_or_inference), self._designated_mask(designated_values)
+            premise_standard = conclusion_standard = standard
+
+        premises = []
+        for premise in formula_or_inference.premises:
+            if isinstance(premise, _FORMULAE):
+                evaluate_premise = True
+            premises.append(self._compile_satisfaction(premise, evaluate_premise, premise_standard))
+        conclusions = [self._compile_satisfaction(conclusion, False, conclusion_standard)
+                       for conclusion in formula_or_inference.conclusions]
+        return 'inference', premises, conclusions
+
+    def _compile_mapped_satisfaction(self, formula_or_inference, standard=None):
+        """Same as ``MappedManyValuedSemantics.satisfies`` for `standard`, by default the semantics. Returns
+        ``('mapped', premise nodes, conclusion nodes, allowed)``, where ``allowed[P, C]`` says if the mapping
+        constraints allow the premises to take the set of values P and the conclusions the set C (sets of values written
+        as bitmasks of their codes)"""
+        standard = self.semantics if standard is None else standard
+        if isinstance(formula_or_inference, _FORMULAE):
+            formula_or_inference = Inference([], [formula_or_inference])
+        if not all(isinstance(formula, _FORMULAE) for formula in
+                   formula_or_inference.premises + formula_or_inference.conclusions):
+            raise CompilationError('Mapped semantics do not implement metainferences')
+
+        matrix = standard.mapping_constraints.boolean_matrix
+        mask_size = 1 << self.value_count
+        if matrix.shape != (mask_size, mask_size):
+            raise CompilationError('The mapping constraints do not cover every pair of mappings')
+        mapping_bitmasks = self._mapping_bitmasks(standard)
+        allowed = np.zeros((mask_size, mask_size), dtype=bool)
+        allowed[np.ix_(mapping_bitmasks, mapping_bitmasks)] = matrix
+
+        premises = tuple(self.compile_formula(premise) for premise in formula_or_inference.premises)
+        conclusions = tuple(self.compile_formula(conclusion) for conclusion in formula_or_inference.conclusions)
+        return 'mapped', premises, conclusions, allowed
+
+    def _mapping_bitmasks(self, standard=None):
+        """The mappings of the (mapped) `standard`, by default the semantics, as bitmasks of the codes of their
+        values"""
+        standard = self.semantics if standard is None else standard
+        return np.array([sum(1 << self._code(value) for value in mapping) for mapping in standard.mappings],
+                        dtype=np.int64)
+
+    @property
+    def program(self):
+        """The compiled satisfaction conditions of the formula / inference"""
+        self._check_compilable()
+        return self._program
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Evaluation
+
+    def _check_compilable(self):
+        """Compiles the satisfaction conditions (only the first time), so that a CompilationError is raised before
+        starting to evaluate"""
+        if self._program is None:
+            if hasattr(self.semantics, 'mapping_constraints'):
+                self._program = self._compile_mapped_satisfaction(self.formula_or_inference)
+            else:
+                self._program = self._compile_satisfaction(self.formula_or_inference, evaluate_premise=False)
+
+    def _check_enumerable(self):
+        if self.valuation_count > np.iinfo(np.int64).max:
+            raise CompilationError('Too many valuations to enumerate')
+
+    def atomic_codes(self, start, stop):
+        """Codes of the atomics in the valuations ``start`` to ``stop`` (in ``itertools.product`` order), one array
+        per atomic"""
+        indexes = np.arange(start, stop, dtype=np.int64)
+        codes = []
+        for position in range(len(self.atomics)):
+            place = self.value_count ** (len(self.atomics) - 1 - position)
+            codes.append(((indexes // place) % self.value_count).astype(self._dtype))
+        return codes
+
+    def node_values(self, start, stop):
+        """Codes of every node of the program in the valuations ``start`` to ``stop``"""
+        atomic_codes = self.atomic_codes(start, stop)
+        values = []
+        for kind, data, arguments in self._nodes:
+            if kind == 'atomic':
+                values.append(atomic_codes[data])
+            elif kind == 'constant':
+                values.append(np.full(stop - start, data, dtype=self._dtype))
+            else:
+                index = values[arguments[0]].astype(np.int64) if arguments else np.zeros(stop - start, dtype=np.int64)
+                for argument in arguments[1:]:
+                    index = index * self.value_count + values[argument]
+                values.append(data[index])
+        return values
+
+    def _satisfied(self, program, values, size):
+        if program[0] == 'formula':
+            _, node, mask = program
+            return mask[values[node]]
+
+        if program[0] == 'mapped':
+            _, premises, conclusions, allowed = program
+            return allowed[self._value_set(premises, values, size), self._value_set(conclusions, values, size)]
+
+        _, premises, conclusions = program
+        satisfied = np.zeros(size, dtype=bool)
+        for premise in premises:
+            satisfied |= ~self._satisfied(premise, values, size)
+        for conclusion in conclusions:
+            satisfied |= self._satisfied(conclusion, values, size)
+        return satisfied
+
+    @staticmethod
+    def _value_set(nodes, values, size):
+        """The set of values taken by the nodes in each valuation, as a bitmask of their codes"""
+        bitmask = np.zeros(size, dtype=np.int64)
+        for node in nodes:
+            bitmask |= np.left_shift(1, values[node].astype(np.int64))
+        return bitmask
+
+    def mapping_matrix(self):
+        """``matrix[P, C]`` says if some valuation gives the premises of the inference the set of values
+        ``semantics.mappings[P]`` and the conclusions ``semantics.mappings[C]`` (see
+        ``MappedManyValuedSemantics.valuation_matrix``). Computed a block of valuations at a time"""
+        inference = self.formula_or_inference
+        if not isinstance(inference, Inference) or \
+                not all(isinstance(formula, _FORMULAE) for formula in inference.premises + inference.conclusions):
+            raise CompilationError('Valuation matrices are only defined for inferences')
+        premises = tuple(self.compile_formula(premise) for premise in inference.premises)
+        conclusions = tuple(self.compile_formula(conclusion) for conclusion in inference.conclusions)
+        mapping_bitmasks = self._mapping_bitmasks()
+        self._check_enumerable()
+
+        taken = np.zeros((1 << self.value_count, 1 << self.value_count), dtype=bool)
+        for start in range(0, self.valuation_count, self.chunk_size):
+            stop = min(start + self.chunk_size, self.valuation_count)
+            values = self.node_values(start, stop)
+            if counters.active is not None:
+                counters.increment('valuations', stop - start)
+            taken[self._value_set(premises, values, stop - start), self._value_set(conclusions, values, stop - start)] \
+                = True
+        return taken[np.ix_(mapping_bitmasks, mapping_bitmasks)]
+
+    def iter_satisfied(self):
+        """Yields, for consecutive blocks of valuations, ``(start, satisfied)``, where ``satisfied[i]`` says whether
+        valuation ``start + i`` satisfies the formula / inference"""
+        program = self.program
+        self._check_enumerable()
+        for start in range(0, self.valuation_count, self.chunk_size):
+            stop = min(start + self.chunk_size, self.valuation_count)
+            yield start, self._satisfied(program, self.node_values(start, stop), stop - start)
+
+    def iter_node_codes(self, nodes):
+        """Yields, for consecutive blocks of valuations, the codes of the given nodes (one array per node)"""
+        self._check_enumerable()
+        for start in range(0, self.valuation_count, self.chunk_size):
+            stop = min(start + self.chunk_size, self.valuation_count)
+            values = self.node_values(start, stop)
+            yield [values[node] for node in nodes]
+
+    def _first(self, wanted):
+        """Position of the first valuation whose satisfaction is `wanted`, or None. Counts the valuations it had to look
+        at, like the regular evaluation does"""
+        for start, satisfied in self.iter_satisfied():
+            found = np.flatnonzero(satisfied == wanted)
+            if found.size:
+                if counters.active is not None:
+                    counters.increment('valuations', int(found[0]) + 1)
+                return start + int(found[0])
+            if counters.active is not None:
+                counters.increment('valuations', len(satisfied))
+        return None
+
+    def is_locally_valid(self):
+        """True if every valuation satisfies the formula / inference"""
+        return self._first(False) is None
+
+    def is_locally_antivalid(self):
+        """True if no valuation satisfies the formula / inference"""
+        return self._first(True) is None
+
+    def is_contingent(self):
+        """True if some valuations satisfy the formula / inference and some do not. Stops as soon as it finds both"""
+        found = np.zeros(2, dtype=bool)
+        for _, satisfied in self.iter_satisfied():
+            if counters.active is not None:
+                counters.increment('valuations', len(satisfied))
+            found[satisfied.astype(np.int64)] = True
+            if found.all():
+                return True
+        return False
+
+    def counterexample(self):
+        """The first valuation that does not satisfy the formula / inference, as an atomic valuation dict, or None"""
+        position = self._first(False)
+        if position is None:
+            return None
+        return self.atomic_valuation_dict(position)
+
+    def atomic_valuation_dict(self, position):
+        """The valuation in position `position` (in ``itertools.product`` order), as an atomic valuation dict"""
+        codes = self.atomic_codes(position, position + 1)
+        return {atomic: self.semantics.truth_values[int(code[0])] for atomic, code in zip(self.atomics, codes)}
+
+    def ordered_subformulae(self):
+        """The subformulae of the formula / inference ordered by depth (the columns of the truth table), and their
+        nodes. The depths are read from the program, instead of being recomputed for every subformula"""
+        subformulae = self.formula_or_inference.subformulae
+        nodes = [self.compile_formula(subformula) for subformula in subformulae]
+        depths = []
+        for _, _, arguments in self._nodes:
+            depths.append(max(depths[argument] for argument in arguments) + 1 if arguments else 0)
+        order = sorted(range(len(subformulae)), key=lambda index: depths[nodes[index]])
+        return [subformulae[index] for index in order], [nodes[index] for index in order]
+
+    def iter_truth_table(self, counterexamples_only=False, max_rows=None):
+        """Yields the rows of the truth table in blocks, as 2-dimensional arrays of codes, with a row per valuation and
+        a column per subformula (in the order of ``ordered_subformulae``). If `counterexamples_only` is True, only the
+        rows of the valuations that do not satisfy the formula / inference. Stops after `max_rows` rows, if given"""
+        _, nodes = self.ordered_subformulae()
+        program = self.program if counterexamples_only else None
+        self._check_enumerable()
+        remaining = max_rows
+        for start in range(0, self.valuation_count, self.chunk_size):
+            if remaining is not None and remaining <= 0:
+                return
+            stop = min(start + self.chunk_size, self.valuation_count)
+            values = self.node_values(start, stop)
+            if counters.active is not None:
+                counters.increment('valuations', stop - start)
+            if nodes:
+                codes = np.stack([values[node] for node in nodes], axis=1)
+            else:
+                codes = np.zeros((stop - start, 0), dtype=self._dtype)
+            if counterexamples_only:
+                codes = codes[~self._satisfied(program, values, stop - start)]
+            if remaining is not None:
+                codes = codes[:remaining]
+                remaining -= len(codes)
+            if len(codes):
+                yield codes
+
+    def truth_table(self):
+        """Same as ``MixedManyValuedSemantics.truth_table``"""
+        ordered_subformulae, nodes = self.ordered_subformulae()
+        truth_values = np.empty(self.value_count, dtype=object)
+        truth_values[:] = self.semantics.truth_values
+        truth_table = []
+        for columns in self.iter_node_codes(nodes):
+            if counters.active is not None:
+                counters.increment('valuations', len(columns[0]) if columns else 1)
+            if columns:
+                truth_table.extend(truth_values[np.stack(columns, axis=1)].tolist())
+            else:
+                truth_table.append([])
+        return [ordered_subformulae, truth_table]
+
+
+def engines(backend):
+    """The evaluators to try, in order, for a backend of ``MixedManyValuedSemantics`` other than ``'naive'``"""
+    if backend == 'bitsliced':
+        from logics.classes.propositional.semantics.bitsliced import BitslicedInference
+        return [BitslicedInference, CompiledInference]
+    if backend == 'sat':
+        from logics.classes.propositional.semantics.sat_encoding import SATEncodedInference
+        return [SATEncodedInference]
+    if backend == 'incremental':
+        from logics.classes.propositional.semantics.incremental import IncrementalInference
+        return [IncrementalInference]
+    return [CompiledInference]
+
+
+def _valuation_semantics(semantics):
+    """`semantics` itself if it is a ``MixedManyValuedSemantics``. For a ``MixedMetainferentialSemantics``, one of the
+    semantics inside it, after checking that they all give the same values to the formulae (otherwise they cannot share
+    the nodes of the program, and CompilationError is raised)"""
+    from logics.classes.propositional.semantics.many_valued import MixedManyValuedSemantics, \
+        MixedMetainferentialSemantics
+    if isinstance(semantics, MixedManyValuedSemantics):
+        return semantics
+    if not isinstance(semantics, MixedMetainferentialSemantics):
+        raise CompilationError(f'{semantics} cannot be compiled')
+
+    inside = []
+    pending = [semantics]
+    while pending:
+        standard = pending.pop()
+        if isinstance(standard, MixedMetainferentialSemantics):
+            pending.extend([standard.premise_standard, standard.conclusion_standard])
+        elif isinstance(standard, MixedManyValuedSemantics) and not hasattr(standard, 'mapping_constraints'):
+            inside.append(standard)
+        else:
+            raise CompilationError(f'{standard} cannot be compiled')
+    first = inside[0]
+    for other in inside[1:]:
+        if not same_valuations(first, other):
+            raise CompilationError('The semantics inside the mixed metainferential semantics have different truth '
+                                   'functions')
+    return first
+
+
+def same_valuations(semantics, other):
+    """True if the two (non-metainferential) semantics have the same truth values, in the same order, and give the same
+    values to every formula, so that a formula compiled for one can be used for the other"""
+    return semantics.truth_values == other.truth_values and \
+        semantics.truth_function_dict == other.truth_function_dict and \
+        semantics.sentential_constant_values_dict == other.sentential_constant_values_dict
+
+
+def _combinations(truth_values, arity):
+    """Tuples of `arity` truth values, the first one varying slowest (the order of the flat lookup tables)"""
+    if arity == 0:
+        yield ()
+        return
+    for value in truth_values:
+        for rest in _combinations(truth_values, arity - 1):
+            yield (value,) + rest
@@ -0,0 +1,263 @@
+"""Incremental evaluation of many-valued semantics, one valuation at a time.
+
+The valuations are visited in (reflected) Gray code order, where two consecutive valuations differ in the value of a
+single atomic. The values of every node of the compiled formula / inference (see
+``logics.classes.propositional.semantics.compiled``, where identical subformulae are a single node) are kept from one
+valuation to the next, and only the nodes that contain the atomic that changed (its *cone of influence*) are
+recomputed, with one table lookup each. Satisfaction is then checked lazily (an inference is satisfied as soon as one
+premise is not, etc.), and the search stops at the first valuation that settles the question.
+
+Unlike the other compiled evaluators this works for any number of truth values and with very little memory, and it
+is the one to use when a counterexample is expected early. Several semantics can also be walked together over the
+same valuations (this is what ``IntersectionLogic`` and ``UnionLogic`` do with the ``'incremental'`` backend).
+"""
+
+from logics.classes.propositional.semantics.compiled import CompiledInference, CompilationError
+from logics.utils import counters
+
+
+def gray_code_steps(length, base):
+    """Steps of the reflected `base`-ary Gray code of words of `length` digits, starting from all zeros.
+
+    Yields ``(position, digit)``: the position that changes (0 is the first, i.e. leftmost, digit) and its new value.
+    Every word is visited exactly once. Uses Knuth's loopless algorithm (TAOCP 7.2.1.1, Algorithm H).
+
+    Examples
+    --------
+    >>> from logics.classes.propositional.semantics.incremental import gray_code_steps
+    >>> word = [0, 0]
+    >>> for position, digit in gray_code_steps(2, 3):
+    ...     word[position] = digit
+    ...     print(word)
+    [0, 1]
+    [0, 2]
+    [1, 2]
+    [1, 1]
+    [1, 0]
+    [2, 0]
+    [2, 1]
+    [2, 2]
+    """
+    if base < 2:
+        return
+    digits = [0] * length
+    directions = [1] * length
+    focus = list(range(length + 1))
+    while True:
+        # Digits are numbered from the right here, so that the last one changes fastest
+        j = focus[0]
+        focus[0] = 0
+        if j == length:
+            return
+        digits[j] += directions[j]
+        yield length - 1 - j, digits[j]
+        if digits[j] == 0 or digits[j] == base - 1:
+            directions[j] = -directions[j]
+            focus[j] = focus[j + 1]
+            focus[j + 1] = j + 1
+
+
+class IncrementalInference(CompiledInference):
+    """A formula or (meta)inference compiled for incremental evaluation. Same interface as ``CompiledInference``
+
+    Since the valuations are not visited in ``itertools.product`` order, the counterexample found may not be the first
+    one in that order (truth tables are still returned in that order).
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST
+    >>> from logics.classes.propositional.semantics.incremental import IncrementalInference
+    >>> IncrementalInference(ST, classical_parser.parse('(A / B), (B / C) // (A / C)')).is_locally_valid()
+    False
+    >>> IncrementalInference(ST, classical_parser.parse('p, p then q / q')).is_locally_valid()
+    True
+    >>> IncrementalInference(ST, classical_parser.parse('p / q')).is_contingent()
+    True
+    """
+    def __init__(self, semantics, formula_or_inference):
+        super().__init__(semantics, formula_or_inference)
+        self._values = None
+
+    def start(self):
+        """Evaluates every node in the valuation where all the atomics take the first truth value, and finds the cone
+        of influence of every atomic. Must be called again if nodes are compiled afterwards"""
+        self.atomic_values = [0] * len(self.atomics)
+        self._lookup = []
+        self._values = []
+        depends_on = []  # For every node, the atomics it contains
+        self._cones = [[] for _ in self.atomics]
+        for node, (kind, data, arguments) in enumerate(self._nodes):
+            if kind == 'atomic':
+                self._values.append(0)
+                depends_on.append({data})
+                self._lookup.append(None)
+            elif kind == 'constant':
+                self._values.append(data)
+                depends_on.append(set())
+                self._lookup.append(None)
+            else:
+                table = data.tolist()
+                self._lookup.append((table, arguments))
+                self._values.append(self._recompute(table, arguments))
+                atomics = set().union(*(depends_on[argument] for argument in arguments))
+                depends_on.append(atomics)
+                for atomic in atomics:
+                    self._cones[atomic].append((node, table, arguments))
+        self._atomic_nodes = [self._node_ids.get(('atomic', atomic)) for atomic in self.atomics]
+        if self._program is not None:
+            self._satisfied = _satisfaction_function(self._program)
+
+    def _recompute(self, table, arguments):
+        index = 0
+        for argument in arguments:
+            index = index * self.value_count + self._values[argument]
+        return table[index]
+
+    def set_atomic(self, atomic, code):
+        """Changes the value of one atomic (given by its position in `atomics`), and updates the nodes that contain it"""
+        self.atomic_values[atomic] = code
+        values = self._values
+        value_count = self.value_count
+        if self._atomic_nodes[atomic] is not None:
+            values[self._atomic_nodes[atomic]] = code
+        for node, table, arguments in self._cones[atomic]:
+            # Unary and binary connectives (the usual case) without the loop
+            if len(arguments) == 1:
+                values[node] = table[values[arguments[0]]]
+            elif len(arguments) == 2:
+                values[node] = table[values[arguments[0]] * value_count + values[arguments[1]]]
+            else:
+                values[node] = self._recompute(table, arguments)
+
+    def satisfied(self):
+        """Whether the current valuation satisfies the formula / inference"""
+        return self._satisfied(self._values)
+
+    def position(self):
+        """Position of the current valuation in ``itertools.product`` order"""
+        position = 0
+        for code in self.atomic_values:
+            position = position * self.value_count + code
+        return position
+
+    def _first(self, wanted):
+        self._check_compilable()
+        for _ in walk([self]):
+            if counters.active is not None:
+                counters.increment('valuations')
+            if self.satisfied() == wanted:
+                return self.position()
+        return None
+
+    def is_contingent(self):
+        self._check_compilable()
+        found = set()
+        for _ in walk([self]):
+            if counters.active is not None:
+                counters.increment('valuations')
+            found.add(self.satisfied())
+            if len(found) == 2:
+                return True
+        return False
+
+    def truth_table(self):
+        ordered_subformulae, nodes = self.ordered_subformulae()
+        self._check_enumerable()
+        truth_values = self.semantics.truth_values
+        truth_table = [None] * self.valuation_count
+        for _ in walk([self]):
+            if counters.active is not None:
+                counters.increment('valuations')
+            truth_table[self.position()] = [truth_values[self._values[node]] for node in nodes]
+        return [ordered_subformulae, truth_table]
+
+
+def _satisfaction_function(program):
+    """The program as a function of the list of node codes (faster than interpreting it at every valuation)"""
+    if program[0] == 'formula':
+        _, node, mask = program
+        mask = mask.tolist()
+        return lambda values: mask[values[node]]
+
+    if program[0] == 'mapped':
+        _, premises, conclusions, allowed = program
+        allowed = allowed.tolist()
+
+        def satisfied(values):
+            premise_bitmask = 0
+            for node in premises:
+                premise_bitmask |= 1 << values[node]
+            conclusion_bitmask = 0
+            for node in conclusions:
+                conclusion_bitmask |= 1 << values[node]
+            return allowed[premise_bitmask][conclusion_bitmask]
+        return satisfied
+
+    _, premises, conclusions = program
+    premises = [_satisfaction_function(premise) for premise in premises]
+    conclusions = [_satisfaction_function(conclusion) for conclusion in conclusions]
+
+    def satisfied(values):
+        # Stops at the first premise that is not satisfied or conclusion that is
+        for premise in premises:
+            if not premise(values):
+                return True
+        for conclusion in conclusions:
+            if conclusion(values):
+                return True
+        return False
+    return satisfied
+
+
+def walk(members):
+    """Visits every valuation of the atomics of the members (``IncrementalInference`` objects for the same formula /
+    inference, possibly for different semantics with the same truth values), in Gray code order. At every step the
+    members are set to the valuation, and the step is yielded (there is nothing to yield, read the members)"""
+    for member in members:
+        member.start()
+    yield
+    for position, code in gray_code_steps(len(members[0].atomics), members[0].value_count):
+        for member in members:
+            member.set_atomic(position, code)
+        yield
+
+
+def member_satisfactions(semantics_list, formula_or_inference):
+    """Yields, for every valuation (in Gray code order), a list saying whether it satisfies the formula / inference in
+    each of the semantics. Returns None instead if some of them cannot be compiled (e.g. a metainferential one)
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST, TS_mvl_semantics as TS
+    >>> from logics.classes.propositional.semantics.incremental import member_satisfactions
+    >>> for satisfactions in member_satisfactions([ST, TS], classical_parser.parse('p / p')):
+    ...     print(satisfactions)
+    [True, True]
+    [True, False]
+    [True, True]
+    """
+    from logics.classes.propositional.semantics.many_valued import MixedManyValuedSemantics
+    members = []
+    for semantics in semantics_list:
+        if not isinstance(semantics, MixedManyValuedSemantics):
+            return None
+        try:
+            member = IncrementalInference(semantics, formula_or_inference)
+            member._check_compilable()
+            member._check_enumerable()
+        except CompilationError:
+            return None
+        members.append(member)
+    if any(member.atomics != members[0].atomics or member.semantics.truth_values != members[0].semantics.truth_values
+           for member in members):
+        return None
+    return _satisfactions(members)
+
+
+def _satisfactions(members):
+    for _ in walk(members):
+        if counters.active is not None:
+            counters.increment('valuations')
+        yield [member.satisfied() for member in members]
@@ -0,0 +1,104 @@
+"""Local validity of a formula / inference in several logics at once.
+
+Asking each semantics for ``is_locally_valid`` goes through the valuations once per logic. ``LogicSpace`` compiles the
+formula / inference (see ``logics.classes.propositional.semantics.compiled``) once for every group of logics that give
+the same values to the formulae (e.g. ST, TS, LP, K3 and the three-valued mapped logics, but not WK), with the
+satisfaction conditions of every standard. The logics with the same truth values are then evaluated in a single pass
+through their valuations, which stops when every one of them has a counterexample.
+
+The logics that cannot be compiled (e.g. an ``IntersectionLogic``, or a mixed metainferential semantics whose logics
+have different truth functions) are evaluated on their own, with their ``is_locally_valid`` and ``counterexample``
+methods.
+"""
+
+import numpy as np
+
+from logics.classes.propositional.semantics.compiled import CompiledInference, CompilationError, same_valuations, \
+    _valuation_semantics
+from logics.utils import counters
+
+
+class LogicSpace(list):
+    """A list of logics (``MixedManyValuedSemantics``, ``MappedManyValuedSemantics``, ``MixedMetainferentialSemantics``,
+    etc.) to compare, deciding the local validity of a formula / inference in all of them together.
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST, \\
+    ...     TS_mvl_semantics as TS, LP_mvl_semantics as LP, K3_mvl_semantics as K3, WK_mvl_semantics as WK
+    >>> from logics.classes.propositional.semantics import LogicSpace
+    >>> space = LogicSpace([ST, TS, LP, K3, WK])
+    >>> space.validity_vector(classical_parser.parse('p / p or q'))
+    [True, False, True, True, False]
+    >>> validities, counterexamples = space.evaluate(classical_parser.parse('p / p or q'))
+    >>> [None if counterexample is None else sorted(counterexample.items()) for counterexample in counterexamples]
+    [None, [('p', 'i'), ('q', 'i')], None, None, [('p', '1'), ('q', 'e')]]
+    """
+    def validity_vector(self, formula_or_inference):
+        """The local validity of the formula / inference in each of the logics (a list of bool)"""
+        return self.evaluate(formula_or_inference)[0]
+
+    def counterexamples(self, formula_or_inference):
+        """For each of the logics, the first valuation (in the order of ``is_locally_valid``) that does not satisfy
+        the formula / inference, as an atomic valuation dict, or None if it is valid there"""
+        return self.evaluate(formula_or_inference)[1]
+
+    def evaluate(self, formula_or_inference):
+        """Returns a 2-list ``[validities, counterexamples]``, with the results of ``validity_vector`` and
+        ``counterexamples`` (see above)"""
+        validities = [True] * len(self)
+        counterexamples = [None] * len(self)
+
+        for engines in self._groups(formula_or_inference, validities, counterexamples):
+            pending = {index for _, programs in engines for index, _ in programs}
+            valuation_count = engines[0][0].valuation_count
+            chunk_size = engines[0][0].chunk_size
+            for start in range(0, valuation_count, chunk_size):
+                stop = min(start + chunk_size, valuation_count)
+                if counters.active is not None:
+                    counters.increment('valuations', stop - start)
+                for compiled, programs in engines:
+                    if all(index not in pending for index, _ in programs):
+                        continue
+                    values = compiled.node_values(start, stop)
+                    for index, program in programs:
+                        if index not in pending:
+                            continue
+                        refuted = np.flatnonzero(~compiled._satisfied(program, values, stop - start))
+                        if refuted.size:
+                            validities[index] = False
+                            counterexamples[index] = compiled.atomic_valuation_dict(start + int(refuted[0]))
+                            pending.discard(index)
+                if not pending:
+                    break
+        return [validities, counterexamples]
+
+    def _groups(self, formula_or_inference, validities, counterexamples):
+        """Compiles the formula / inference for the logics. Returns, for every set of truth values, a list of
+        ``(compiled inference, [(index of the logic, program), ...])``, one for each set of truth functions. The logics
+        that cannot be compiled are evaluated here"""
+        groups = {}
+        for index, logic in enumerate(self):
+            try:
+                valuation_semantics = _valuation_semantics(logic)
+                engines = groups.setdefault(tuple(valuation_semantics.truth_values), [])
+                for compiled, programs in engines:
+                    if same_valuations(compiled.valuation_semantics, valuation_semantics):
+                        break
+                else:
+                    compiled, programs = CompiledInference(logic, formula_or_inference), []
+                if hasattr(logic, 'mapping_constraints'):
+                    program = compiled._compile_mapped_satisfaction(formula_or_inference, logic)
+                else:
+                    program = compiled._compile_satisfaction(formula_or_inference, False, logic)
+                compiled._check_enumerable()
+            except CompilationError:
+                validities[index] = logic.is_locally_valid(formula_or_inference)
+                if not validities[index]:
+                    counterexamples[index] = logic.counterexample(formula_or_inference)
+                continue
+            if not programs:
+                engines.append((compiled, programs))
+            programs.append((index, program))
+        return [engines for engines in groups.values() if engines]
@@ -1,11 +1,81 @@
 from itertools import product
 from copy import copy
 
-from logics.classes.propositional import Formula
+import numpy as np
+
+from logics.classes.propositional import Formula, CompactFormula, Inference
 from logics.classes.exceptions import NotWellFormed
+from logics.utils import counters
+
+
+def _is_globally_valid(semantics, inference, evaluator):
+    """``semantics.is_globally_valid(inference)``, reusing `evaluator` (see ``metainferential.MetainferenceEvaluator``)
+    if the semantics can"""
+    if hasattr(semantics, '_is_globally_valid'):
+        return semantics._is_globally_valid(inference, evaluator)
+    return semantics.is_globally_valid(inference)
+
+
+def _ordered_subformulae(formula_or_inference):
+    """The subformulae of a formula / inference ordered by depth (the columns of the truth tables). The depth of each
+    subformula is computed once, from those of its arguments"""
+    depths = {}
+
+    def depth(formula):
+        if id(formula) not in depths:
+            arguments = [argument for argument in formula if isinstance(argument, Formula)]
+            depths[id(formula)] = max(depth(argument) for argument in arguments) + 1 if arguments else 0
+        return depths[id(formula)]
+
+    return sorted(formula_or_inference.subformulae, key=depth)
+
+
+def _decoded(formula_or_inference):
+    """The formula / inference with every CompactFormula in it decoded into a regular formula (the same object if it
+    has none), for the evaluations that go through the formulae themselves"""
+    if isinstance(formula_or_inference, CompactFormula):
+        return formula_or_inference.to_formula()
+    if not isinstance(formula_or_inference, Inference):
+        return formula_or_inference
+    premises = [_decoded(premise) for premise in formula_or_inference.premises]
+    conclusions = [_decoded(conclusion) for conclusion in formula_or_inference.conclusions]
+    if all(new is old for new, old in zip(premises + conclusions,
+                                          formula_or_inference.premises + formula_or_inference.conclusions)):
+        return formula_or_inference
+    return Inference(premises, conclusions, level=formula_or_inference.declared_level)
 
 
 class LocalValidityMixin:
+    """Local validity, antivalidity and contingency, by going through every valuation
+
+    If the `processes` attribute is set to more than 1 (it is None by default), the valuations are split among that
+    many processes, and the search stops as soon as some process finds what it is looking for (see
+    ``logics.classes.propositional.semantics.parallel``). This only pays off for formulae with many atomics.
+
+    Formulae encoded as ``CompactFormula`` (also within inferences) are decoded into regular formulae first.
+
+    >>> from copy import copy
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import classical_mvl_semantics
+    >>> CL = copy(classical_mvl_semantics)
+    >>> CL.processes = 2
+    >>> CL.is_locally_valid(classical_parser.parse('p, p then q / q'))
+    True
+    >>> CL.is_contingent(classical_parser.parse('q, p then q / p'))
+    True
+    >>> from logics.classes.propositional import CompactFormula
+    >>> classical_mvl_semantics.is_locally_valid(CompactFormula.from_formula(classical_parser.parse('p or not p')))
+    True
+    """
+    processes = None
+
+    def _parallel_search(self, formula_or_inference, outcomes, first=False):
+        """Result of ``parallel.search`` (see the module) if `processes` is more than 1, NotImplemented otherwise"""
+        if self.processes is None or self.processes < 2 or not formula_or_inference.atomics_inside(self.language):
+            return NotImplemented
+        from logics.classes.propositional.semantics.parallel import search
+        return search(self, formula_or_inference, outcomes, self.processes, first=first)
+
     def _get_truth_value_combinations(self, formula_or_inference):
         """Will return an iterator that yields all possible truth value combinations for the number of atomics present
         For example, for ['∧', ['p'], ['q']] the iterator will yield (0, 0), (0, 1), (1, 0), (1, 1)
@@ -76,8 +146,15 @@ class LocalValidityMixin:
         >>> ST.is_locally_valid(classical_parser.parse('(A / B), (B / C) // (A / C)'))
         False
         """
+        formula_or_inference = _decoded(formula_or_inference)
+        found = self._parallel_search(formula_or_inference, (False,))
+        if found is not NotImplemented:
+            return not found
+
         truth_value_combinations = self._get_truth_value_combinations(formula_or_inference)
         for combination in truth_value_combinations:
+            if counters.active is not None:
+                counters.increment('valuations')
             atomic_valuation_dict = self._get_atomic_valuation_dict(formula_or_inference, combination)
             if not self.satisfies(formula_or_inference, atomic_valuation_dict):
                 return False
@@ -107,14 +184,52 @@ class LocalValidityMixin:
         >>> CL.is_locally_antivalid(classical_parser.parse('p or not p / p and not p'))
         True
         """
+        formula_or_inference = _decoded(formula_or_inference)
+        found = self._parallel_search(formula_or_inference, (True,))
+        if found is not NotImplemented:
+            return not found
+
         truth_value_combinations = self._get_truth_value_combinations(formula_or_inference)
         for combination in truth_value_combinations:
+            if counters.active is not None:
+                counters.increment('valuations')
             atomic_valuation_dict = self._get_atomic_valuation_dict(formula_or_inference, combination)
             # e.g, for combination (0,1) {'p': 0, 'q': 1}
             if self.satisfies(formula_or_inference, atomic_valuation_dict):
                 return False
         return True
 
+    def counterexample(self, formula_or_inference):
+        """Returns the first valuation that does not satisfy a formula or inference, or None if it is locally valid
+
+        Returns
+        -------
+        dict or None
+            An atomic valuation dict (see ``satisfies``), or None if every valuation satisfies the formula / inference
+
+        Examples
+        --------
+        >>> from logics.utils.parsers import classical_parser
+        >>> from logics.instances.propositional.many_valued_semantics import classical_mvl_semantics as CL
+        >>> CL.counterexample(classical_parser.parse('p, p then q / q')) is None
+        True
+        >>> sorted(CL.counterexample(classical_parser.parse('q, p then q / p')).items())
+        [('p', '0'), ('q', '1')]
+        """
+        formula_or_inference = _decoded(formula_or_inference)
+        found = self._parallel_search(formula_or_inference, (False,), first=True)
+        if found is not NotImplemented:
+            return found.get(False)
+
+        truth_value_combinations = self._get_truth_value_combinations(formula_or_inference)
+        for combination in truth_value_combinations:
+            if counters.active is not None:
+                counters.increment('valuations')
+            atomic_valuation_dict = self._get_atomic_valuation_dict(formula_or_inference, combination)
+            if not self.satisfies(formula_or_inference, atomic_valuation_dict):
+                return atomic_valuation_dict
+        return None
+
     def is_contingent(self, formula_or_inference):
         """Returns True if the Formula / Inference is neither locally valid nor antivalid, False otherwise
 
@@ -131,6 +246,11 @@ class LocalValidityMixin:
         >>> CL.is_contingent(classical_parser.parse('q, p then q / p'))
         True
         """
+        formula_or_inference = _decoded(formula_or_inference)
+        found = self._parallel_search(formula_or_inference, (False, True))
+        if found is not NotImplemented:
+            return len(found) == 2
+
         return not self.is_locally_valid(formula_or_inference) and \
             not self.is_locally_antivalid(formula_or_inference)
 
@@ -154,7 +274,72 @@ class ValidityShortcutsMixin:
         return self.is_locally_antivalid(formula)
 
 
-class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
+class BackendMixin:
+    """Local validity, antivalidity, contingency and counterexamples evaluated according to the `backend` attribute
+    (see ``MixedManyValuedSemantics``), falling back to ``LocalValidityMixin`` with ``'naive'``, or when the formula /
+    inference cannot be compiled. Formulae encoded as ``CompactFormula`` are compiled as they are"""
+    backends = ('naive', 'compiled', 'bitsliced', 'sat', 'incremental')
+
+    def _evaluate_compiled(self, formula_or_inference, method):
+        """Result of calling `method` on the compiled formula / inference, NotImplemented if the backend is 'naive' or
+        the formula / inference cannot be compiled (then the regular evaluation is used, and raises the usual errors)"""
+        if self.backend == 'naive':
+            return NotImplemented
+        from logics.classes.propositional.semantics.compiled import engines, CompilationError
+        for engine in engines(self.backend):
+            try:
+                return getattr(engine(self, formula_or_inference), method)()
+            except CompilationError:
+                pass
+        return NotImplemented
+
+    def is_locally_valid(self, formula_or_inference):
+        """Same as ``LocalValidityMixin.is_locally_valid`` (see above), evaluated according to `backend`"""
+        result = self._evaluate_compiled(formula_or_inference, 'is_locally_valid')
+        if result is NotImplemented:
+            return super().is_locally_valid(formula_or_inference)
+        return result
+
+    def is_locally_antivalid(self, formula_or_inference):
+        """Same as ``LocalValidityMixin.is_locally_antivalid`` (see above), evaluated according to `backend`"""
+        result = self._evaluate_compiled(formula_or_inference, 'is_locally_antivalid')
+        if result is NotImplemented:
+            return super().is_locally_antivalid(formula_or_inference)
+        return result
+
+    def is_contingent(self, formula_or_inference):
+        """Same as ``LocalValidityMixin.is_contingent`` (see above), evaluated according to `backend`. Except with
+        ``'naive'``, the valuations are gone through once, stopping when both outcomes have been found"""
+        result = self._evaluate_compiled(formula_or_inference, 'is_contingent')
+        if result is NotImplemented:
+            return super().is_contingent(formula_or_inference)
+        return result
+
+    def counterexample(self, formula_or_inference):
+        """Same as ``LocalValidityMixin.counterexample`` (see above), evaluated according to `backend`. With the
+        ``'sat'`` backend the counterexample is the one the solver finds, and with ``'incremental'`` the first one in
+        Gray code order (see ``logics.classes.propositional.semantics.incremental``), so with those two it is not
+        necessarily the first one in the order of the truth table.
+
+        Examples
+        --------
+        >>> from copy import copy
+        >>> from logics.utils.parsers import classical_parser
+        >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics
+        >>> ST = copy(ST_mvl_semantics)
+        >>> ST.backend = 'sat'
+        >>> ST.counterexample(classical_parser.parse('p, p then q / q')) is None
+        True
+        >>> ST.counterexample(classical_parser.parse('q, p then q / p'))['p']
+        '0'
+        """
+        result = self._evaluate_compiled(formula_or_inference, 'counterexample')
+        if result is NotImplemented:
+            return super().counterexample(formula_or_inference)
+        return result
+
+
+class MixedManyValuedSemantics(BackendMixin, LocalValidityMixin, ValidityShortcutsMixin):
     """Class for many-valued semantics, which may contain different standards for premises and conclusions (e.g. ST, TS)
 
     Parameters
@@ -176,10 +361,25 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
         values
     use_molecular_valuation_fast_version: bool, optional
         Implements a faster version of the molecular valuation function (e.g. if asked for a disjunction will return
-        '1' with one true disjunct, without evaluating the other). In counterpart, it is less general, since it assumes
-        the Kleene truth matrices. Defaults to ``False``.
+        '1' with one true disjunct, without evaluating the other). Which argument values settle the value of a
+        connective is read from its truth function, so it works with any truth functions. In counterpart, formulae
+        that do not need to be fully evaluated are not fully checked either (e.g. for atomics without a value).
+        Defaults to ``False``.
     name: str
         Name of the system (only for prettier printing to the console)
+    backend: str, optional
+        How local validity, antivalidity and truth tables are evaluated. ``'naive'`` (the default) evaluates the
+        formulae valuation by valuation. ``'compiled'`` compiles the formula / inference once into lookup tables and
+        evaluates all the valuations together with NumPy (see ``logics.classes.propositional.semantics.compiled``).
+        ``'bitsliced'`` evaluates the compiled formula on packed bits, 64 valuations per operation (see
+        ``logics.classes.propositional.semantics.bitsliced``); it is used for logics of up to 4 truth values, with
+        more it works as ``'compiled'``. ``'sat'`` does not enumerate the valuations, but looks for a counterexample
+        with a SAT solver (see ``logics.classes.propositional.semantics.sat_encoding``), which is what makes formulae
+        with dozens of atomics feasible (truth tables are still enumerated, as with ``'compiled'``). ``'incremental'``
+        visits the valuations in Gray code order, recomputing only the subformulae that contain the atomic that changed,
+        and stops at the first counterexample (see ``logics.classes.propositional.semantics.incremental``). They all
+        give the same results, the last four are much faster for formulae with several atomics. Can also be changed
+        later, by setting the `backend` attribute.
 
     Notes
     -----
@@ -217,7 +417,7 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
         If the premise or conclusion designated values are not a sublist of the truth values, some logical constant of
         the language does not receive a truth function (or receives something that is neither a callable nor an
         indexible), or some sentential constant does not receive a truth value (or gets a truth value not present in
-        `truth_values`)
+        `truth_values`), or `backend` is not one of the above
 
     Examples
     --------
@@ -281,8 +481,8 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
     ...                               sentential_constant_values_dict={'⊥': '0', '⊤': '1'},
     ...                               name='ST')
 
-    Note that since both `CL` and `ST` use the Kleene truth matrices (represented above) we could also have specified
-    ``use_molecular_valuation_fast_version=True`` (would have been faster than what we did). Also note that, as stated
+    Note that we could also have specified ``use_molecular_valuation_fast_version=True`` (would have been faster than
+    what we did, e.g. a conjunction with a false first conjunct would not evaluate the second). Also note that, as stated
     above, the values of the `trivalued_truth_functions` could also be callables. For example:
 
     >>> def trivalued_disjunction(val1, val2):
@@ -308,7 +508,10 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
     """
     def __init__(self, language, truth_values, premise_designated_values, conclusion_designated_values,
                  truth_function_dict, sentential_constant_values_dict, use_molecular_valuation_fast_version=False,
-                 name='MixedManyValuedSemantics object'):
+                 name='MixedManyValuedSemantics object', backend='naive'):
+        if backend not in self.backends:
+            raise ValueError(f'Unknown backend {backend}, must be one of {self.backends}')
+
         # Check that premise_designated and conclusion_designated are sublists of truth_values
         for value in premise_designated_values:
             if value not in truth_values:
@@ -343,6 +546,8 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
         self.truth_function_dict = truth_function_dict
         self.sentential_constant_values_dict = sentential_constant_values_dict
         self.use_molecular_valuation_fast_version = use_molecular_valuation_fast_version
+        self._short_circuit_tables = {}
+        self.backend = backend
 
     def apply_truth_function(self, constant, *args):
         """Gets the value of a truth function applied to a given set of arguments.
@@ -434,60 +639,49 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
             subvaluations = tuple(self.valuation(subformula, atomic_valuation_dict) for subformula in formula.arguments())
             return self.apply_truth_function(formula.main_symbol, *subvaluations)
 
+    def _short_circuit_table(self, constant, arity):
+        """Dict that maps every tuple of values for the first arguments of `constant` that already determines the value
+        of the whole to that value (e.g. for classical conjunction, ``('0',)`` goes to ``'0'``, and the tuples of two
+        values to the value of the conjunction). Built from the truth function the first time it is needed. None if the
+        truth function cannot be tabulated over `truth_values`
+
+        Examples
+        --------
+        >>> from logics.instances.propositional.many_valued_semantics import WK_mvl_semantics as WK
+        >>> sorted((values, value) for values, value in WK._short_circuit_table('∨', 2).items() if len(values) < 2)
+        [(('e',), 'e')]
+        """
+        key = (constant, arity)
+        if key not in self._short_circuit_tables:
+            try:
+                outputs = {values: self.apply_truth_function(constant, *values)
+                           for values in product(self.truth_values, repeat=arity)}
+                table = {}
+                # Shorter tuples first, so that only the shortest determining tuple is kept
+                for length in range(arity + 1):
+                    possible_outputs = {}
+                    for values, output in outputs.items():
+                        possible_outputs.setdefault(values[:length], set()).add(output)
+                    for values, possible in possible_outputs.items():
+                        if len(possible) == 1 and not any(values[:shorter] in table for shorter in range(length)):
+                            table[values] = possible.pop()
+            except Exception:
+                table = None
+            self._short_circuit_tables[key] = table
+        return self._short_circuit_tables[key]
+
     def _molecular_valuation_fast_version(self, formula, atomic_valuation_dict):
-        """Fast version of valuation for molecular sentences (Takes about half the time in my preliminary tests)"""
-        if formula.main_symbol == '~':
-            inside_val = self.valuation(formula[1], atomic_valuation_dict)
-            if inside_val == '1':
-                return '0'
-            elif inside_val == 'i':
-                return 'i'
-            elif inside_val == '0':
-                return '1'
-
-        elif formula.main_symbol == '∧':
-            val1 = self.valuation(formula[1], atomic_valuation_dict)
-            if val1 == '0':
-                return '0'
-            val2 = self.valuation(formula[2], atomic_valuation_dict)
-            if val2 == '0':
-                return '0'
-            elif val1 == '1' and val2 == '1':
-                return '1'
-            return 'i'
-
-        elif formula.main_symbol == '∨':
-            val1 = self.valuation(formula[1], atomic_valuation_dict)
-            if val1 == '1':
-                return '1'
-            val2 = self.valuation(formula[2], atomic_valuation_dict)
-            if val2 == '1':
-                return '1'
-            elif val1 == '0' and val2 == '0':
-                return '0'
-            return 'i'
-
-        elif formula.main_symbol == '→':
-            val1 = self.valuation(formula[1], atomic_valuation_dict)
-            if val1 == '0':
-                return '1'
-            val2 = self.valuation(formula[2], atomic_valuation_dict)
-            if val2 == '1':
-                return '1'
-            elif val1 == '1' and val2 == '0':
-                return '0'
-            return 'i'
-
-        elif formula.main_symbol == '↔':
-            val1 = self.valuation(formula[1], atomic_valuation_dict)
-            if val1 == 'i':
-                return 'i'
-            val2 = self.valuation(formula[2], atomic_valuation_dict)
-            if val2 == 'i':
-                return 'i'
-            elif val1 == val2:
-                return '1'
-            return '0'
+        """Fast version of valuation for molecular sentences. Evaluates the arguments from left to right, and stops as
+        soon as the ones evaluated determine the value, according to the truth function of the main symbol (e.g. a
+        classical disjunction with a true first disjunct is true, whatever the second one)"""
+        table = self._short_circuit_table(formula.main_symbol, len(formula) - 1)
+        values = ()
+        for subformula in formula.arguments():
+            values += (self.valuation(subformula, atomic_valuation_dict),)
+            if table is not None and values in table:
+                return table[values]
+        # The truth function could not be tabulated, or some value is not in truth_values
+        return self.apply_truth_function(formula.main_symbol, *values)
 
     def satisfies(self, formula_or_inference, atomic_valuation_dict=None, evaluate_premise=False):
         """Returns True if the valuation satisfies the inference / formula, False otherwise.
@@ -600,19 +794,24 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
         >>> CL.is_globally_valid(classical_parser.parse('((p / p) // (p / p)) /// ((p / q) // (r / s))'))
         True
         """
+        from logics.classes.propositional.semantics.metainferential import MetainferenceEvaluator
+        return self._is_globally_valid(inference, MetainferenceEvaluator(self, inference))
+
+    def _is_globally_valid(self, inference, evaluator):
+        # The local validity of the inferences inside is asked to the evaluator, which computes each one once
         if isinstance(inference, Formula) or inference.level == 1:
-            return self.is_locally_valid(inference)
+            return evaluator.is_locally_valid(self, inference)
 
         for premise in inference.premises:
             if premise.level == 0:
                 raise ValueError("Global validity 1 not defined for formulae")
-            if not self.is_globally_valid(premise):
+            if not self._is_globally_valid(premise, evaluator):
                 return True  # If some premise is globally invalid, the inference is globally valid
 
         for conclusion in inference.conclusions:
             if conclusion.level == 0:
                 raise ValueError("Global validity 1 not defined for formulae")
-            if self.is_globally_valid(conclusion):
+            if self._is_globally_valid(conclusion, evaluator):
                 return True  # If some conclusion is globally valid, the inference is globally valid
 
         # If you got to here, all premises are globally valid and all conclusions globally invalid
@@ -634,15 +833,17 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
         >>> CL.is_globally_valid2(classical_parser.parse('((p / p) // (p / p)) /// ((p / q) // (r / s))'))
         False
         """
+        from logics.classes.propositional.semantics.metainferential import MetainferenceEvaluator
+        evaluator = MetainferenceEvaluator(self, inference)
         if isinstance(inference, Formula) or inference.level == 1:
-            return self.is_locally_valid(inference)
+            return evaluator.is_locally_valid(self, inference)
 
         for premise in inference.premises:
-            if not self.is_locally_valid(premise):
+            if not evaluator.is_locally_valid(self, premise):
                 return True  # If some premise is locally invalid, the inference is globally valid
 
         for conclusion in inference.conclusions:
-            if self.is_locally_valid(conclusion):
+            if evaluator.is_locally_valid(self, conclusion):
                 return True  # If some conclusion is locally valid, the inference is globally valid
 
         # If you got to here, all premises are locally valid and all conclusions locally invalid
@@ -663,12 +864,14 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
         >>> CL.is_globally_valid3(classical_parser.parse('(p / q) // (r / s)'))
         True
         """
+        from logics.classes.propositional.semantics.metainferential import MetainferenceEvaluator
+        evaluator = MetainferenceEvaluator(self, inference)
         for premise in inference.premises:
-            if not self.is_locally_valid(premise):  # For formulae this is equivalent to is_tautology
+            if not evaluator.is_locally_valid(self, premise):  # For formulae this is equivalent to is_tautology
                 return True  # If some premise is locally invalid, the inference is globally valid
 
         for conclusion in inference.conclusions:
-            if self.is_locally_valid(conclusion):  # For formulae this is equivalent to is_tautology
+            if evaluator.is_locally_valid(self, conclusion):  # For formulae this is equivalent to is_tautology
                 return True  # If some conclusion is locally valid, the inference is globally valid
 
         # If you got to here, all premises are locally valid and all conclusions locally invalid
@@ -716,10 +919,17 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
         ['1', '0', '0']
         ['0', '0', '1']
         """
-        ordered_subformulae = sorted(formula_or_inference.subformulae, key=lambda x: x.depth)
+        result = self._evaluate_compiled(formula_or_inference, 'truth_table')
+        if result is not NotImplemented:
+            return result
+
+        formula_or_inference = _decoded(formula_or_inference)
+        ordered_subformulae = _ordered_subformulae(formula_or_inference)
         truth_value_combinations = self._get_truth_value_combinations(formula_or_inference)
         truth_table = list()
         for combination in truth_value_combinations:
+            if counters.active is not None:
+                counters.increment('valuations')
             atomic_valuation_dict = self._get_atomic_valuation_dict(formula_or_inference, combination)
             truth_table_row = list()
             for subformula in ordered_subformulae:
@@ -727,6 +937,98 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
             truth_table.append(truth_table_row)
         return [ordered_subformulae, truth_table]
 
+    def iter_truth_table(self, formula_or_inference, counterexamples_only=False, max_rows=None):
+        """Streams the truth table of a formula / inference, instead of building it all in memory.
+
+        Returns a 2-list like ``truth_table``, whose second member is a generator that yields the rows (in the same
+        order) in blocks, as 2-dimensional NumPy arrays of truth values, with a row per valuation and a column per
+        subformula.
+
+        Parameters
+        ----------
+        formula_or_inference: logics.classes.propositional.Formula or logics.classes.propositional.Inference
+            The formula or inference whose truth table you want
+        counterexamples_only: bool, optional
+            If True, only the rows of the valuations that do not satisfy the formula / inference. Defaults to False
+        max_rows: int, optional
+            Stop after this many rows. By default, all of them
+
+        Examples
+        --------
+        >>> from logics.utils.parsers import classical_parser
+        >>> from logics.instances.propositional.many_valued_semantics import classical_mvl_semantics as CL
+        >>> subformulae, blocks = CL.iter_truth_table(classical_parser.parse('q, p then q / p'),
+        ...                                           counterexamples_only=True)
+        >>> subformulae
+        [['q'], ['p'], ['→', ['p'], ['q']]]
+        >>> for block in blocks:
+        ...     print(block)
+        [['1' '0' '1']]
+        >>> subformulae, blocks = CL.iter_truth_table(classical_parser.parse('p and not p'), max_rows=1)
+        >>> subformulae
+        [['p'], ['~', ['p']], ['∧', ['p'], ['~', ['p']]]]
+        >>> list(blocks)
+        [array([['1', '0', '0']], dtype='<U1')]
+        """
+        from logics.classes.propositional.semantics.compiled import CompiledInference, CompilationError
+        try:
+            compiled = CompiledInference(self, formula_or_inference)
+            ordered_subformulae, _ = compiled.ordered_subformulae()
+            if counterexamples_only:
+                compiled._check_compilable()
+            compiled._check_enumerable()
+        except CompilationError:
+            formula_or_inference = _decoded(formula_or_inference)
+            return [_ordered_subformulae(formula_or_inference),
+                    self._iter_truth_table_rows(formula_or_inference, counterexamples_only, max_rows)]
+
+        truth_values = np.asarray(self.truth_values)
+        if truth_values.tolist() != list(self.truth_values):  # e.g. values of different types
+            truth_values = np.empty(len(self.truth_values), dtype=object)
+            truth_values[:] = self.truth_values
+        blocks = (truth_values[codes] for codes in compiled.iter_truth_table(counterexamples_only, max_rows))
+        return [ordered_subformulae, blocks]
+
+    def _iter_truth_table_rows(self, formula_or_inference, counterexamples_only, max_rows):
+        """Regular evaluation for ``iter_truth_table``, one valuation at a time (one row per block)"""
+        ordered_subformulae = _ordered_subformulae(formula_or_inference)
+        rows = 0
+        for combination in self._get_truth_value_combinations(formula_or_inference):
+            if max_rows is not None and rows >= max_rows:
+                return
+            if counters.active is not None:
+                counters.increment('valuations')
+            atomic_valuation_dict = self._get_atomic_valuation_dict(formula_or_inference, combination)
+            if counterexamples_only and self.satisfies(formula_or_inference, atomic_valuation_dict):
+                continue
+            row = np.empty((1, len(ordered_subformulae)), dtype=object)
+            row[0, :] = [self.valuation(subformula, atomic_valuation_dict) for subformula in ordered_subformulae]
+            rows += 1
+            yield row
+
+    def counterexamples(self, formula_or_inference, max_count=None):
+        """Yields the valuations that do not satisfy a formula / inference (as atomic valuation dicts), in the order of
+        the truth table, up to `max_count` of them. Unlike ``counterexample``, does not stop at the first one, and
+        unlike ``truth_table``, does not build all the rows in memory
+
+        Examples
+        --------
+        >>> from logics.utils.parsers import classical_parser
+        >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST
+        >>> list(ST.counterexamples(classical_parser.parse('p and not p')))
+        [{'p': '1'}, {'p': '0'}]
+        >>> list(ST.counterexamples(classical_parser.parse('p and not p'), max_count=1))
+        [{'p': '1'}]
+        """
+        atomics = list(formula_or_inference.atomics_inside(self.language))
+        subformulae, blocks = self.iter_truth_table(formula_or_inference, counterexamples_only=True,
+                                                    max_rows=max_count)
+        subformulae = [_decoded(subformula) for subformula in subformulae]
+        columns = [subformulae.index(Formula([atomic])) for atomic in atomics]
+        for block in blocks:
+            for row in block.tolist():
+                yield {atomic: row[column] for atomic, column in zip(atomics, columns)}
+
     def __repr__(self):
         return self.name
 
@@ -735,7 +1037,7 @@ class MixedManyValuedSemantics(LocalValidityMixin, ValidityShortcutsMixin):
 # ----------------------------------------------------------------------------------------------------------------------
 
 
-class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin, list):
+class MixedMetainferentialSemantics(BackendMixin, LocalValidityMixin, ValidityShortcutsMixin, list):
     """Class for mixed *metainferential* logics, where the premises and conclusions standards are themselves mixed.
 
     This class extends list, so you should just pass a 2-list with the mixed standards you want to combine. The given
@@ -744,7 +1046,8 @@ class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin,
     Raises
     ------
     ValueError
-        If you pass less or more than two arguments
+        If you pass less or more than two arguments, or `backend` is not one of the backends of
+        ``MixedManyValuedSemantics``
 
     Examples
     --------
@@ -773,8 +1076,21 @@ class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin,
     >>> STTS_TSST = MixedMetainferentialSemantics([[ST, TS], [TS, ST]])
     >>> type(STTS_TSST[0])
     <class 'logics.classes.propositional.semantics.many_valued.MixedMetainferentialSemantics'>
+
+    The `backend` keyword argument works as in ``MixedManyValuedSemantics`` (the default is ``'naive'``), and is passed
+    on to the 2-lists turned into MixedMetainferentialSemantics. Every formula is evaluated once per valuation, even if
+    it appears at several levels of the metainference, provided the logics inside have the same truth functions.
+    Moreover, the global validity methods compute the local validity of each (meta)inference inside the given one
+    only once, and with the ``'compiled'``, ``'bitsliced'`` and ``'incremental'`` backends, all of them in a single
+    pass through the valuations (see ``logics.classes.propositional.semantics.metainferential``).
+
+    >>> TSST_compiled = MixedMetainferentialSemantics([TS, ST], backend='compiled')
+    >>> TSST_compiled.is_locally_valid(classical_parser.parse('(A / B), (B / C) // (A / C)'))
+    True
+    >>> TSST_compiled.is_globally_valid(classical_parser.parse('(A / B), (B / C) // (A / C)'))
+    True
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, backend='naive', **kwargs):
         """
         Must be a 2-list where the first member and second members are instances of either MixedManyValuedSemantics or
         MixedMetainferentialLogic. If they are regular 2-lists, turns them into a MML
@@ -782,11 +1098,13 @@ class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin,
         super().__init__(*args, **kwargs)
         if len(self) != 2:
             raise ValueError('Can only slice two logics')
+        if backend not in self.backends:
+            raise ValueError(f'Unknown backend {backend}, must be one of {self.backends}')
 
         if type(self[0]) == list and len(self[0]) == 2:
-            self[0] = MixedMetainferentialSemantics(self[0])
+            self[0] = MixedMetainferentialSemantics(self[0], backend=backend)
         if type(self[1]) == list and len(self[1]) == 2:
-            self[1] = MixedMetainferentialSemantics(self[1])
+            self[1] = MixedMetainferentialSemantics(self[1], backend=backend)
         # Made like this, extending list, so that you can do things like [[TS, ST], [ST, TS]]
 
         self.premise_standard = self[0]
@@ -794,6 +1112,7 @@ class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin,
         # Both have the same language and truth values, so pick one
         self.language = self.premise_standard.language
         self.truth_values = self.premise_standard.truth_values
+        self.backend = backend
 
     def satisfies(self, inference, atomic_valuation_dict=None, evaluate_premise=False):
         """Unlike the class above, this method only accepts instances of Inference
@@ -816,15 +1135,19 @@ class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin,
         """
         Same as in the class above
         """
+        from logics.classes.propositional.semantics.metainferential import MetainferenceEvaluator
+        return self._is_globally_valid(inference, MetainferenceEvaluator(self, inference))
+
+    def _is_globally_valid(self, inference, evaluator):
         if inference.level == 1:
-            return self.conclusion_standard.is_locally_valid(inference)
+            return evaluator.is_locally_valid(self.conclusion_standard, inference)
 
         for premise in inference.premises:
-            if not self.premise_standard.is_globally_valid(premise):
+            if not _is_globally_valid(self.premise_standard, premise, evaluator):
                 return True
 
         for conclusion in inference.conclusions:
-            if self.conclusion_standard.is_globally_valid(conclusion):
+            if _is_globally_valid(self.conclusion_standard, conclusion, evaluator):
                 return True
 
         return False
@@ -833,15 +1156,17 @@ class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin,
         """
         Same as in the class above
         """
+        from logics.classes.propositional.semantics.metainferential import MetainferenceEvaluator
+        evaluator = MetainferenceEvaluator(self, inference)
         if inference.level == 1:
-            return self.conclusion_standard.is_locally_valid(inference)
+            return evaluator.is_locally_valid(self.conclusion_standard, inference)
 
         for premise in inference.premises:
-            if not self.premise_standard.is_locally_valid1(premise):
+            if not evaluator.is_locally_valid(self.premise_standard, premise):
                 return True
 
         for conclusion in inference.conclusions:
-            if self.conclusion_standard.is_locally_valid1(conclusion):
+            if evaluator.is_locally_valid(self.conclusion_standard, conclusion):
                 return True
 
         return False
@@ -850,12 +1175,14 @@ class MixedMetainferentialSemantics(LocalValidityMixin, ValidityShortcutsMixin,
         """
         Same as in the class above
         """
+        from logics.classes.propositional.semantics.metainferential import MetainferenceEvaluator
+        evaluator = MetainferenceEvaluator(self, inference)
         for premise in inference.premises:
-            if not self.premise_standard.is_locally_valid(premise):
+            if not evaluator.is_locally_valid(self.premise_standard, premise):
                 return True
 
         for conclusion in inference.conclusions:
-            if self.conclusion_standard.is_locally_valid(conclusion):
+            if evaluator.is_locally_valid(self.conclusion_standard, conclusion):
                 return True
 
         return False
@@ -887,12 +1214,27 @@ class IntersectionLogic(LocalValidityMixin, ValidityShortcutsMixin, list):
 
     In this case, this system will be equal to I_TS_ST, since CL is stronger inferentially and metainferentially
     than both ST and TS.
+
+    With ``backend='incremental'`` (the default is ``'naive'``), local validity, antivalidity and contingency are
+    decided in a single pass over the valuations, evaluating all the logics together and stopping at the first
+    valuation that settles the question (see ``logics.classes.propositional.semantics.incremental``). If some of the
+    logics cannot be compiled (e.g. metainferential ones), they are evaluated as usual.
+
+    >>> IntersectionLogic([TS, ST], backend='incremental').is_locally_valid(classical_parser.parse('p / p'))
+    False
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, backend='naive', **kwargs):
         super().__init__(*args, **kwargs)
         # All have the same language and truth values, so pick one
         self.language = self[0].language
         self.truth_values = self[0].truth_values
+        self.backend = backend
+
+    def _member_satisfactions(self, inference):
+        if self.backend != 'incremental':
+            return None
+        from logics.classes.propositional.semantics.incremental import member_satisfactions
+        return member_satisfactions(self, inference)
 
     def satisfies(self, inference, atomic_valuation_dict=None, evaluate_premise=False):
         for logic in self:
@@ -901,11 +1243,31 @@ class IntersectionLogic(LocalValidityMixin, ValidityShortcutsMixin, list):
         return True
 
     def is_locally_valid(self, inference):
+        satisfactions = self._member_satisfactions(inference)
+        if satisfactions is not None:
+            return all(all(satisfied) for satisfied in satisfactions)
         for logic in self:
             if not logic.is_locally_valid(inference):
                 return False
         return True
 
+    def is_locally_antivalid(self, inference):
+        satisfactions = self._member_satisfactions(inference)
+        if satisfactions is not None:
+            return not any(all(satisfied) for satisfied in satisfactions)
+        return super().is_locally_antivalid(inference)
+
+    def is_contingent(self, inference):
+        satisfactions = self._member_satisfactions(inference)
+        if satisfactions is not None:
+            found = set()
+            for satisfied in satisfactions:
+                found.add(all(satisfied))
+                if len(found) == 2:
+                    return True
+            return False
+        return super().is_contingent(inference)
+
     def is_globally_valid(self, inference):
         for logic in self:
             if not logic.is_globally_valid(inference):
@@ -950,12 +1312,24 @@ class UnionLogic(LocalValidityMixin, ValidityShortcutsMixin, list):
 
     In this case, this system will be equal to CL, since it is stronger inferentially and metainferentially
     than both ST and TS.
+
+    The `backend` works as in ``IntersectionLogic``:
+
+    >>> UnionLogic([TS, ST], backend='incremental').is_locally_valid(classical_parser.parse('p / p'))
+    True
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, backend='naive', **kwargs):
         super().__init__(*args, **kwargs)
         # All have the same language and truth values, so pick one
         self.language = self[0].language
         self.truth_values = self[0].truth_values
+        self.backend = backend
+
+    def _member_satisfactions(self, inference):
+        if self.backend != 'incremental':
+            return None
+        from logics.classes.propositional.semantics.incremental import member_satisfactions
+        return member_satisfactions(self, inference)
 
     def satisfies(self, inference, atomic_valuation_dict=None, evaluate_premise=False):
         for logic in self:
@@ -964,11 +1338,39 @@ class UnionLogic(LocalValidityMixin, ValidityShortcutsMixin, list):
         return False
 
     def is_locally_valid(self, inference):
+        satisfactions = self._member_satisfactions(inference)
+        if satisfactions is not None:
+            # Valid unless every logic has a counterexample
+            refuted = [False] * len(self)
+            for satisfied in satisfactions:
+                refuted = [was_refuted or not now for was_refuted, now in zip(refuted, satisfied)]
+                if all(refuted):
+                    return False
+            return True
         for logic in self:
             if logic.is_locally_valid(inference):
                 return True
         return False
 
+    def is_locally_antivalid(self, inference):
+        satisfactions = self._member_satisfactions(inference)
+        if satisfactions is not None:
+            return not any(any(satisfied) for satisfied in satisfactions)
+        return super().is_locally_antivalid(inference)
+
+    def is_contingent(self, inference):
+        satisfactions = self._member_satisfactions(inference)
+        if satisfactions is not None:
+            refuted = [False] * len(self)
+            satisfiable = False
+            for satisfied in satisfactions:
+                refuted = [was_refuted or not now for was_refuted, now in zip(refuted, satisfied)]
+                satisfiable = satisfiable or any(satisfied)
+                if all(refuted) and satisfiable:
+                    return True
+            return False
+        return super().is_contingent(inference)
+
     def is_globally_valid(self, inference):
         for logic in self:
             if logic.is_globally_valid(inference):
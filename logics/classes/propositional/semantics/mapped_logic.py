@@ -7,9 +7,12 @@ date: 2021-02-08
 from itertools import chain, combinations
 from copy import deepcopy
 
+import numpy as np
+
 from logics.classes.propositional.formula import Formula
 from logics.classes.propositional.inference import Inference
 from logics.classes.propositional.semantics import MixedManyValuedSemantics
+from logics.utils import counters
 
 
 def powerset(iterable):
@@ -32,12 +35,14 @@ class MappingMatrix:
         columns are ordered, such that the initial rows and columns are linked to subsets of `truth_values` with lesser
         values than the final rows and columns. The order between rows or columns linked to equinumerous subsets
         respects the order of the elements of the subsets. A permitted mapping is represented with a one and a
-        prohibited mapping with a zero.
+        prohibited mapping with a zero. It may also be a 2-dimensional numpy array. It is stored in the `boolean_matrix`
+        attribute as a numpy boolean array, so that the operations below work on the whole matrix at once.
 
     Raises
     ------
     ValueError
-        If the matrix has more rows or columns than what is possible to build with `truth_values`.
+        If the matrix has more rows or columns than what is possible to build with `truth_values`, or its rows have
+        different lengths.
 
     Examples
     --------
@@ -100,18 +105,24 @@ class MappingMatrix:
         for row in boolean_matrix:
             if len(row) > len(self.mappings):
                 raise ValueError(f'There are too many columns on the matrix.')
+        if len({len(row) for row in boolean_matrix}) > 1:
+            raise ValueError(f'The rows of the matrix have different lengths.')
 
         self.truth_values = truth_values
-        self.boolean_matrix = boolean_matrix
+        self.boolean_matrix = np.array(boolean_matrix, dtype=bool)
+        if self.boolean_matrix.ndim != 2:
+            # The empty matrix
+            self.boolean_matrix = self.boolean_matrix.reshape(len(boolean_matrix), 0)
 
     def _fill_matrix(self, value):
         """Builds, with a given value, a matrix for every possible combination of subsets of the truth values."""
-        self.boolean_matrix = []
-        for row in range(len(self.mappings)):
-            row = []
-            for column in range(len(self.mappings)):
-                row.append(value)
-            self.boolean_matrix.append(row)
+        self.boolean_matrix = np.full((len(self.mappings), len(self.mappings)), bool(value))
+
+    def _check_shape(self, other, action):
+        if self.boolean_matrix.shape[0] != other.boolean_matrix.shape[0]:
+            raise ValueError(f'The matrices cannot be {action}: quantity of rows.')
+        if self.boolean_matrix.shape[1] != other.boolean_matrix.shape[1]:
+            raise ValueError(f'The matrices cannot be {action}: quantity of columns.')
 
     def is_included_in(self, other):
         """Checks if the calling MappingMatrix is included in the given MappingMatrix.
@@ -136,18 +147,8 @@ class MappingMatrix:
         >>> ST.is_included_in(TS)
         False
         """
-        if len(self.boolean_matrix) != len(other.boolean_matrix):
-            raise ValueError(f'The matrices cannot be compared: quantity of rows.')
-
-        for i in range(len(self.boolean_matrix)):
-            if len(self.boolean_matrix[i]) != len(other.boolean_matrix[i]):
-                raise ValueError(f'The matrices cannot be compared: quantity of columns.')
-
-        for i in range(len(self.boolean_matrix)):
-            for j in range(len(self.boolean_matrix[i])):
-                if self.boolean_matrix[i][j] > other.boolean_matrix[i][j]:
-                    return False
-        return True
+        self._check_shape(other, 'compared')
+        return not (self.boolean_matrix & ~other.boolean_matrix).any()
 
     def matrix_negation(self):
         """Returns a MappingMatrix representing the complement matrix.
@@ -172,14 +173,7 @@ class MappingMatrix:
           [0, 0, 0, 0]
         ]
         """
-        negation = MappingMatrix(deepcopy(self.truth_values), deepcopy(self.boolean_matrix))
-        for i in range(len(self.boolean_matrix)):
-            for j in range(len(self.boolean_matrix[i])):
-                if self.boolean_matrix[i][j] == 0:
-                    negation.boolean_matrix[i][j] = 1
-                if self.boolean_matrix[i][j] == 1:
-                    negation.boolean_matrix[i][j] = 0
-        return negation
+        return MappingMatrix(deepcopy(self.truth_values), ~self.boolean_matrix)
 
     def matrix_conjunction(self, other):
         """Returns a MappingMatrix representing the conjunction between the calling matrix and the given matrix.
@@ -209,21 +203,8 @@ class MappingMatrix:
           [1, 1, 1, 1]
         ]
         """
-        if len(self.boolean_matrix) != len(other.boolean_matrix):
-            raise ValueError(f'The matrices cannot be operated: quantity of rows.')
-        for i in range(len(self.boolean_matrix)):
-            if len(self.boolean_matrix[i]) != len(other.boolean_matrix[i]):
-                raise ValueError(f'The matrices cannot be operated: quantity of columns.')
-
-        conjunction = MappingMatrix(self.truth_values)
-        conjunction._fill_matrix(0)
-        for i in range(len(self.boolean_matrix)):
-            for j in range(len(self.boolean_matrix[i])):
-                if self.boolean_matrix[i][j] and other.boolean_matrix[i][j]:
-                    conjunction.boolean_matrix[i][j] = 1
-                else:
-                    conjunction.boolean_matrix[i][j] = 0
-        return conjunction
+        self._check_shape(other, 'operated')
+        return MappingMatrix(self.truth_values, self.boolean_matrix & other.boolean_matrix)
 
     def matrix_disjunction(self, other):
         """Returns a MappingMatrix representing the disjunction between the calling matrix and the given matrix.
@@ -253,25 +234,12 @@ class MappingMatrix:
           [1, 1, 1, 1]
         ]
         """
-        if len(self.boolean_matrix) != len(other.boolean_matrix):
-            raise ValueError(f'The matrices cannot be operated: quantity of rows.')
-        for i in range(len(self.boolean_matrix)):
-            if len(self.boolean_matrix[i]) != len(other.boolean_matrix[i]):
-                raise ValueError(f'The matrices cannot be operated: quantity of columns.')
-
-        disjunction = MappingMatrix(self.truth_values)
-        disjunction._fill_matrix(0)
-        for i in range(len(self.boolean_matrix)):
-            for j in range(len(self.boolean_matrix[i])):
-                if self.boolean_matrix[i][j] or other.boolean_matrix[i][j]:
-                    disjunction.boolean_matrix[i][j] = 1
-                else:
-                    disjunction.boolean_matrix[i][j] = 0
-        return disjunction
+        self._check_shape(other, 'operated')
+        return MappingMatrix(self.truth_values, self.boolean_matrix | other.boolean_matrix)
 
     def __repr__(self):
         representation = "[\n"
-        for row in self.boolean_matrix:
+        for row in self.boolean_matrix.astype(int).tolist():
             representation += "  " + str(row) + "\n"
         representation += "]"
         return representation
@@ -302,10 +270,12 @@ class MappedManyValuedSemantics(MixedManyValuedSemantics):
         values.
     use_molecular_valuation_fast_version: bool
         Implements a faster version of the molecular valuation function (e.g. if asked for a disjunction will return
-        '1' with one true disjunct, without evaluating the other). In counterpart, it is less general, since it assumes
-        the Kleene truth matrices. Defaults to False.
+        '1' with one true disjunct, without evaluating the other). See ``MixedManyValuedSemantics``. Defaults to False.
     name: str
         Name of the system (only for prettier printing to the console).
+    backend: str, optional
+        ``'naive'`` (the default), ``'compiled'``, ``'bitsliced'``, ``'sat'`` or ``'incremental'``, see
+        MixedManyValuedSemantics. It does not affect ``valuation_matrix`` (see below).
 
     Notes
     -----
@@ -350,9 +320,9 @@ class MappedManyValuedSemantics(MixedManyValuedSemantics):
 
     def __init__(self, language, truth_values, mapping_constraints, truth_function_dict,
                  sentential_constant_values_dict, use_molecular_valuation_fast_version=False,
-                 name='MappedManyValuedSemantics object'):
+                 name='MappedManyValuedSemantics object', backend='naive'):
         super().__init__(language, truth_values, [], [], truth_function_dict, sentential_constant_values_dict,
-                         use_molecular_valuation_fast_version, name)
+                         use_molecular_valuation_fast_version, name, backend)
         self.mappings = []
         for truth_value in powerset(truth_values):
             self.mappings.append(list(truth_value))
@@ -429,6 +399,12 @@ class MappedManyValuedSemantics(MixedManyValuedSemantics):
     def valuation_matrix(self, inference):
         """Gets a valuation matrix (MappingMatrix) for a given inference.
 
+        Whatever the `backend`, the valuations are evaluated all together with the compiled inference (see
+        ``logics.classes.propositional.semantics.compiled``), or split among processes if `processes` is more than 1.
+        Only an inference that cannot be compiled is evaluated one valuation at a time, with
+        ``mapped_standard_to_inferences``. Either way, every valuation adds one to the ``valuations`` counter (see
+        ``logics.utils.counters``).
+
         Parameters
         ----------
         inference: logics.classes.propositional.Inference
@@ -465,11 +441,39 @@ class MappedManyValuedSemantics(MixedManyValuedSemantics):
           [0, 0, 1, 1, 0, 0, 0, 0]
           [0, 0, 0, 0, 0, 0, 0, 0]
         ]
+        >>> from collections import Counter
+        >>> from logics.utils import counters
+        >>> from logics.instances.propositional import mapped_logic_semantics
+        >>> ST = mapped_logic_semantics.three_valued_strict_tolerant_from_all_premises_to_some_conclusions_logic
+        >>> counters.active = Counter()
+        >>> _ = ST.valuation_matrix(Inference([Formula(['p']), Formula(['q'])], [Formula(['p'])]))
+        >>> counters.active['valuations']
+        9
+        >>> counters.active = None
         """
         val_matrix = MappingMatrix(self.truth_values)
         val_matrix._fill_matrix(0)
+        if self.processes is not None and self.processes > 1 and inference.atomics_inside(self.language):
+            # Split the valuations among processes (see LocalValidityMixin)
+            from logics.classes.propositional.semantics.parallel import valuation_coordinates
+            for coord in valuation_coordinates(self, inference, self.processes):
+                val_matrix.boolean_matrix[coord[0]][coord[1]] = 1
+            return val_matrix
+
+        # The coordinates of all the valuations are computed at once, with the compiled inference (see
+        # logics.classes.propositional.semantics.compiled, which also counts the valuations). If it cannot be
+        # compiled, one valuation at a time
+        from logics.classes.propositional.semantics.compiled import CompiledInference, CompilationError
+        try:
+            val_matrix.boolean_matrix = CompiledInference(self, inference).mapping_matrix()
+            return val_matrix
+        except CompilationError:
+            pass
+
         truth_value_combinations = self._get_truth_value_combinations(inference)
         for combination in truth_value_combinations:
+            if counters.active is not None:
+                counters.increment('valuations')
             atomic_valuation_dict = self._get_atomic_valuation_dict(inference, combination)
             coord = self.mapped_standard_to_inferences(inference, atomic_valuation_dict, coordinate=True)
             val_matrix.boolean_matrix[coord[0]][coord[1]] = 1
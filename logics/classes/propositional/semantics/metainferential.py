@@ -0,0 +1,116 @@
+"""Global validity of metainferences, reusing the local validity of the (meta)inferences inside them.
+
+The global validity methods (``is_globally_valid``, ``is_globally_valid2`` and ``is_globally_valid3``) ask for the
+local validity of the (meta)inferences and formulae inside a metainference, for the semantics and for the standards
+inside it (if it is a ``MixedMetainferentialSemantics``), and the recursion of ``is_globally_valid`` asks for the same
+ones many times. ``MetainferenceEvaluator`` answers every question once.
+
+Moreover, if the `backend` of the semantics enumerates valuations (``'compiled'``, ``'bitsliced'`` or
+``'incremental'``), all the questions are answered beforehand in a single sweep over the valuations of the whole
+metainference: every formula is evaluated once per valuation (identical formulae at different levels are a single node
+of the compiled program, see ``logics.classes.propositional.semantics.compiled``), and the satisfaction of every
+(meta)inference inside, with every standard, is computed from those values.
+"""
+
+import numpy as np
+
+from logics.classes.propositional import Inference
+from logics.classes.propositional.semantics.compiled import CompiledInference, CompilationError
+from logics.utils import counters
+
+
+class MetainferenceEvaluator:
+    """Memoized local validity of the formulae and (meta)inferences inside `inference`, for `semantics` and the
+    standards inside it
+
+    Examples
+    --------
+    >>> from copy import copy
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import classical_logic_up_to_level
+    >>> from logics.classes.propositional.semantics.metainferential import MetainferenceEvaluator
+    >>> TSST = copy(classical_logic_up_to_level(2))
+    >>> TSST.backend = 'compiled'
+    >>> inference = classical_parser.parse('(A / B), (B / C) // (A / C)')
+    >>> evaluator = MetainferenceEvaluator(TSST, inference)
+    >>> evaluator.is_locally_valid(TSST, inference)
+    True
+    >>> evaluator.is_locally_valid(TSST.conclusion_standard, inference.conclusions[0])  # A / C in ST
+    False
+    """
+    def __init__(self, semantics, inference):
+        self.semantics = semantics
+        self._results = {}
+        if getattr(semantics, 'backend', 'naive') in ('compiled', 'bitsliced', 'incremental'):
+            try:
+                self._sweep(inference)
+            except CompilationError:
+                pass
+
+    def is_locally_valid(self, standard, formula_or_inference):
+        """Same as ``standard.is_locally_valid(formula_or_inference)``, computed only the first time"""
+        key = (id(standard), _key(formula_or_inference))
+        if key not in self._results:
+            self._results[key] = standard.is_locally_valid(formula_or_inference)
+        return self._results[key]
+
+    def _sweep(self, inference):
+        compiled = CompiledInference(self.semantics, inference)
+        keys = []
+        programs = []
+        for standard in _standards(self.semantics):
+            for part in _parts(inference):
+                key = (id(standard), _key(part))
+                if key in self._results or key in keys:
+                    continue
+                try:
+                    if hasattr(standard, 'mapping_constraints'):
+                        programs.append(compiled._compile_mapped_satisfaction(part))
+                    else:
+                        programs.append(compiled._compile_satisfaction(part, False, standard))
+                except CompilationError:
+                    # Left to standard.is_locally_valid, which will raise the usual error if there is one
+                    continue
+                keys.append(key)
+        compiled._check_enumerable()
+
+        refuted = np.zeros(len(programs), dtype=bool)
+        for start in range(0, compiled.valuation_count, compiled.chunk_size):
+            stop = min(start + compiled.chunk_size, compiled.valuation_count)
+            values = compiled.node_values(start, stop)
+            if counters.active is not None:
+                counters.increment('valuations', stop - start)
+            for index, program in enumerate(programs):
+                if not refuted[index] and not compiled._satisfied(program, values, stop - start).all():
+                    refuted[index] = True
+            if refuted.all():
+                break
+        for key, is_refuted in zip(keys, refuted):
+            self._results[key] = not is_refuted
+
+
+def _standards(semantics):
+    """The semantics and, for a mixed metainferential one, every standard inside it"""
+    standards = [semantics]
+    if hasattr(semantics, 'premise_standard'):
+        for standard in _standards(semantics.premise_standard) + _standards(semantics.conclusion_standard):
+            if all(standard is not known for known in standards):
+                standards.append(standard)
+    return standards
+
+
+def _parts(formula_or_inference):
+    """The formula / inference, and (for inferences) every formula and (meta)inference inside it"""
+    parts = [formula_or_inference]
+    if isinstance(formula_or_inference, Inference):
+        for part in list(formula_or_inference.premises) + list(formula_or_inference.conclusions):
+            parts.extend(_parts(part))
+    return parts
+
+
+def _key(formula_or_inference):
+    """Hashable version of a formula / inference"""
+    if isinstance(formula_or_inference, Inference):
+        return ('/', tuple(_key(premise) for premise in formula_or_inference.premises),
+                tuple(_key(conclusion) for conclusion in formula_or_inference.conclusions))
+    return formula_or_inference.intern()
@@ -0,0 +1,152 @@
+"""Evaluation of the valuations of a formula / inference in several processes.
+
+The valuations are split into *shards* by fixing the values of the first atomics (as many as needed for there to be
+a few shards per process), and the shards are handed to a ``concurrent.futures.ProcessPoolExecutor``. Every shard goes
+through its valuations in ``itertools.product`` order, like the regular evaluation does. As soon as some shard finds
+what is being looked for (e.g. a counterexample, when deciding local validity) the pending shards are cancelled, and
+the running ones stop at their next check of a shared flag.
+
+This is used by ``LocalValidityMixin`` (and ``MappedManyValuedSemantics.valuation_matrix``) when the `processes`
+attribute of the semantics is set to more than 1. The semantics and the formula / inference are sent to the worker
+processes, so with the ``'spawn'`` start method (the default outside Linux) they must be picklable.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from logics.utils import counters
+
+SHARDS_PER_PROCESS = 4
+CHECK_EVERY = 64  # Valuations between checks of the stop flag
+
+# Set in every worker process by _start_worker
+_job = None
+
+
+def shard_atomic_count(atomic_count, value_count, processes):
+    """How many atomics to fix so that there are at least ``SHARDS_PER_PROCESS`` shards per process (or as many as
+    possible, if there are few atomics)
+
+    Examples
+    --------
+    >>> from logics.classes.propositional.semantics.parallel import shard_atomic_count
+    >>> shard_atomic_count(10, 2, 4)
+    4
+    >>> shard_atomic_count(10, 3, 4)
+    3
+    >>> shard_atomic_count(2, 2, 4)
+    2
+    """
+    count = 0
+    while count < atomic_count and value_count ** count < SHARDS_PER_PROCESS * processes:
+        count += 1
+    return count
+
+
+def _start_worker(semantics, formula_or_inference, atomics, stop):
+    global _job
+    _job = (semantics, formula_or_inference, atomics, stop)
+
+
+def _shard_valuations(prefix):
+    """Atomic valuation dicts of a shard, in ``itertools.product`` order"""
+    semantics, _, atomics, _ = _job
+    for suffix in product(semantics.truth_values, repeat=len(atomics) - len(prefix)):
+        yield dict(zip(atomics, prefix + suffix))
+
+
+def _search_shard(index, prefix, outcomes):
+    """Looks in a shard for the first valuation with each of the `outcomes` (True means satisfied). Returns a dict
+    ``{outcome: atomic valuation dict}`` of those it found and the number of valuations it looked at. Gives up if
+    the stop flag is set to a shard before this one"""
+    semantics, formula_or_inference, _, stop = _job
+    found = {}
+    count = 0
+    for atomic_valuation_dict in _shard_valuations(prefix):
+        if count % CHECK_EVERY == 0 and stop.value < index:
+            break
+        count += 1
+        outcome = semantics.satisfies(formula_or_inference, atomic_valuation_dict)
+        if outcome in outcomes and outcome not in found:
+            found[outcome] = atomic_valuation_dict
+            if len(found) == len(outcomes):
+                break
+    return found, count
+
+
+def _coordinates_shard(index, prefix):
+    """The coordinates of the valuation matrix (see ``MappedManyValuedSemantics.valuation_matrix``) of the
+    valuations of a shard"""
+    semantics, inference, _, _ = _job
+    coordinates = set()
+    count = 0
+    for atomic_valuation_dict in _shard_valuations(prefix):
+        count += 1
+        coordinates.add(tuple(semantics.mapped_standard_to_inferences(inference, atomic_valuation_dict,
+                                                                       coordinate=True)))
+    return coordinates, count
+
+
+def _shards(semantics, formula_or_inference, processes, function, *args):
+    """Runs `function` on every shard. Yields ``(index, result, stop)`` as they finish, where `stop` is the shared flag
+    (shards after ``stop.value`` give up, and the pending ones are cancelled when the caller stops iterating)"""
+    atomics = list(formula_or_inference.atomics_inside(semantics.language))
+    prefixes = list(product(semantics.truth_values,
+                            repeat=shard_atomic_count(len(atomics), len(semantics.truth_values), processes)))
+    context = multiprocessing.get_context()
+    stop = context.Value('i', len(prefixes), lock=False)
+    with ProcessPoolExecutor(processes, mp_context=context, initializer=_start_worker,
+                             initargs=(semantics, formula_or_inference, atomics, stop)) as pool:
+        futures = {pool.submit(function, index, prefix, *args): index for index, prefix in enumerate(prefixes)}
+        try:
+            for future in as_completed(futures):
+                if not future.cancelled():
+                    yield futures[future], future.result(), stop
+        finally:
+            stop.value = -1
+            for future in futures:
+                future.cancel()
+
+
+def search(semantics, formula_or_inference, outcomes, processes, first=False):
+    """Looks for valuations that give each of the `outcomes` (True for valuations that satisfy the formula /
+    inference, False for those that do not), stopping when one of each has been found.
+
+    Returns a dict ``{outcome: atomic valuation dict}`` with those found. If `first` is True, the valuation returned
+    for each outcome is the first one in ``itertools.product`` order (what the serial evaluation would find); for that,
+    the shards before the one with the valuation are still gone through, but the ones after it are cancelled.
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import classical_mvl_semantics as CL
+    >>> from logics.classes.propositional.semantics.parallel import search
+    >>> search(CL, classical_parser.parse('p, p then q / q'), (False,), processes=2)
+    {}
+    >>> sorted(search(CL, classical_parser.parse('q, p then q / p'), (False,), processes=2, first=True)[False].items())
+    [('p', '0'), ('q', '1')]
+    """
+    found = {}  # outcome: (shard index, atomic valuation dict)
+    for index, (shard_found, count), stop in _shards(semantics, formula_or_inference, processes, _search_shard,
+                                                     tuple(outcomes)):
+        counters.increment('valuations', count)
+        for outcome, atomic_valuation_dict in shard_found.items():
+            if outcome not in found or index < found[outcome][0]:
+                found[outcome] = (index, atomic_valuation_dict)
+        if len(found) == len(outcomes):
+            if not first:
+                break
+            # Only the shards before the last one needed can still change the result
+            stop.value = max(shard_index for shard_index, _ in found.values())
+    return {outcome: atomic_valuation_dict for outcome, (_, atomic_valuation_dict) in found.items()}
+
+
+def valuation_coordinates(semantics, inference, processes):
+    """The set of coordinates ``(premise mapping, conclusion mapping)`` taken by the valuations of a mapped
+    semantics (see ``MappedManyValuedSemantics.valuation_matrix``)"""
+    coordinates = set()
+    for _, (shard_coordinates, count), _ in _shards(semantics, inference, processes, _coordinates_shard):
+        counters.increment('valuations', count)
+        coordinates |= shard_coordinates
+    return coordinates
@@ -0,0 +1,183 @@
+"""SAT-based evaluation of many-valued semantics.
+
+Instead of enumerating the ``len(truth_values) ** len(atomics)`` valuations, the search for a counterexample to a
+compiled formula / inference (see ``logics.classes.propositional.semantics.compiled``) is written as a set of clauses
+and handed to a SAT solver (``logics.utils.solvers.sat.SATSolver``):
+
+* every node of the program (every distinct subformula) gets one propositional variable per truth value, with clauses
+  saying that exactly one of them is true (a *one-hot* encoding; for classical logic this is just a variable and its
+  negation)
+* every row of the truth table of a connective becomes a clause: if the arguments take the values of the row, the
+  node takes the value of the row
+* satisfaction (with the premise and conclusion standards, recursively for metainferences, or with the mapping
+  constraints of mapped semantics) gets a variable defined by Tseitin clauses
+
+A formula / inference is then locally valid iff the clauses are unsatisfiable when its satisfaction variable is false,
+and a model found otherwise gives a counterexample.
+
+On random inferences and metainferences, in every many-valued and mapped logic of ``logics.instances``, the answers are
+the same as those of the enumeration of valuations (``backend='naive'``), and every counterexample found is one:
+
+>>> import random
+>>> from copy import copy
+>>> from logics.instances.propositional import many_valued_semantics, mapped_logic_semantics
+>>> from logics.classes.propositional.semantics import MixedManyValuedSemantics
+>>> from logics.classes.propositional.semantics.mapped_logic import MappedManyValuedSemantics
+>>> from logics.utils.formula_generators.generators_biased import random_formula_generator
+>>> random.seed(0)
+>>> disagreements = []
+>>> for logic in [value for module in (many_valued_semantics, mapped_logic_semantics)
+...               for value in vars(module).values() if isinstance(value, MixedManyValuedSemantics)]:
+...     sat_logic = copy(logic)
+...     sat_logic.backend = 'sat'
+...     levels = [1] if isinstance(logic, MappedManyValuedSemantics) else [1, 2]
+...     for _ in range(20):
+...         inference = random_formula_generator.random_inference(num_premises=2, num_conclusions=1, max_depth=2,
+...                                                               atomics=['p', 'q', 'r'], language=logic.language,
+...                                                               level=random.choice(levels),
+...                                                               exact_num_premises=False,
+...                                                               exact_num_conclusions=False)
+...         valid = logic.is_locally_valid(inference)
+...         counterexample = sat_logic.counterexample(inference)
+...         agrees = sat_logic.is_locally_valid(inference) == valid and (counterexample is None) == valid
+...         if not agrees or (counterexample is not None and logic.satisfies(inference, counterexample)):
+...             disagreements.append((logic.name, inference))
+>>> disagreements
+[]
+"""
+
+from logics.classes.propositional.semantics.compiled import CompiledInference
+from logics.utils.solvers.sat import SATSolver
+
+
+class SATEncodedInference(CompiledInference):
+    """A formula or (meta)inference encoded for a SAT solver. Same interface as ``CompiledInference`` (the truth table,
+    if asked for, is still computed by enumeration)
+
+    Unlike the enumerating evaluators, ``counterexample`` returns whichever counterexample the solver finds, not
+    necessarily the first one in the order of the valuations.
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.many_valued_semantics import ST_mvl_semantics as ST
+    >>> from logics.classes.propositional.semantics.sat_encoding import SATEncodedInference
+    >>> encoded = SATEncodedInference(ST, classical_parser.parse('(A / B), (B / C) // (A / C)'))
+    >>> encoded.is_locally_valid()
+    False
+    >>> counterexample = encoded.counterexample()
+    >>> ST.satisfies(classical_parser.parse('(A / B), (B / C) // (A / C)'), counterexample)
+    False
+    >>> SATEncodedInference(ST, classical_parser.parse('p, p then q / q')).is_locally_valid()
+    True
+    """
+    def __init__(self, semantics, formula_or_inference):
+        super().__init__(semantics, formula_or_inference)
+        self.solver = SATSolver()
+        self._true = self.solver.new_variable()
+        self.solver.add_clause([self._true])
+        self._node_variables = []
+        self._satisfaction = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Encoding
+
+    def _or(self, literals):
+        """A literal equivalent to the disjunction of `literals`"""
+        if not literals:
+            return -self._true
+        if len(literals) == 1:
+            return literals[0]
+        variable = self.solver.new_variable()
+        self.solver.add_clause([-variable] + list(literals))
+        for literal in literals:
+            self.solver.add_clause([variable, -literal])
+        return variable
+
+    def _and(self, literals):
+        """A literal equivalent to the conjunction of `literals`"""
+        return -self._or([-literal for literal in literals])
+
+    def _encode_nodes(self):
+        for kind, data, arguments in self._nodes[len(self._node_variables):]:
+            variables = [self.solver.new_variable() for _ in range(self.value_count)]
+            self._node_variables.append(variables)
+            # Exactly one value
+            self.solver.add_clause(variables)
+            for index, variable in enumerate(variables):
+                for other in variables[index + 1:]:
+                    self.solver.add_clause([-variable, -other])
+
+            if kind == 'constant':
+                self.solver.add_clause([variables[data]])
+            elif kind == 'molecular':
+                for row, value in enumerate(data):
+                    clause = [variables[value]]
+                    for argument in reversed(arguments):
+                        row, code = divmod(row, self.value_count)
+                        clause.append(-self._node_variables[argument][code])
+                    self.solver.add_clause(clause)
+
+    def _takes_values(self, node, mask):
+        """A literal that says that the node takes one of the values in `mask` (a boolean array over the codes)"""
+        return self._or([variable for variable, designated in zip(self._node_variables[node], mask) if designated])
+
+    def _encode_satisfaction(self, program):
+        if program[0] == 'formula':
+            _, node, mask = program
+            return self._takes_values(node, mask)
+
+        if program[0] == 'mapped':
+            _, premises, conclusions, allowed = program
+            # For every set of values (as a bitmask), a literal saying that the formulae take exactly those values
+            exact_sets = []
+            for formulae in (premises, conclusions):
+                present = [self._or([self._node_variables[node][value] for node in formulae])
+                           for value in range(self.value_count)]
+                exact_sets.append([self._and([present[value] if bitmask >> value & 1 else -present[value]
+                                              for value in range(self.value_count)])
+                                   for bitmask in range(1 << self.value_count)])
+            return self._or([self._and([exact_sets[0][premise_bitmask],
+                                        self._or([exact_sets[1][conclusion_bitmask]
+                                                  for conclusion_bitmask in range(1 << self.value_count)
+                                                  if allowed[premise_bitmask, conclusion_bitmask]])])
+                             for premise_bitmask in range(1 << self.value_count)])
+
+        _, premises, conclusions = program
+        return self._or([-self._encode_satisfaction(premise) for premise in premises] +
+                        [self._encode_satisfaction(conclusion) for conclusion in conclusions])
+
+    @property
+    def satisfaction(self):
+        """Literal that is true exactly in the valuations that satisfy the formula / inference"""
+        if self._satisfaction is None:
+            program = self.program
+            self._encode_nodes()
+            self._satisfaction = self._encode_satisfaction(program)
+        return self._satisfaction
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Solving
+
+    def _model_valuation(self):
+        model = self.solver.model
+        valuation = {}
+        for atomic in self.atomics:
+            variables = self._node_variables[self._node_ids[('atomic', atomic)]]
+            code = next(index for index, variable in enumerate(variables) if model[variable])
+            valuation[atomic] = self.semantics.truth_values[code]
+        return valuation
+
+    def is_locally_valid(self):
+        return not self.solver.solve([-self.satisfaction])
+
+    def is_locally_antivalid(self):
+        return not self.solver.solve([self.satisfaction])
+
+    def is_contingent(self):
+        return self.solver.solve([self.satisfaction]) and self.solver.solve([-self.satisfaction])
+
+    def counterexample(self):
+        if not self.solver.solve([-self.satisfaction]):
+            return None
+        return self._model_valuation()
@@ -146,7 +146,7 @@ WK_mvl_semantics = MixedManyValuedSemantics(language=classical_language,
                                             conclusion_designated_values=WK_designated_values,
                                             truth_function_dict=WK_truth_functions,
                                             sentential_constant_values_dict=classical_sentential_constants_values,
-                                            use_molecular_valuation_fast_version=False,
+                                            use_molecular_valuation_fast_version=True,
                                             name='WK')
 PWK_mvl_semantics = MixedManyValuedSemantics(language=classical_language,
                                              truth_values=WK_truth_values,
@@ -154,7 +154,7 @@ PWK_mvl_semantics = MixedManyValuedSemantics(language=classical_language,
                                              conclusion_designated_values=PWK_designated_values,
                                              truth_function_dict=WK_truth_functions,
                                              sentential_constant_values_dict=classical_sentential_constants_values,
-                                             use_molecular_valuation_fast_version=False,
+                                             use_molecular_valuation_fast_version=True,
                                              name='WK')
 
 
@@ -176,7 +176,7 @@ RM3_mvl_semantics = MixedManyValuedSemantics(language=classical_language,
                                              conclusion_designated_values=tolerant_designated_values,
                                              truth_function_dict=RM3_truth_functions,
                                              sentential_constant_values_dict=classical_sentential_constants_values,
-                                             use_molecular_valuation_fast_version=False,
+                                             use_molecular_valuation_fast_version=True,
                                              name='RM3')
 
 
@@ -194,7 +194,7 @@ LFI1_mvl_semantics = MixedManyValuedSemantics(language=LFI_language,
                                               conclusion_designated_values=tolerant_designated_values,
                                               truth_function_dict=LFI1_truth_functions,
                                               sentential_constant_values_dict=classical_sentential_constants_values,
-                                              use_molecular_valuation_fast_version=False,
+                                              use_molecular_valuation_fast_version=True,
                                               name='LFI1')
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -235,7 +235,7 @@ FDE_mvl_semantics = MixedManyValuedSemantics(language=classical_language,
                                              conclusion_designated_values=FDE_designated_values,
                                              truth_function_dict=FDE_truth_functions,
                                              sentential_constant_values_dict=classical_sentential_constants_values,
-                                             use_molecular_valuation_fast_version=False,
+                                             use_molecular_valuation_fast_version=True,
                                              name='FDE')
 
 
@@ -0,0 +1,38 @@
+"""Optional counters of the work done by the semantics and solvers.
+
+Counting is off by default. To turn it on, set ``active`` to a dict (or a ``collections.Counter``); every instrumented
+loop will then add to the corresponding key. The keys currently recorded are:
+
+* ``valuations``: atomic valuations evaluated by the local validity / truth table methods of the semantics
+* ``nd_solve_calls``: calls to ``NaturalDeductionSolver._solve_derivation`` (the first one plus every heuristic
+  recursion)
+* ``nd_heuristic_applications``: heuristics applied by the natural deduction solver
+* ``nd_premise_tree_lookups``: lookups of a step in the discrimination tree of the first premises of the simplification
+  rules (see ``logics.utils.solvers.discrimination_tree``)
+* ``nd_premise_tree_candidates``: rules those lookups returned, i.e. whose first premise the step is an instance of
+  (only these are tried further)
+* ``tableaux_nodes_expanded``: tableaux nodes the solver tried to apply the rules to
+* ``tableaux_rule_applications``: rule applications in the tableaux solver
+* ``sat_conflicts``, ``sat_decisions``: conflicts and decisions of the SAT solver (``logics.utils.solvers.sat``)
+
+Examples
+--------
+>>> from collections import Counter
+>>> from logics.utils import counters
+>>> from logics.utils.parsers import classical_parser
+>>> from logics.instances.propositional.many_valued_semantics import classical_mvl_semantics as CL
+>>> counters.active = Counter()
+>>> CL.is_valid(classical_parser.parse('p, p then q / q'))
+True
+>>> counters.active['valuations']
+4
+>>> counters.active = None
+"""
+
+active = None
+
+
+def increment(name, amount=1):
+    """Adds `amount` to the counter `name`, if counting is on. Callers in hot loops check ``active`` themselves first"""
+    if active is not None:
+        active[name] = active.get(name, 0) + amount
@@ -1,7 +1,7 @@
 import random
 from copy import copy
 
-from logics.classes.propositional import Formula, Inference
+from logics.classes.propositional import Formula, Inference, FormulaCorpus
 from logics.classes.predicate import PredicateFormula
 from logics.classes.exceptions import FormulaGeneratorError
 
@@ -187,6 +187,48 @@ class BiasedPropositionalGenerator:
         formula = Formula(eval(formula_string))
         return formula
 
+    def random_corpus(self, count, depth, atomics, language, exact_depth=True, all_atomics=False, table=None):
+        """Generates a number of random formulae, encoded together in a FormulaCorpus.
+
+        Useful for bulk workloads (e.g. generating and evaluating many thousands of formulae), since the corpus keeps
+        every formula in a few integer arrays instead of one nested list per formula.
+
+        Parameters
+        ----------
+        count: int
+            The number of formulae to generate
+        depth: int
+            A positive integer, representing the depth of the formulae to obtain
+        atomics: list of str
+            The sublist of atomics of the language that the formulae will be built of
+        language: logics.classes.propositional.Language or logics.classes.propositional.InfiniteLanguage
+            Instance of Language or InfiniteLanguage
+        exact_depth: bool
+            Same as in ``random_formula``. Defaults to True.
+        all_atomics: bool
+            Same as in ``random_formula``. Defaults to False.
+        table: logics.classes.propositional.compact_formula.SymbolTable, optional
+            The symbol table to encode the formulae with. If not given, a new one is made.
+
+        Returns
+        -------
+        logics.classes.propositional.FormulaCorpus
+            The randomly generated formulae, in the order they were generated
+
+        Examples
+        --------
+        >>> from logics.instances.propositional.languages import classical_language
+        >>> from logics.utils.formula_generators.generators_biased import random_formula_generator
+        >>> corpus = random_formula_generator.random_corpus(1000, depth=3, atomics=['p', 'q', 'r'],
+        ...                                                 language=classical_language)
+        >>> len(corpus), set(corpus.depths().tolist())
+        (1000, {3})
+        >>> corpus[0].to_formula().depth
+        3
+        """
+        return FormulaCorpus((self.random_formula(depth, atomics, language, exact_depth, all_atomics)
+                              for _ in range(count)), table)
+
     # ------------------------------------------------------------------------------------------------------------------
     # INFERENCE
 
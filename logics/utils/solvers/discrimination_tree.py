@@ -0,0 +1,130 @@
+"""Matching a formula against many schematic formulae (e.g. the premises of a set of rules) at once.
+
+Checking with ``Formula.is_instance_of`` which rules can be applied to a formula means walking the formula once per
+rule, even though most rules fail at the main symbol. A ``DiscriminationTree`` puts every schema in a tree indexed by
+its symbols (in prefix order), with a wildcard edge wherever the schema has a metavariable. A single walk of the formula
+down the tree then finds every schema of which it is an instance, together with its substitution dict.
+"""
+
+from logics.classes.propositional import Formula
+
+
+class _TreeNode:
+    __slots__ = ('children', 'wildcard', 'schemas')
+
+    def __init__(self):
+        self.children = {}  # (symbol, number of arguments) -> _TreeNode
+        self.wildcard = None  # _TreeNode reached by a metavariable
+        self.schemas = []  # [(position, name, metavariables)] of the schemas that end here
+
+
+class DiscriminationTree:
+    """Index of schematic formulae, to find all the ones a formula is an instance of in a single walk of the formula
+
+    Parameters
+    ----------
+    schemas: dict of {str: logics.classes.propositional.Formula}
+        The schematic formulae, by name (e.g. the first premise of each of the rules of a system)
+    language: logics.classes.propositional.Language or logics.classes.propositional.InfiniteLanguage
+        Instance of Language or InfiniteLanguage, that says what is a metavariable
+
+    Examples
+    --------
+    >>> from logics.utils.parsers import classical_parser
+    >>> from logics.instances.propositional.languages import classical_infinite_language as language
+    >>> from logics.utils.solvers.discrimination_tree import DiscriminationTree
+    >>> tree = DiscriminationTree({'E∧1': classical_parser.parse('A ∧ B'), 'DN': classical_parser.parse('~~A'),
+    ...                            'ID': classical_parser.parse('A ∧ A'), 'ANY': classical_parser.parse('A')}, language)
+    >>> [name for name, subst_dict in tree.match(classical_parser.parse('~~p ∧ ~~p'))]
+    ['E∧1', 'ID', 'ANY']
+    >>> tree.match(classical_parser.parse('~~p ∧ q'))
+    [('E∧1', {'A': ['~', ['~', ['p']]], 'B': ['q']}), ('ANY', {'A': ['∧', ['~', ['~', ['p']]], ['q']]})]
+    >>> [name for name, subst_dict in tree.match(classical_parser.parse('~~(p ∧ q)'))]
+    ['DN', 'ANY']
+
+    Notes
+    -----
+    The results are the same (and in the same order as the schemas) as asking ``formula.is_instance_of(schema,
+    language, return_subst_dict=True)`` for every schema. Schemas and formulae that are not (propositional) ``Formula``
+    instances, e.g. predicate formulae, are not indexed, and are checked that way.
+    """
+    def __init__(self, schemas, language):
+        self.language = language
+        self.root = _TreeNode()
+        self.unindexed = []  # [(position, name, schema)]
+        self.schemas = []  # [(position, name, schema)], all of them
+        for position, (name, schema) in enumerate(schemas.items()):
+            self.schemas.append((position, name, schema))
+            if type(schema) is not Formula:
+                self.unindexed.append((position, name, schema))
+                continue
+            node = self.root
+            metavariables = []
+            for subformula in self._prefix_order(schema):
+                if subformula.is_atomic and language.is_metavariable_string(subformula[0]):
+                    metavariables.append(subformula[0])
+                    if node.wildcard is None:
+                        node.wildcard = _TreeNode()
+                    node = node.wildcard
+                else:
+                    node = node.children.setdefault((subformula[0], len(subformula) - 1), _TreeNode())
+            node.schemas.append((position, name, tuple(metavariables)))
+
+    @staticmethod
+    def _prefix_order(formula):
+        """The subformulae of `formula` (all of them, repetitions included) in prefix order"""
+        subformulae = []
+        stack = [formula]
+        while stack:
+            subformula = stack.pop()
+            subformulae.append(subformula)
+            stack.extend(reversed(subformula[1:]))
+        return subformulae
+
+    def match(self, formula):
+        """Returns a list of ``(name, substitution dict)``, one for every schema of which `formula` is an instance, in
+        the order of the schemas"""
+        if type(formula) is not Formula:
+            return [(name, subst_dict) for _, name, subst_dict in self._match_unindexed(formula, self.schemas)]
+
+        subformulae = self._prefix_order(formula)
+        # ends[i] is the position (in prefix order) right after the last subformula of subformulae[i]
+        ends = [0] * len(subformulae)
+        for index in range(len(subformulae) - 1, -1, -1):
+            end = index + 1
+            for _ in range(len(subformulae[index]) - 1):
+                end = ends[end]
+            ends[index] = end
+
+        matches = self._match_unindexed(formula, self.unindexed)
+        stack = [(self.root, 0, ())]
+        while stack:
+            node, index, bound = stack.pop()
+            if index == len(subformulae):
+                for position, name, metavariables in node.schemas:
+                    subst_dict = {}
+                    for metavariable, subformula in zip(metavariables, bound):
+                        if metavariable not in subst_dict:
+                            subst_dict[metavariable] = subformula
+                        elif subst_dict[metavariable] != subformula:
+                            break
+                    else:
+                        matches.append((position, name, subst_dict))
+                continue
+            subformula = subformulae[index]
+            if node.wildcard is not None:
+                stack.append((node.wildcard, ends[index], bound + (subformula,)))
+            child = node.children.get((subformula[0], len(subformula) - 1))
+            if child is not None:
+                stack.append((child, index + 1, bound))
+
+        matches.sort(key=lambda match: match[0])
+        return [(name, subst_dict) for _, name, subst_dict in matches]
+
+    def _match_unindexed(self, formula, schemas):
+        matches = []
+        for position, name, schema in schemas:
+            instance, subst_dict = formula.is_instance_of(schema, self.language, return_subst_dict=True)
+            if instance:
+                matches.append((position, name, subst_dict))
+        return matches
@@ -5,6 +5,8 @@ from logics.classes.propositional.proof_theories import Derivation, NaturalDeduc
 from logics.instances.propositional.languages import classical_infinite_language_with_sent_constants_nobiconditional \
     as cl_language
 from logics.classes.exceptions import SolverError
+from logics.utils import counters
+from logics.utils.solvers.discrimination_tree import DiscriminationTree
 
 
 class NaturalDeductionSolver:
@@ -134,6 +136,9 @@ class NaturalDeductionSolver:
         - If it still did not find the goal, analizes the goal and sets a new goal using heuristics, may add things as
           suppositions in the process
         """
+        if counters.active is not None:
+            counters.increment('nd_solve_calls')
+
         # The goal is already present in the derivation (and not in a closed supposition), return it
         current_open_sups = self._get_current_open_sups(derivation)
         for step_idx in range(len(derivation)):
@@ -156,6 +161,8 @@ class NaturalDeductionSolver:
         # If it did not find the goal, apply heuristics (they might call this method recursively)
         for heuristic in self.heuristics:
             if heuristic.is_applicable(goal):
+                if counters.active is not None:
+                    counters.increment('nd_heuristic_applications')
                 try:
                     return heuristic.apply_heuristic(derivation, goal, self, tried_existentials)
                 except SolverError:
@@ -185,6 +192,7 @@ class NaturalDeductionSolver:
         # will be needed below to not repeat adding:
         formulas_list = [step.content for step in derivation if
                          not self._is_in_closed_supposition(step.open_suppositions, open_sups)]
+        first_premise_tree = self._first_premise_tree()
 
         while prev_len_derivation != len(derivation):  # When they are equal we have not added any new steps
             prev_len_derivation = len(derivation)
@@ -195,68 +203,75 @@ class NaturalDeductionSolver:
                 if self._is_in_closed_supposition(step.open_suppositions, open_sups):
                     continue
 
-                for rule_name in self.simplification_rules:
+                # The rules whose first premise the current formula is an instance of (in the order of the rules)
+                candidate_rules = first_premise_tree.match(step.content)
+                if counters.active is not None:
+                    counters.increment('nd_premise_tree_lookups')
+                    counters.increment('nd_premise_tree_candidates', len(candidate_rules))
+                for rule_name, subst_dict in candidate_rules:
                     # Check that the rule has not been applied to this step before
                     if step_idx in applied_rules[rule_name]:
                         continue
 
-                    # See if the current formula being examined is an instance of the first premise of the rule
                     rule = self.simplification_rules[rule_name]
-                    first_premise_is_instance, subst_dict = step.content.is_instance_of(rule.premises[0],
-                                                                                        self.language,
-                                                                                        return_subst_dict=True)
-                    if first_premise_is_instance:
-                        rule_steps = [step_idx]
-
-                        # Check if the rest of the premises are present
-                        rest_of_premises_present = True
-                        for premise in rule.premises[1:]:
-                            premise_present = False
-
-                            # Go over each formula in the derivation again
-                            for step_idx2, step2 in enumerate(derivation):
-                                # Again, check that this step is not in a closed supposition
-                                if self._is_in_closed_supposition(step2.open_suppositions, open_sups):
-                                    continue
-
-                                premise_is_instance, subst_dict = step2.content.is_instance_of(premise,
-                                                                                            self.language,
-                                                                                            subst_dict=subst_dict,
-                                                                                            return_subst_dict=True)
-                                if premise_is_instance:
-                                    premise_present = True
-                                    rule_steps.append(step_idx2)
-                                    break  # Do not keep looking for this rule premise once we found it
-
-                            if not premise_present:
-                                rest_of_premises_present = False
-                                break
-
-                        # If the rest of the premises are present, we can apply the rule
-                        if rest_of_premises_present:
-                            # Get what the instance/s of the conclusion would look like
-                            # Is a list bc the predicate solver sometimes adds multiple formulae at once (e.g. E∀)
-                            formulae_to_add = self._get_formulae_to_add(rule.conclusions[0], subst_dict)
-                            for formula_to_add in formulae_to_add:
-                                # Check if the conclusion is not already in the derivation (avoids freezing), add it
-                                if formula_to_add not in formulas_list:
-                                    formulas_list.append(formula_to_add)
-                                    derivation.append(NaturalDeductionStep(content=formula_to_add,
-                                                                           justification=rule_name,
-                                                                           on_steps=rule_steps,
-                                                                           open_suppositions=copy(open_sups)))
-                                    if goal == formula_to_add:
-                                        return derivation
-                                    if self.exit_on_falsum and formula_to_add == Formula(['⊥']):
-                                        return derivation
-
-                                    # Register that we applied this rule to this step, so that we don't repeat
-                                    if step_idx not in applied_rules[rule_name]:
-                                        applied_rules[rule_name].append(step_idx)
+                    rule_steps = [step_idx]
+
+                    # Check if the rest of the premises are present
+                    rest_of_premises_present = True
+                    for premise in rule.premises[1:]:
+                        premise_present = False
+
+                        # Go over each formula in the derivation again
+                        for step_idx2, step2 in enumerate(derivation):
+                            # Again, check that this step is not in a closed supposition
+                            if self._is_in_closed_supposition(step2.open_suppositions, open_sups):
+                                continue
+
+                            premise_is_instance, subst_dict = step2.content.is_instance_of(premise,
+                                                                                           self.language,
+                                                                                           subst_dict=subst_dict,
+                                                                                           return_subst_dict=True)
+                            if premise_is_instance:
+                                premise_present = True
+                                rule_steps.append(step_idx2)
+                                break  # Do not keep looking for this rule premise once we found it
+
+                        if not premise_present:
+                            rest_of_premises_present = False
+                            break
+
+                    # If the rest of the premises are present, we can apply the rule
+                    if rest_of_premises_present:
+                        # Get what the instance/s of the conclusion would look like
+                        # Is a list bc the predicate solver sometimes adds multiple formulae at once (e.g. E∀)
+                        formulae_to_add = self._get_formulae_to_add(rule.conclusions[0], subst_dict)
+                        for formula_to_add in formulae_to_add:
+                            # Check if the conclusion is not already in the derivation (avoids freezing), add it
+                            if formula_to_add not in formulas_list:
+                                formulas_list.append(formula_to_add)
+                                derivation.append(NaturalDeductionStep(content=formula_to_add,
+                                                                       justification=rule_name,
+                                                                       on_steps=rule_steps,
+                                                                       open_suppositions=copy(open_sups)))
+                                if goal == formula_to_add or \
+                                        (self.exit_on_falsum and formula_to_add == Formula(['⊥'])):
+                                    return derivation
+
+                                # Register that we applied this rule to this step, so that we don't repeat
+                                if step_idx not in applied_rules[rule_name]:
+                                    applied_rules[rule_name].append(step_idx)
 
         # When it reaches here, it has exited the loop (not made any modifications during an iteration)
         return derivation
 
+    def _first_premise_tree(self):
+        """DiscriminationTree of the first premises of the simplification rules, built again only if they change"""
+        key = [(rule_name, rule.premises[0]) for rule_name, rule in self.simplification_rules.items()]
+        if getattr(self, '_first_premise_tree_key', None) != key:
+            self._first_premise_tree_key = deepcopy(key)
+            self._first_premise_tree_cache = DiscriminationTree(dict(key), self.language)
+        return self._first_premise_tree_cache
+
     def _get_formulae_to_add(self, rule_conclusion, subst_dict):
         # Overriden in the predicate solver
         return [rule_conclusion.instantiate(self.language, subst_dict)]
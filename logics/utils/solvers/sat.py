@@ -0,0 +1,314 @@
+from heapq import heappush, heappop
+
+from logics.utils import counters
+
+
+class SATSolver:
+    """A CDCL (conflict-driven clause learning) SAT solver for formulae in conjunctive normal form.
+
+    Variables are positive integers, given by ``new_variable``; a literal is a variable (positive literal) or its
+    negative (negative literal); a clause is a list of literals. The solver implements the usual techniques: unit
+    propagation with two watched literals, learning of first-UIP conflict clauses (minimized), non-chronological
+    backjumping, the VSIDS decision heuristic, phase saving and restarts following the Luby sequence.
+
+    Clauses may be added between calls to ``solve``, and learnt clauses are kept from one call to the next.
+
+    Attributes
+    ----------
+    model: list of bool or None
+        After a successful call to ``solve``, ``model[v]`` is the value of variable `v` (``model[0]`` is unused)
+    conflicts: int
+        Total number of conflicts found so far
+    decisions: int
+        Total number of decisions made so far
+
+    Examples
+    --------
+    >>> from logics.utils.solvers.sat import SATSolver
+    >>> solver = SATSolver()
+    >>> p, q = solver.new_variable(), solver.new_variable()
+    >>> solver.add_clause([p, q])
+    >>> solver.add_clause([-p, q])
+    >>> solver.solve()
+    True
+    >>> solver.model[q]
+    True
+    >>> solver.solve(assumptions=[-q])
+    False
+    >>> solver.add_clause([-q])
+    >>> solver.solve()
+    False
+    """
+    restart_base = 100  #: Conflicts before the first restart (multiplied by the Luby sequence for the next ones)
+    activity_decay = 0.95
+
+    def __init__(self):
+        self.variable_count = 0
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self._clauses = []
+        self._units = []
+        self._unsatisfiable = False
+        self._watches = [[], []]  # Indexed by literal code (see _code), the clauses watching that literal
+        self._values = [0]  # Per variable: 1 true, -1 false, 0 unassigned
+        self._levels = [0]
+        self._reasons = [None]
+        self._activity = [0.0]
+        self._phases = [False]
+        self._seen = [False]
+        self._activity_increment = 1.0
+        self._trail = []
+        self._trail_limits = []
+        self._queue_head = 0
+        self._heap = []
+
+    @staticmethod
+    def _code(literal):
+        return 2 * literal if literal > 0 else -2 * literal + 1
+
+    def _value(self, literal):
+        value = self._values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def new_variable(self):
+        """Returns a new variable"""
+        self.variable_count += 1
+        self._watches.extend(([], []))
+        self._values.append(0)
+        self._levels.append(0)
+        self._reasons.append(None)
+        self._activity.append(0.0)
+        self._phases.append(False)
+        self._seen.append(False)
+        return self.variable_count
+
+    def add_clause(self, literals):
+        """Adds a clause (a list of literals, read as their disjunction)"""
+        clause = []
+        for literal in literals:
+            if -literal in clause:
+                return  # Tautology
+            if literal not in clause:
+                clause.append(literal)
+        if not clause:
+            self._unsatisfiable = True
+        elif len(clause) == 1:
+            self._units.append(clause[0])
+        else:
+            self._attach(clause)
+
+    def _attach(self, clause):
+        self._clauses.append(clause)
+        self._watches[self._code(clause[0])].append(clause)
+        self._watches[self._code(clause[1])].append(clause)
+
+    def _assign(self, literal, reason):
+        variable = abs(literal)
+        self._values[variable] = 1 if literal > 0 else -1
+        self._levels[variable] = len(self._trail_limits)
+        self._reasons[variable] = reason
+        self._trail.append(literal)
+
+    def _propagate(self):
+        """Unit propagation. Returns a conflicting clause, or None"""
+        while self._queue_head < len(self._trail):
+            false_literal = -self._trail[self._queue_head]
+            self._queue_head += 1
+            watching = self._watches[self._code(false_literal)]
+            kept = []
+            for index, clause in enumerate(watching):
+                # Keep the false literal in position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self._value(clause[0]) == 1:
+                    kept.append(clause)
+                    continue
+                for position in range(2, len(clause)):
+                    if self._value(clause[position]) != -1:
+                        clause[1], clause[position] = clause[position], clause[1]
+                        self._watches[self._code(clause[1])].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self._value(clause[0]) == -1:
+                        kept.extend(watching[index + 1:])
+                        self._watches[self._code(false_literal)] = kept
+                        return clause
+                    self._assign(clause[0], clause)
+            self._watches[self._code(false_literal)] = kept
+        return None
+
+    def _bump(self, variable):
+        self._activity[variable] += self._activity_increment
+        if self._activity[variable] > 1e100:
+            self._activity = [activity * 1e-100 for activity in self._activity]
+            self._activity_increment *= 1e-100
+            self._heap = [(-self._activity[v], v) for v in range(1, self.variable_count + 1) if not self._values[v]]
+            self._heap.sort()
+        if not self._values[variable]:
+            heappush(self._heap, (-self._activity[variable], variable))
+
+    def _analyze(self, conflict):
+        """First-UIP conflict analysis. Returns the learnt clause (asserting literal first) and the backjump level"""
+        level = len(self._trail_limits)
+        learnt = [None]
+        pending = 0  # Literals of the current level still to be resolved
+        literal = None
+        index = len(self._trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or self._seen[variable] or self._levels[variable] == 0:
+                    continue
+                self._seen[variable] = True
+                self._bump(variable)
+                if self._levels[variable] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+            while not self._seen[abs(self._trail[index])]:
+                index -= 1
+            literal = self._trail[index]
+            index -= 1
+            self._seen[abs(literal)] = False
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self._reasons[abs(literal)]
+        learnt[0] = -literal
+
+        # Minimization: drop the literals implied by other literals of the clause
+        minimized = [learnt[0]]
+        for other in learnt[1:]:
+            reason = self._reasons[abs(other)]
+            if reason is None or any(not self._seen[abs(r)] and self._levels[abs(r)] > 0 for r in reason if r != -other):
+                minimized.append(other)
+        for other in learnt[1:]:
+            self._seen[abs(other)] = False
+
+        if len(minimized) == 1:
+            return minimized, 0
+        # The literal of the highest level goes second, it is watched together with the asserting one
+        highest = max(range(1, len(minimized)), key=lambda i: self._levels[abs(minimized[i])])
+        minimized[1], minimized[highest] = minimized[highest], minimized[1]
+        return minimized, self._levels[abs(minimized[1])]
+
+    def _backtrack(self, level):
+        if len(self._trail_limits) <= level:
+            return
+        limit = self._trail_limits[level]
+        for literal in self._trail[limit:]:
+            variable = abs(literal)
+            self._phases[variable] = literal > 0
+            self._values[variable] = 0
+            self._reasons[variable] = None
+            heappush(self._heap, (-self._activity[variable], variable))
+        del self._trail[limit:]
+        del self._trail_limits[level:]
+        self._queue_head = limit
+
+    def _decide(self):
+        while self._heap:
+            _, variable = heappop(self._heap)
+            if not self._values[variable]:
+                return variable if self._phases[variable] else -variable
+        return None
+
+    def _reset(self):
+        for literal in self._trail:
+            self._values[abs(literal)] = 0
+            self._reasons[abs(literal)] = None
+        self._trail = []
+        self._trail_limits = []
+        self._queue_head = 0
+        self._heap = [(-self._activity[v], v) for v in range(1, self.variable_count + 1)]
+        self._heap.sort()
+
+    def solve(self, assumptions=()):
+        """Determines whether the clauses (together with the `assumptions`, a list of literals) are satisfiable
+
+        Returns
+        -------
+        bool
+            True if they are satisfiable (then `model` holds a satisfying assignment), False otherwise
+        """
+        conflicts, decisions = self.conflicts, self.decisions
+        try:
+            return self._solve(list(assumptions))
+        finally:
+            if counters.active is not None:
+                counters.increment('sat_conflicts', self.conflicts - conflicts)
+                counters.increment('sat_decisions', self.decisions - decisions)
+
+    def _solve(self, assumptions):
+        self.model = None
+        if self._unsatisfiable:
+            return False
+        self._reset()
+        for unit in self._units:
+            if self._value(unit) == -1:
+                self._unsatisfiable = True
+                return False
+            if not self._value(unit):
+                self._assign(unit, None)
+
+        restarts = 0
+        conflicts_left = self.restart_base * _luby(restarts)
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self._trail_limits:
+                    self._unsatisfiable = True
+                    return False
+                learnt, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learnt) == 1:
+                    self._units.append(learnt[0])
+                    self._assign(learnt[0], None)
+                else:
+                    self._attach(learnt)
+                    self._assign(learnt[0], learnt)
+                self._activity_increment /= self.activity_decay
+                conflicts_left -= 1
+                continue
+
+            if conflicts_left <= 0:
+                restarts += 1
+                conflicts_left = self.restart_base * _luby(restarts)
+                self._backtrack(0)
+
+            # The assumptions are the first decisions
+            if len(self._trail_limits) < len(assumptions):
+                literal = assumptions[len(self._trail_limits)]
+                if self._value(literal) == -1:
+                    self._backtrack(0)
+                    return False
+                self._trail_limits.append(len(self._trail))
+                if not self._value(literal):
+                    self._assign(literal, None)
+                continue
+
+            literal = self._decide()
+            if literal is None:
+                self.model = [False] + [value == 1 for value in self._values[1:]]
+                self._backtrack(0)
+                return True
+            self.decisions += 1
+            self._trail_limits.append(len(self._trail))
+            self._assign(literal, None)
+
+
+def _luby(index):
+    """The `index`-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    size, exponent = 1, 0
+    while size < index + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) // 2
+        exponent -= 1
+        index %= size
+    return 2 ** exponent
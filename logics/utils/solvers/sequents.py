@@ -2,6 +2,7 @@ from copy import deepcopy
 
 from logics.classes.propositional.proof_theories.sequents import Sequent, SequentNode
 from logics.classes.exceptions import SolverError
+from logics.utils.solvers.discrimination_tree import DiscriminationTree
 
 
 class SequentReducer:
@@ -76,14 +77,15 @@ class SequentReducer:
         """
         if premises is None:
             premises = list()
-        reduction, failed_reductions = self._standard_reduce(sequent, sequent_calculus, premises, max_depth)
+        reduction, failed_reductions = self._standard_reduce(sequent, sequent_calculus, premises, max_depth,
+                                                             conclusion_tree=self._conclusion_tree(sequent_calculus))
         if reduction is None:
             raise SolverError(f'Could not find reduction for {sequent}')
 
         return reduction
 
     def _standard_reduce(self, sequent, sequent_calculus, premises, max_depth,
-                         present_sequents=None, failed_reductions=None):
+                         present_sequents=None, failed_reductions=None, conclusion_tree=None):
         """
         Simply checks for each rule in sequent_calculus.solver_rule_order (should be a list of strings (rule names)
         is applicable to sequent, and then instantiates and reduces the premises.
@@ -100,6 +102,8 @@ class SequentReducer:
             failed_reductions = list()
         if present_sequents is None:
             present_sequents = list()
+        if conclusion_tree is None:
+            conclusion_tree = self._conclusion_tree(sequent_calculus)
 
         # First check if the sequent given is a premise or an axiom
         for premise in premises:
@@ -116,7 +120,8 @@ class SequentReducer:
                 return weakening_reduction, failed_reductions
 
         # If not an axiom, check if the sequent is an instance of the conclusion of every rule
-        for rule_name in sequent_calculus.solver_rule_order:
+        # (only the ones whose formulae all have some instance in the same side of the sequent)
+        for rule_name in self._candidate_rules(sequent, sequent_calculus, conclusion_tree):
             rule = sequent_calculus.rules[rule_name]
             instance, possible_subst_dicts = sequent.is_instance_of(rule.content, sequent_calculus.language,
                                                                     return_subst_dicts=True)
@@ -158,7 +163,8 @@ class SequentReducer:
                                                                           premises=premises,
                                                                           max_depth=max_depth-1,
                                                                           present_sequents=present_sequents + [sequent],
-                                                                          failed_reductions=failed_reductions)
+                                                                          failed_reductions=failed_reductions,
+                                                                          conclusion_tree=conclusion_tree)
                             # The reduction failed (the method returned None)
                             if premise_reduction is None:
                                 correct_reduction = False
@@ -175,6 +181,43 @@ class SequentReducer:
         # print('\t\t', 'exit reduction of', sequent)
         return None, failed_reductions
 
+    def _conclusion_tree(self, sequent_calculus):
+        """DiscriminationTree of the formulae (not the context variables) in the conclusions of the rules, named
+        ``(rule name, side index, position in the side)``. Built again only if the rules change"""
+        key = [(rule_name, sequent_calculus.rules[rule_name].content) for rule_name in sequent_calculus.solver_rule_order]
+        if getattr(self, '_conclusion_tree_key', None) != key:
+            schemas = dict()
+            for rule_name, conclusion in key:
+                for side_index, side in enumerate(conclusion):
+                    for position, elem in enumerate(side):
+                        if elem not in sequent_calculus.language.context_variables:
+                            schemas[(rule_name, side_index, position)] = elem
+            self._conclusion_tree_key = deepcopy(key)
+            self._conclusion_tree_cache = DiscriminationTree(schemas, sequent_calculus.language)
+        return self._conclusion_tree_cache
+
+    @staticmethod
+    def _candidate_rules(sequent, sequent_calculus, conclusion_tree):
+        """The rules of `solver_rule_order` whose conclusion `sequent` may be an instance of: same number of sides, and
+        every formula in each side of the conclusion has some instance among the formulae of that side of `sequent`
+        (``Sequent.is_instance_of`` has the last word)"""
+        matched = set()
+        for side_index, side in enumerate(sequent):
+            for elem in side:
+                if elem not in sequent_calculus.language.context_variables:
+                    matched.update(name for name, _ in conclusion_tree.match(elem) if name[1] == side_index)
+
+        candidates = list()
+        for rule_name in sequent_calculus.solver_rule_order:
+            conclusion = sequent_calculus.rules[rule_name].content
+            if conclusion.sides != sequent.sides:
+                continue
+            if all((rule_name, side_index, position) in matched
+                   for side_index, side in enumerate(conclusion) for position, elem in enumerate(side)
+                   if elem not in sequent_calculus.language.context_variables):
+                candidates.append(rule_name)
+        return candidates
+
     def _check_max_apparitions(self, sequent):
         """Checks that no formula appears more than max_apparitions_per_side in a sequent"""
         if self.max_apparitions_per_side:
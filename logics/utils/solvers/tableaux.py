@@ -4,6 +4,8 @@ from anytree import PreOrderIter, LevelOrderIter
 
 from logics.classes.propositional import Formula, Inference
 from logics.classes.exceptions import SolverError
+from logics.utils import counters
+from logics.utils.solvers.discrimination_tree import DiscriminationTree
 from logics.classes.propositional.proof_theories.tableaux import TableauxNode
 from logics.classes.propositional.proof_theories.metainferential_tableaux import (
     MetainferentialTableauxNode, MetainferentialTableauxStandard
@@ -79,14 +81,19 @@ class TableauxSolver:
                                     └── r (R→)
         """
         tableaux = self._begin_tableaux(inference, beggining_index)
+        last_premise_tree = self._last_premise_tree(tableaux_system)
 
         # For each node of the tableaux (including the ones we add dynamically)
         for node in LevelOrderIter(tableaux):  # LevelOrder so that it does not get stuck on a branch
-            # We go rule by rule seeing if it can be applied
-            for rule_name in tableaux_system.rules:
+            if counters.active is not None:
+                counters.increment('tableaux_nodes_expanded')
+            # We go rule by rule seeing if it can be applied (only the ones whose last premise may have node as instance)
+            for rule_name in self._candidate_rules(node, tableaux_system, last_premise_tree):
                 result = tableaux_system.rule_is_applicable(node, rule_name, return_subst_dict=True)
                 applicable = result[0]
                 if applicable:
+                    if counters.active is not None:
+                        counters.increment('tableaux_rule_applications')
                     # Get the rule and substitute the metavariables for formulae in it
                     subst_dict = result[1]
                     rule = tableaux_system.rules[rule_name]
@@ -128,6 +135,21 @@ class TableauxSolver:
                 break
         return last_prem
 
+    def _last_premise_tree(self, tableaux_system):
+        """DiscriminationTree of the contents of the last premise of each rule (see ``rule_is_applicable``)"""
+        last_premises = {}
+        for rule_name, rule in tableaux_system.rules.items():
+            rule_prems = [n for n in PreOrderIter(rule) if n.justification is None]
+            last_premises[rule_name] = rule_prems[-1].content
+        return DiscriminationTree(last_premises, tableaux_system.language)
+
+    def _candidate_rules(self, node, tableaux_system, last_premise_tree):
+        """The names of the rules with a last premise whose content has the content of `node` as instance, in the order
+        of the rules. Nodes that compare their contents some other way (e.g. metainferential nodes) get every rule"""
+        if type(node).content_is_instance_of is not TableauxNode.content_is_instance_of:
+            return list(tableaux_system.rules)
+        return [rule_name for rule_name, _ in last_premise_tree.match(node.content)]
+
     def _add_children_to_leaf(self, root, leaf):
         """
         Takes a tree (a root node, e.g. the last premise of a rule application) and a leaf from a different tree
@@ -1,24 +1,67 @@
+import asyncio
 import ollama
 import json
 import re
+import threading
 from utils.clean_propositions import PropositionRegistry
+from utils.ollama_client import AsyncOllamaClient
+from utils.llm_cache import LLMResponseCache, get_default_cache
+from utils.instrumentation import count, stage
 
 class LLMProcessingPremise:
-    def __init__(self, model_name="llama3.1"):
+    def __init__(self, model_name="llama3.1", encoder=None, client=None, cache=None, use_cache=True):
         self.model = model_name
-        self.registery = PropositionRegistry()
+        self.registery = PropositionRegistry(model=encoder)
+        # The async methods look up the registry from worker threads (encoding blocks), one lookup at a time
+        self._registry_lock = threading.Lock()
+        # AsyncOllamaClient used by the *_async methods, can be shared between processors to pool connections (the
+        # caller closes it). If None, every call opens its own
+        self.client = client
+        # Responses are deterministic (temperature 0), so by default they are reused from the on-disk cache
+        if not use_cache:
+            self.cache = LLMResponseCache(enabled=False)
+        else:
+            self.cache = cache if cache is not None else get_default_cache()
 
 
     def _llm_call(self, prompt, json_mode=True):
         format_type = 'json' if json_mode else ''
-        response = ollama.generate(
-            model=self.model,
-            prompt=prompt,
-            format=format_type,
-            options={"temperature": 0}
-        )
+        options = {"temperature": 0}
+        key = self.cache.make_key(self.model, prompt, format_type, options)
+        cached = self.cache.get(key)
+        if cached is not None:
+            count("llm_cache_hits")
+            return cached
+        with stage("ollama"):
+            response = ollama.generate(
+                model=self.model,
+                prompt=prompt,
+                format=format_type,
+                options=options
+            )
+        self.cache.put(key, response['response'])
         return response['response']
 
+    async def _llm_call_async(self, prompt, json_mode=True):
+        format_type = 'json' if json_mode else ''
+        options = {"temperature": 0}
+        key = self.cache.make_key(self.model, prompt, format_type, options)
+        # The cache reads and writes SQLite, which would block every other request on the event loop
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            count("llm_cache_hits")
+            return cached
+        with stage("ollama"):
+            if self.client is not None:
+                response = await self.client.generate(self.model, prompt, format=format_type, options=options)
+            else:
+                # A client is bound to the event loop it first runs on, so without a shared one each call opens
+                # (and closes) its own
+                async with AsyncOllamaClient() as client:
+                    response = await client.generate(self.model, prompt, format=format_type, options=options)
+        await asyncio.to_thread(self.cache.put, key, response)
+        return response
+
     @staticmethod
     def _clean_text(text):
         cleaned = text.strip().rstrip(".")
@@ -222,9 +265,10 @@ class LLMProcessingPremise:
         action_cache = {}
 
         def register_atom(atom):
-            var_name = self.registery.get_variable(atom)
-            if var_name not in mapping:
-                mapping[var_name] = self.registery.registry[var_name]
+            with self._registry_lock:
+                var_name = self.registery.get_variable(atom)
+                if var_name not in mapping:
+                    mapping[var_name] = self.registery.registry[var_name]
             return var_name
 
         def register_atoms(atom_list):
@@ -462,8 +506,8 @@ class LLMProcessingPremise:
         """
         return self._llm_call(prompt, json_mode=False).strip()
 
-    def _llm_fallback_parse(self, clause_text):
-        all_atoms = []
+    @staticmethod
+    def _atom_extraction_prompt(clause_text):
         '''
         extract_prompt = f"""
                     Extract atomic logical propositions from the following text.
@@ -490,8 +534,10 @@ class LLMProcessingPremise:
                 Return ONLY a JSON object with a key "atoms" containing a list of strings.
                 Text: "{clause_text}"
                 """
+        return extract_prompt
 
-        raw_response = self._llm_call(extract_prompt)
+    def _atoms_from_response(self, raw_response):
+        all_atoms = []
         try:
             parsed_json = json.loads(raw_response)
             raw_atoms = parsed_json.get("atoms", [])
@@ -503,27 +549,33 @@ class LLMProcessingPremise:
 
         if not isinstance(all_atoms, list):
             all_atoms = []
-        raw_atoms2 = [self._clean_text(atom) for atom in all_atoms if isinstance(atom, str) and atom.strip()]
-
-        mapping = self._register_atoms(raw_atoms2)
-        mapping_str = ",\n".join([f"{var}: {' OR '.join(texts)}" for var, texts in mapping.items()])
+        return [self._clean_text(atom) for atom in all_atoms if isinstance(atom, str) and atom.strip()]
 
-        final_mapping = {var: texts[0] for var, texts in mapping.items()}
+    def _map_atoms(self, raw_atoms2):
+        with self._registry_lock:
+            mapping = self._register_atoms(raw_atoms2)
+            atom_to_var = {atom: var for var, texts in mapping.items() for atom in texts}
 
-        # take the atoms and send it to SentenceTransformer('all-MiniLM-L6-v2') to cluster them based on semantic similarity. If they are above a certain threshold, we will treat them as the same variable in the formula.
-        clustered = self.registery.cluster_atoms(raw_atoms2, threshold=0.85)
+            # take the atoms and send it to SentenceTransformer('all-MiniLM-L6-v2') to cluster them based on semantic similarity. If they are above a certain threshold, we will treat them as the same variable in the formula.
+            representatives = self.registery.cluster_atoms(raw_atoms2, threshold=0.85)
 
         ## Now we need to update the mapping to reflect the clustering. If multiple atoms are clustered together, they should all map to the same variable.
-        cluster_to_var = {}
-        for atom in clustered:
-            var_name = self.registery.get_variable(atom)
-            cluster_to_var[atom] = var_name
+        ## (the variable of the cluster's representative, as already registered above)
+        clustered_mapping = {}
         final_mapping = {}
         for atom in raw_atoms2:
-            var_name = cluster_to_var.get(atom, self.registery.get_variable(atom))
+            var_name = atom_to_var[representatives[atom]]
+            texts = clustered_mapping.setdefault(var_name, [])
+            if atom not in texts:
+                texts.append(atom)
             final_mapping[var_name] = atom
+        mapping_str = ",\n".join([f"{var}: {' OR '.join(texts)}" for var, texts in clustered_mapping.items()])
 
         print(f'--- LLM Extracted Atoms ---\n{json.dumps(final_mapping, indent=2)}\n')
+        return mapping_str, final_mapping
+
+    @staticmethod
+    def _formula_prompt(clause_text, mapping_str):
         '''        formula_prompt = f"""
             Using the provided variable labels, substitute the variables' text with the variables' labels and translate the text into a propositional logic form.
             Use ONLY these variable labels:
@@ -560,7 +612,9 @@ class LLMProcessingPremise:
             Return ONLY the formula string. Do NOT output anything else. Do not use multiple slashes.
             Text: "{clause_text}"
             """
-        formula = self._llm_call(formula_prompt, json_mode=False).strip()
+        return formula_prompt
+
+    def _formula_result(self, formula, final_mapping):
         print("initial LLM output:", formula)
         formula2 = self._post_processing(formula)
         # ((P1 ∧ P6) ∧ P2) ∧ (P1 → ~P3) ∧ P2 → (~P1 ∨ ~P4) / P5 ∨ (~P4 ∧ ~P3)
@@ -570,6 +624,20 @@ class LLMProcessingPremise:
             "variable_map": final_mapping
         }
 
+    def _llm_fallback_parse(self, clause_text):
+        # Two round trips: the formula prompt needs the variable labels of the extracted atoms
+        raw_response = self._llm_call(self._atom_extraction_prompt(clause_text))
+        mapping_str, final_mapping = self._map_atoms(self._atoms_from_response(raw_response))
+        formula = self._llm_call(self._formula_prompt(clause_text, mapping_str), json_mode=False).strip()
+        return self._formula_result(formula, final_mapping)
+
+    async def _llm_fallback_parse_async(self, clause_text):
+        raw_response = await self._llm_call_async(self._atom_extraction_prompt(clause_text))
+        # Encoding the atoms blocks, so it runs in a worker thread instead of stalling the other clauses' requests
+        mapping_str, final_mapping = await asyncio.to_thread(self._map_atoms, self._atoms_from_response(raw_response))
+        formula = (await self._llm_call_async(self._formula_prompt(clause_text, mapping_str), json_mode=False)).strip()
+        return self._formula_result(formula, final_mapping)
+
     def process_clause(self, clause_text, use_llm=False):
         if not use_llm:
             parsed = self._rule_based_parse(clause_text)
@@ -578,6 +646,13 @@ class LLMProcessingPremise:
         else:
             return self._llm_fallback_parse(clause_text)
 
+    async def process_clause_async(self, clause_text, use_llm=False):
+        # Same as process_clause, but lets many clauses (from many documents) wait on Ollama at the same time
+        if not use_llm:
+            # The rule based path makes its (few) LLM calls synchronously, so keep it off the event loop
+            return await asyncio.to_thread(self.process_clause, clause_text, use_llm)
+        return await self._llm_fallback_parse_async(clause_text)
+
 
 def run(clause_text=None):
     parser = LLMProcessingPremise()
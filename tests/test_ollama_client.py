@@ -0,0 +1,131 @@
+# AsyncOllamaClient against a local stub HTTP server that stands in for Ollama's /api/generate
+#   python -m pytest tests
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ollama
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.ollama_client import AsyncOllamaClient
+
+
+class StubOllama:
+    # Answers every generate request with the prompt reversed after `delay` seconds. The first `failures` requests get
+    # `failure_status` instead. Records how many requests were in flight at once
+    def __init__(self, delay=0.0, failures=0, failure_status=503):
+        self.delay = delay
+        self.failures = failures
+        self.failure_status = failure_status
+        self.requests = []  # (prompt, status) in the order they were answered
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failing = stub.failures > 0
+                    stub.failures -= failing
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.in_flight -= 1
+                    status = stub.failure_status if failing else 200
+                    stub.requests.append((body["prompt"], status))
+                if failing:
+                    payload = {"error": "server busy"}
+                else:
+                    payload = {"model": body["model"], "created_at": "2024-01-01T00:00:00Z",
+                               "response": body["prompt"][::-1], "done": True}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+async def generate_all(client, prompts):
+    async with client:
+        return await asyncio.gather(*(client.generate("stub", prompt) for prompt in prompts))
+
+
+def test_responses_and_concurrency_limit():
+    with StubOllama(delay=0.1) as stub:
+        client = AsyncOllamaClient(host=stub.host, max_concurrency=3)
+        prompts = [f"prompt {i}" for i in range(10)]
+        assert asyncio.run(generate_all(client, prompts)) == [prompt[::-1] for prompt in prompts]
+    assert stub.max_in_flight == 3
+    assert len(stub.requests) == 10
+
+
+def test_retries_busy_server():
+    with StubOllama(failures=2) as stub:
+        client = AsyncOllamaClient(host=stub.host, retries=2, backoff=0.01)
+        assert asyncio.run(generate_all(client, ["abc"])) == ["cba"]
+    assert [status for _, status in stub.requests] == [503, 503, 200]
+
+
+def test_gives_up_after_the_retries():
+    with StubOllama(failures=5) as stub:
+        client = AsyncOllamaClient(host=stub.host, retries=1, backoff=0.01)
+        with pytest.raises(ollama.ResponseError):
+            asyncio.run(generate_all(client, ["abc"]))
+    assert len(stub.requests) == 2
+
+
+def test_does_not_retry_client_errors():
+    with StubOllama(failures=1, failure_status=400) as stub:
+        client = AsyncOllamaClient(host=stub.host, retries=3, backoff=0.01)
+        with pytest.raises(ollama.ResponseError):
+            asyncio.run(generate_all(client, ["abc"]))
+    assert len(stub.requests) == 1
+
+
+def test_backoff_does_not_hold_a_slot():
+    # With a single slot, the request that failed backs off while the other one is sent and answered
+    with StubOllama(delay=0.05, failures=1) as stub:
+        client = AsyncOllamaClient(host=stub.host, max_concurrency=1, retries=1, backoff=0.5)
+        start = time.perf_counter()
+        assert asyncio.run(generate_all(client, ["first", "second"])) == ["tsrif", "dnoces"]
+        elapsed = time.perf_counter() - start
+    assert stub.requests == [("first", 503), ("second", 200), ("first", 200)]
+    assert elapsed < 0.5 + 4 * 0.05 + 0.25
+
+
+def test_processor_without_client_across_event_loops(monkeypatch, tmp_path):
+    # Every call opens and closes its own client, so the processor can be used again under a new event loop
+    from premise_to_proposition import LLMProcessingPremise
+    from utils.llm_cache import LLMResponseCache
+    with StubOllama() as stub:
+        monkeypatch.setenv("OLLAMA_HOST", stub.host)
+        processor = LLMProcessingPremise(model_name="stub", cache=LLMResponseCache(str(tmp_path / "cache.sqlite3")))
+        assert asyncio.run(processor._llm_call_async("abc")) == "cba"
+        assert asyncio.run(processor._llm_call_async("def")) == "fed"
+        assert asyncio.run(processor._llm_call_async("abc")) == "cba"  # From the cache
+    assert processor.client is None
+    assert [prompt for prompt, _ in stub.requests] == ["abc", "def"]
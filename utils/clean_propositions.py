@@ -1,12 +1,28 @@
-from sentence_transformers import SentenceTransformer, util
+from collections import defaultdict
+from utils.encoder import get_encoder
+from utils.instrumentation import stage
+from utils.proposition_index import ExactIndex, load_index
+import numpy as np
+import json
 import re
 
 class PropositionRegistry:
-    def __init__(self, threshold=0.85):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, threshold=0.85, model=None, index=None):
+        # By default every registry in the process shares one encoder, which is only loaded on the first encode
+        self.model = model if model is not None else get_encoder()
         self.registry = {}  # Format: { "P1": "The tenant pays rent" }
         self.threshold = threshold
 
+        # Kept alongside registry (same order) so that registering a new text costs one encode and one
+        # nearest-neighbour query, instead of re-encoding every registered sentence on each call.
+        # The index holds the embeddings: ExactIndex (brute force) by default, or e.g. a RandomProjectionIndex for
+        # very large registries
+        self.index = index if index is not None else ExactIndex()
+        self._var_names = []
+        self._negated = []
+        self._canonical_to_indexes = defaultdict(list)
+        self._embedding_cache = {}  # text -> embedding, atoms are often looked up more than once
+
     @staticmethod
     def _is_negated(text):
         lowered = f" {text.lower()} "
@@ -20,62 +36,129 @@ class PropositionRegistry:
         cleaned = re.sub(r"\s+", " ", cleaned)
         return cleaned.strip()
 
-    def cluster_atoms(self, raw_atoms, threshold=0.55):
-        if len(raw_atoms) <= 1:
-            return raw_atoms
-
-        embeddings = self.model.encode(raw_atoms, convert_to_tensor=True)
-        cosine_scores = util.cos_sim(embeddings, embeddings)
-
-        canonical_raw = []
-        visited_map = {}
-
-        for i in range(len(raw_atoms)):
-            if i in visited_map:
-                canonical_raw.append(visited_map[i])
-            else:
-                visited_map[i] = raw_atoms[i]
-                canonical_raw.append(raw_atoms[i])
-                # Mark any similar future atoms to map to this one
-                for j in range(i + 1, len(raw_atoms)):
-                    if j not in visited_map and cosine_scores[i][j].item() > threshold:
-                        visited_map[j] = raw_atoms[i]
-                    else:
-                        pass
+    def _encode(self, text):
+        embedding = self._embedding_cache.get(text)
+        if embedding is None:
+            with stage("encode"):
+                embedding = np.asarray(self.model.encode(text, normalize_embeddings=True), dtype=np.float32)
+            self._embedding_cache[text] = embedding
+        return embedding
+
+    def _add(self, var_name, text, embedding=None):
+        # embedding is None when the index already contains it (loading a saved registry)
+        if embedding is not None:
+            self.index.add(embedding)
+        self._canonical_to_indexes[self._canonical_text(text)].append(len(self._var_names))
+        self._var_names.append(var_name)
+        self._negated.append(self._is_negated(text))
+        self.registry[var_name] = text
+
+    def save(self, path):
+        # Writes <path>.json (variables and texts) and <path>.index.npz (the embeddings index)
+        self.index.save(path + ".index.npz")
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump({"threshold": self.threshold, "registry": list(self.registry.items())}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, model=None):
+        with open(path + ".json", encoding="utf-8") as f:
+            data = json.load(f)
+        registry = cls(threshold=data["threshold"], model=model, index=load_index(path + ".index.npz"))
+        for var_name, text in data["registry"]:
+            registry._add(var_name, text)
+        return registry
+
+    def _encode_many(self, texts):
+        # One batched encode for the texts that are not cached yet
+        missing = [text for text in dict.fromkeys(texts) if text not in self._embedding_cache]
+        if missing:
+            with stage("encode"):
+                embeddings = np.asarray(self.model.encode(missing, normalize_embeddings=True), dtype=np.float32)
+            self._embedding_cache.update(zip(missing, embeddings))
+        return np.stack([self._embedding_cache[text] for text in texts])
+
+    def cluster_atoms(self, raw_atoms, threshold=0.55, mode="leader", block_size=1024):
+        """Maps every atom to the representative (first seen) atom of its cluster, in the order of raw_atoms
+
+        Two atoms are linked when their cosine similarity is above threshold (and they are not each other's negation).
+        mode="leader": each atom that is not taken yet takes all later, untaken atoms linked to it (greedy, in order)
+        mode="components": clusters are the connected components of the link graph
+        The similarity matrix is computed block_size rows at a time, so long atom lists never need the full n x n matrix.
+        """
+        atoms = list(dict.fromkeys(raw_atoms))
+        if len(atoms) <= 1:
+            return {atom: atom for atom in atoms}
+        with stage("cluster_atoms"):
+            return self._cluster(atoms, threshold, mode, block_size)
+
+    def _cluster(self, atoms, threshold, mode, block_size):
+        embeddings = self._encode_many(atoms)
+        # Integer ids for the canonical texts, so that negation pairs can be filtered with array comparisons
+        canonical_ids = {}
+        canonical = np.array([canonical_ids.setdefault(self._canonical_text(atom), len(canonical_ids))
+                              for atom in atoms])
+        negated = np.array([self._is_negated(atom) for atom in atoms])
+        n = len(atoms)
+
+        def linked_rows(start, stop):
+            # Boolean (stop - start, n) adjacency for rows start..stop, only j > i, without negation pairs
+            rows = slice(start, stop)
+            adjacency = (embeddings[rows] @ embeddings.T) > threshold
+            adjacency &= np.arange(n)[None, :] > np.arange(start, stop)[:, None]
+            adjacency &= ~((canonical[rows, None] == canonical[None, :]) & (negated[rows, None] != negated[None, :]))
+            return adjacency
+
+        if mode == "leader":
+            representative = np.full(n, -1)
+            for start in range(0, n, block_size):
+                adjacency = linked_rows(start, min(start + block_size, n))
+                for offset, row in enumerate(adjacency):
+                    i = start + offset
+                    if representative[i] != -1:
+                        continue
+                    representative[i] = i
+                    representative[row & (representative == -1)] = i
+        elif mode == "components":
+            # Union-find, the smallest index of a component is its root
+            parent = np.arange(n)
+
+            def find(i):
+                while parent[i] != i:
+                    parent[i] = parent[parent[i]]
+                    i = parent[i]
+                return i
+
+            for start in range(0, n, block_size):
+                rows, columns = np.nonzero(linked_rows(start, min(start + block_size, n)))
+                for i, j in zip((rows + start).tolist(), columns.tolist()):
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+            representative = [find(i) for i in range(n)]
+        else:
+            raise ValueError(f"Unknown clustering mode {mode}")
 
-        return list(set(canonical_raw))
+        return {atom: atoms[rep] for atom, rep in zip(atoms, representative)}
 
     def get_variable(self, text):
-        if not self.registry:
-            var_name = f"P{len(self.registry) + 1}"
-            self.registry[var_name] = text
-            return var_name
-
-        # Compare new text against everything in the registry
-        sentences = list(self.registry.values())
-        var_names = list(self.registry.keys())
+        with stage("embedding_registry"):
+            new_emb = self._encode(text)
+
+            # The negation of a registered sentence must never be merged with it
+            new_neg = self._is_negated(text)
+            excluded = {i for i in self._canonical_to_indexes.get(self._canonical_text(text), ())
+                        if self._negated[i] != new_neg}
+
+            # Find the highest similarity score among the entries that are not excluded
+            # (asking for one more neighbour than there are exclusions is enough to find it)
+            ids, scores = self.index.search(new_emb, k=len(excluded) + 1)
+            for idx, max_score in zip(ids.tolist(), scores.tolist()):
+                if idx in excluded:
+                    continue
+                if max_score > self.threshold:
+                    return self._var_names[idx]  # Return existing variable
+                break
 
-        new_emb = self.model.encode(text, convert_to_tensor=True)
-        old_embs = self.model.encode(sentences, convert_to_tensor=True)
-
-        # Find the highest similarity score
-        cosine_scores = util.cos_sim(new_emb, old_embs)[0]
-        adjusted_scores = cosine_scores.clone()
-
-        new_neg = self._is_negated(text)
-        new_canonical = self._canonical_text(text)
-
-        for i, existing_text in enumerate(sentences):
-            existing_neg = self._is_negated(existing_text)
-            existing_canonical = self._canonical_text(existing_text)
-            if new_neg != existing_neg and new_canonical == existing_canonical:
-                adjusted_scores[i] = -1.0
-
-        max_score, idx = adjusted_scores.max(), adjusted_scores.argmax()
-
-        if max_score > self.threshold:
-            return var_names[idx]  # Return existing variable
-        else:
             var_name = f"P{len(self.registry) + 1}"
-            self.registry[var_name] = text
-            return var_name
\ No newline at end of file
+            self._add(var_name, text, new_emb)
+            return var_name
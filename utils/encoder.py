@@ -0,0 +1,75 @@
+
+# Process-wide sentence encoder shared by every PropositionRegistry
+# Loading all-MiniLM-L6-v2 takes seconds and a few hundred MB, so it is done at most once per process and only when
+# something is actually encoded (or warm_up() is called). get_encoder() hands out the same SharedEncoder for the same
+# settings, and it is safe to call encode() from several threads.
+# Backends:
+#   torch (default)
+#   onnx: ONNX Runtime on the CPU, needs `pip install sentence-transformers[onnx]`
+# quantize=True uses int8 weights: the repo's quantized ONNX export for onnx, dynamic quantization of the Linear
+# layers for torch. Both can also be set with the SENTENCE_ENCODER_BACKEND / SENTENCE_ENCODER_QUANTIZE variables.
+import os
+import threading
+
+DEFAULT_MODEL_NAME = os.environ.get("SENTENCE_ENCODER_MODEL", "all-MiniLM-L6-v2")
+DEFAULT_BACKEND = os.environ.get("SENTENCE_ENCODER_BACKEND", "torch")
+DEFAULT_QUANTIZE = os.environ.get("SENTENCE_ENCODER_QUANTIZE", "0") == "1"
+QUANTIZED_ONNX_FILE = "onnx/model_qint8_avx2.onnx"
+
+
+class SharedEncoder:
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, backend=DEFAULT_BACKEND, quantize=DEFAULT_QUANTIZE):
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown encoder backend {backend}")
+        self.model_name = model_name
+        self.backend = backend
+        self.quantize = quantize
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def _load(self):
+        # sentence_transformers (and torch) are only imported here, so short runs that never encode skip the import
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == "onnx":
+            model_kwargs = {"file_name": QUANTIZED_ONNX_FILE} if self.quantize else None
+            return SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+
+        model = SentenceTransformer(self.model_name)
+        if self.quantize:
+            import torch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    def warm_up(self):
+        # Load the weights and run one encode, so the first real request does not pay for either
+        self.encode("warm up")
+        return self
+
+    def encode(self, sentences, **kwargs):
+        return self.model.encode(sentences, **kwargs)
+
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def get_encoder(model_name=DEFAULT_MODEL_NAME, backend=DEFAULT_BACKEND, quantize=DEFAULT_QUANTIZE):
+    # Same settings -> same (lazily loaded) encoder, for the whole process
+    key = (model_name, backend, quantize)
+    with _encoders_lock:
+        if key not in _encoders:
+            _encoders[key] = SharedEncoder(model_name, backend, quantize)
+        return _encoders[key]
@@ -1,5 +1,7 @@
 # extract statements from pdfs
-from pypdf import PdfReader
+from utils import pdf_text
+from utils.pdf_text import read_pages
+from utils.segmenter import Segmenter
 import ollama
 from premise_to_proposition import LLMProcessingPremise
 import json
@@ -7,40 +9,37 @@ import os
 
 def read_contact(filename):
     print(os.getcwd())
-    reader = PdfReader(filename)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    # pages are extracted in parallel for long files and cached per file hash (see utils/pdf_text.py)
+    return read_pages(filename)
+
+# Headings around the section we want. Any docket number ends it (it used to be only "JUDGMENT in T-1041-23")
+SECTION_START_PATTERNS = [r"I\. Overview"]
+SECTION_END_PATTERNS = [r"JUDGMENT in [A-Z]{1,3}-\d+-\d+"]
+SEGMENTER = Segmenter(SECTION_START_PATTERNS, SECTION_END_PATTERNS)
+
+def read_section(filename, workers=None):
+    # extract_section(read_contact(filename)), but stops reading the PDF once the end of the section is reached
+    return pdf_text.read_section(filename, SEGMENTER, workers=workers)
+
+def iter_statements(filename, workers=None):
+    # Statements of the section, each one as soon as the pages it is on have been read
+    return pdf_text.iter_statements(filename, SEGMENTER, workers=workers)
 
 # we want to get the text within the section "III. Analysis"
 def extract_section(text):
     # find the start and end positions of the section
-    start_pos = text.find("I. Overview")
-    if start_pos == -1:
+    section = SEGMENTER.find_section(text)
+    if section is None:
         return []
-    end_pos = text.find("JUDGMENT in T-1041-23", start_pos)
-    if end_pos == -1:
-        end_pos = len(text)
     # get the text within the section
-    section_text = text[start_pos:end_pos]
-    return section_text
+    start_pos, end_pos = section
+    return text[start_pos:end_pos]
 
 def extract_statements(section_text):
     # split the chunk of text into the sections (that are signified by each number)
     # aka split by [#] till next [#]
     # return a list of those statements
-    statements = []
-    current_statement = ""
-    for line in section_text.split("\n"):
-        if line.strip().startswith("["):
-            if current_statement:
-                statements.append(current_statement.strip())
-            current_statement = line.strip()
-        else:
-            current_statement += " " + line.strip()
-    statements.append(current_statement.strip())   
-    return statements
+    return SEGMENTER.statements(section_text)
 
 # send the statements to Ollama to extract propostions from them
 def extract_propositions_with_ollama(statements, model="llama3.1"):
@@ -75,8 +74,7 @@ def extract_propositions_with_ollama(statements, model="llama3.1"):
     return extracted_propositions
 
 def main():
-    text = read_contact("T-2620-25_20260216_OR-OM_E-A_O_TOR_20260216093845_HR1.pdf")
-    section_text = extract_section(text)
+    section_text = read_section("T-2620-25_20260216_OR-OM_E-A_O_TOR_20260216093845_HR1.pdf")
     statements = extract_statements(section_text)
 
     print("Extracted Statements:")
@@ -0,0 +1,163 @@
+
+# Stage-level timing / profiling of the contract-to-proof pipeline
+# A Profiler collects, for one document:
+#   - per stage (pdf extraction, LLM calls, embedding registry, validity check, natural deduction, ...): number of
+#     calls, total wall time and peak traced memory
+#   - counters: the logics solver counters (valuations evaluated, heuristic recursions, tableaux nodes, see
+#     logics/utils/counters.py) plus any counted with count(), e.g. LLM cache hits
+#   - optionally a cProfile dump of the whole run (open it with python -m pstats or snakeviz)
+# and writes them as a JSON report. Code marks its stages with `with stage("name"):`, which does nothing unless a
+# Profiler is active (in the current thread / asyncio task), so the pipeline pays nothing when it is not profiled.
+import contextvars
+import cProfile
+import json
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+from logics.utils import counters as solver_counters
+
+_current_profiler = contextvars.ContextVar("current_profiler", default=None)
+
+
+class Profiler:
+    def __init__(self, document=None, trace_memory=True, profile_path=None, count_solvers=True):
+        # trace_memory, count_solvers and profile_path act on the whole process (tracemalloc, the logics counters,
+        # cProfile), so turn them off for profilers that run concurrently with others, e.g. in asyncio tasks
+        self.document = document
+        self.trace_memory = trace_memory
+        self.profile_path = profile_path
+        self.count_solvers = count_solvers
+        self.stages = defaultdict(lambda: {"calls": 0, "wall_time": 0.0, "peak_memory": 0})
+        self.counters = Counter()
+        self.wall_time = 0.0
+        self.peak_memory = 0
+        self._open_stage_peaks = []  # Peak memory seen so far by each stage that is currently running (outermost first)
+
+    def __enter__(self):
+        self._token = _current_profiler.set(self)
+        if self.count_solvers:
+            self._previous_solver_counters = solver_counters.active
+            solver_counters.active = self.counters
+        self._started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._profile = cProfile.Profile() if self.profile_path else None
+        if self._profile is not None:
+            self._profile.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_time += time.perf_counter() - self._start
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.profile_path)
+        if self.trace_memory:
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1],
+                                   *(stage["peak_memory"] for stage in self.stages.values()))
+        if self._started_tracing:
+            tracemalloc.stop()
+        if self.count_solvers:
+            solver_counters.active = self._previous_solver_counters
+        _current_profiler.reset(self._token)
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            # The peak is reset for this stage, so first hand the peak so far to the stages that contain it
+            current_peak = tracemalloc.get_traced_memory()[1]
+            self._open_stage_peaks = [max(peak, current_peak) for peak in self._open_stage_peaks]
+            tracemalloc.reset_peak()
+            self._open_stage_peaks.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = self.stages[name]
+            record["calls"] += 1
+            record["wall_time"] += time.perf_counter() - start
+            if self.trace_memory:
+                peak = max(self._open_stage_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record["peak_memory"] = max(record["peak_memory"], peak)
+                self._open_stage_peaks = [max(outer, peak) for outer in self._open_stage_peaks]
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def report(self):
+        return {"document": self.document,
+                "wall_time": self.wall_time,
+                "peak_memory": self.peak_memory if self.trace_memory else None,
+                "stages": {name: dict(record, peak_memory=record["peak_memory"] if self.trace_memory else None)
+                           for name, record in self.stages.items()},
+                "counters": dict(self.counters),
+                "profile": self.profile_path}
+
+    def write_report(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+def merge_reports(reports, document=None):
+    # One report out of several (e.g. the stages of a document that ran in different processes)
+    merged = {"document": document, "wall_time": 0.0, "peak_memory": None, "stages": {}, "counters": Counter(),
+              "profile": [report["profile"] for report in reports if report["profile"]] or None}
+    for report in reports:
+        merged["wall_time"] += report["wall_time"]
+        if report["peak_memory"] is not None:
+            merged["peak_memory"] = max(merged["peak_memory"] or 0, report["peak_memory"])
+        for name, record in report["stages"].items():
+            total = merged["stages"].setdefault(name, {"calls": 0, "wall_time": 0.0, "peak_memory": None})
+            total["calls"] += record["calls"]
+            total["wall_time"] += record["wall_time"]
+            if record["peak_memory"] is not None:
+                total["peak_memory"] = max(total["peak_memory"] or 0, record["peak_memory"])
+        merged["counters"].update(report["counters"])
+    merged["counters"] = dict(merged["counters"])
+    return merged
+
+
+def current_profiler():
+    return _current_profiler.get()
+
+
+def stage(name):
+    # `with stage("name"):` times the block if a Profiler is active, otherwise does nothing
+    profiler = _current_profiler.get()
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+def count(name, amount=1):
+    profiler = _current_profiler.get()
+    if profiler is not None:
+        profiler.count(name, amount)
+
+
+def profiled_call(function, payload, name, document=None, trace_memory=True, profile_path=None):
+    # Runs function(payload) as a single stage of its own Profiler and returns (result, report). Module level, so it
+    # can be sent to a process pool; the report is attached to an exception raised by function as e.profile_report.
+    profiler = Profiler(document, trace_memory, profile_path)
+    try:
+        with profiler, profiler.stage(name):
+            result = function(payload)
+    except Exception as e:
+        e.profile_report = profiler.report()
+        raise
+    return result, profiler.report()
+
+
+async def profiled_call_async(coroutine_function, payload, name, document=None):
+    # Same for a coroutine running next to others on one event loop: only times and counts
+    profiler = Profiler(document, trace_memory=False, count_solvers=False)
+    try:
+        with profiler, profiler.stage(name):
+            result = await coroutine_function(payload)
+    except Exception as e:
+        e.profile_report = profiler.report()
+        raise
+    return result, profiler.report()
@@ -0,0 +1,147 @@
+
+# Persistent, content-addressed cache for LLM responses
+# We always call Ollama with temperature 0, so the same (model, prompt, format, options) gives the same answer. The
+# responses are kept in a small SQLite file keyed on a hash of those four things, and the least recently used ones are
+# evicted once the cache goes over its size limits (down to EVICT_TO of them, so that eviction does not run on every
+# insert). Re-running a judgment (or iterating on one prompt while the others stay the same) then skips the model for
+# everything it has already seen.
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", ".llm_cache")
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+EVICT_TO = 0.9  # Fraction of the limits the cache is brought down to when it goes over them
+TOUCH_INTERVAL = 3600.0  # A hit only updates last_used if it is older than this many seconds (LRU order is approximate)
+
+
+class LLMResponseCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.path = path if path is not None else os.path.join(DEFAULT_CACHE_DIR, "responses.sqlite3")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        # Running totals of the entries and their bytes, so that a put does not have to scan the table. Other processes
+        # sharing the file are only accounted for when the totals are recounted (on connecting and on eviction)
+        self._entries = 0
+        self._bytes = 0
+
+    @staticmethod
+    def make_key(model, prompt, format_type, options):
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        key_fields = json.dumps([model, prompt_hash, format_type, options or {}], sort_keys=True)
+        return hashlib.sha256(key_fields.encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Shared between threads (guarded by self._lock); SQLite itself serializes writers across processes
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                                     "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                                     "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._connection.commit()
+            self._recount(self._connection)
+        return self._connection
+
+    def _recount(self, connection):
+        self._entries, self._bytes = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT response, last_used FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            # Reads stay reads: the entry is only marked as used again once in a while
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        if not self.enabled:
+            return
+        with self._lock:
+            connection = self._connect()
+            size = len(response.encode("utf-8"))
+            replaced = connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            connection.execute("INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                               (key, response, size, time.time()))
+            if replaced is None:
+                self._entries += 1
+            self._bytes += size - (replaced[0] if replaced is not None else 0)
+            if self._entries > self.max_entries or self._bytes > self.max_bytes:
+                self._evict(connection)
+            connection.commit()
+
+    def _evict(self, connection):
+        # Drop least recently used entries until both the entry and the byte limits hold with some room to spare. The
+        # totals are recounted first, since other processes may have added entries too
+        self._recount(connection)
+        if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        max_entries, max_bytes = math.ceil(self.max_entries * EVICT_TO), math.ceil(self.max_bytes * EVICT_TO)
+        to_delete = []
+        # The index on last_used lets this stop reading as soon as enough entries have been found
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            if self._entries <= max_entries and self._bytes <= max_bytes:
+                break
+            to_delete.append((key,))
+            self._entries -= 1
+            self._bytes -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+
+    def stats(self):
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+            self._entries = self._bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    # One cache object per process, so every LLMProcessingPremise shares the counters and the connection
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache(enabled=os.environ.get("LLM_CACHE", "1") != "0")
+        return _default_cache
@@ -0,0 +1,81 @@
+
+# asyncio client layer over ollama.AsyncClient
+# A single AsyncOllamaClient keeps one pooled HTTP connection set to the Ollama server, caps how many requests are in
+# flight at once, and retries requests that time out or fail because the server is busy/unreachable. This lets
+# clauses from many documents be sent concurrently instead of one blocking ollama.generate call at a time.
+import asyncio
+import threading
+
+import httpx
+import ollama
+
+
+class AsyncOllamaClient:
+    def __init__(self, host=None, max_concurrency=4, timeout=120.0, retries=2, backoff=0.5):
+        self.host = host  # None means ollama's default (OLLAMA_HOST or localhost:11434)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_client(self):
+        # Created lazily so that the client and semaphore belong to the event loop that actually uses them
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            self._client = ollama.AsyncClient(host=self.host, timeout=self.timeout, limits=limits)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    @staticmethod
+    def _is_retryable(error):
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, (ConnectionError, httpx.TransportError, asyncio.TimeoutError))
+
+    async def generate(self, model, prompt, format='', options=None):
+        client = self._ensure_client()
+        for attempt in range(self.retries + 1):
+            try:
+                # The slot is only held while the request is in flight, not while backing off before a retry
+                async with self._semaphore:
+                    response = await client.generate(model=model, prompt=prompt, format=format, options=options)
+                return response['response']
+            except Exception as e:
+                if attempt == self.retries or not self._is_retryable(e):
+                    raise
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class EventLoopThread:
+    # Runs an event loop in a background thread so synchronous code (e.g. the batch pipeline) can submit coroutines
+    # and get back concurrent.futures.Future objects
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine_function, *args):
+        return asyncio.run_coroutine_threadsafe(coroutine_function(*args), self.loop)
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -0,0 +1,151 @@
+
+# Streaming PDF text extraction
+# iter_pages() yields the text of one page at a time, in order, so callers can stop reading as soon as they have what
+# they need (read_section() and iter_statements() hand the pages to a Segmenter, see utils/segmenter.py, and stop at
+# the end heading of the section). Long PDFs are split into runs of pages that are extracted in parallel by a process
+# pool, with only a few runs in flight at once. The text of every page read so far is cached on disk per file content
+# hash, so running the same judgment again does not touch pypdf at all.
+import hashlib
+import json
+import os
+import re
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+
+from pypdf import PdfReader
+
+from utils.segmenter import Segmenter
+
+DEFAULT_CACHE_DIR = os.environ.get("PDF_TEXT_CACHE_DIR", ".pdf_text_cache")
+PARALLEL_MIN_PAGES = 16  # Smaller files are faster to read in-process than to start workers for
+PAGES_PER_TASK = 4
+
+
+def file_hash(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageTextCache:
+    # One JSON file per PDF: {"pages": [...text of the first pages...], "complete": whether that is every page}
+    def __init__(self, directory=DEFAULT_CACHE_DIR, enabled=True):
+        self.directory = directory
+        self.enabled = enabled
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def load(self, key):
+        if not self.enabled:
+            return [], False
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return [], False
+        return data["pages"], data["complete"]
+
+    def store(self, key, pages, complete):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        temporary = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages, "complete": complete}, f, ensure_ascii=False)
+        os.replace(temporary, self._path(key))
+
+
+def get_default_page_cache():
+    return PageTextCache(enabled=os.environ.get("PDF_TEXT_CACHE", "1") != "0")
+
+
+# Worker side: every pool process opens the PDF once and then extracts the page runs it is given
+_worker_reader = None
+
+
+def _open_worker_reader(filename):
+    global _worker_reader
+    _worker_reader = PdfReader(filename)
+
+
+def _extract_pages(start, stop):
+    return [_worker_reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _extract_in_pool(filename, first_page, page_count, workers):
+    runs = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(first_page, page_count, PAGES_PER_TASK)]
+    pool = ProcessPoolExecutor(workers, initializer=_open_worker_reader, initargs=(filename,))
+    in_flight = []
+    try:
+        for run_index in range(len(runs)):
+            # Keep at most two runs per worker queued ahead of the page being yielded
+            while len(in_flight) < 2 * workers and run_index + len(in_flight) < len(runs):
+                in_flight.append(pool.submit(_extract_pages, *runs[run_index + len(in_flight)]))
+            yield from in_flight.pop(0).result()
+    finally:
+        # The caller may stop early: drop the runs nobody will read
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pages(filename, workers=None, cache=None):
+    """Yields the text of every page of the PDF, in order (pages are extracted lazily)"""
+    cache = cache if cache is not None else get_default_page_cache()
+    key = file_hash(filename) if cache.enabled else None
+    pages, complete = cache.load(key) if key else ([], False)
+    cached_pages, cached_complete = len(pages), complete
+
+    try:
+        yield from pages
+        if complete:
+            return
+
+        reader = PdfReader(filename)
+        page_count = len(reader.pages)
+        workers = workers if workers is not None else min(4, os.cpu_count() or 1)
+        if workers > 1 and page_count - len(pages) >= PARALLEL_MIN_PAGES:
+            extracted = _extract_in_pool(filename, len(pages), page_count, workers)
+        else:
+            extracted = (reader.pages[i].extract_text() for i in range(len(pages), page_count))
+
+        for text in extracted:
+            pages.append(text)
+            yield text
+        complete = True
+    finally:
+        if key and (len(pages) > cached_pages or complete != cached_complete):
+            cache.store(key, pages, complete)
+
+
+def iter_text(filename, workers=None, cache=None):
+    # The text of read_pages, one page at a time (closing this stops the extraction too)
+    with closing(iter_pages(filename, workers, cache)) as pages:
+        for text in pages:
+            yield text + "\n"
+
+
+def read_pages(filename, workers=None, cache=None):
+    # Whole document, in the format read_contact always returned (every page followed by a newline)
+    return "".join(iter_text(filename, workers, cache))
+
+
+def literal_segmenter(start_marker, end_marker):
+    # Segmenter for a section between two plain strings (the first start_marker and the next end_marker)
+    return Segmenter([re.escape(start_marker)], [re.escape(end_marker)])
+
+
+def read_section(filename, segmenter, workers=None, cache=None):
+    """Same result as segmenter.find_section on the text of read_pages(filename), but stops reading at the end heading
+
+    Returns the section text, or [] if the start heading is not found. Before the start heading only the current line
+    is kept, so memory grows with the section, not the whole document.
+    """
+    return segmenter.read_section(iter_text(filename, workers, cache))
+
+
+def iter_statements(filename, segmenter, workers=None, cache=None):
+    """Statements of the section of the PDF (see Segmenter.iter_statements), each one as soon as its pages are read"""
+    return segmenter.iter_statements(iter_text(filename, workers, cache))
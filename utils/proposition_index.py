@@ -0,0 +1,142 @@
+
+# Nearest-neighbour index backends for PropositionRegistry
+# Vectors are unit-length sentence embeddings, so the dot product is the cosine similarity.
+#   ExactIndex: brute-force scan of every stored vector (the default, always finds the true nearest neighbours)
+#   RandomProjectionIndex: approximate, for registries with tens of thousands of propositions. Every table hashes a
+#       vector to the signs of its projection onto n_bits random hyperplanes; only vectors sharing a bucket with the
+#       query (in some table) are scored exactly. More tables / probes -> better recall, slower queries.
+# Both support incremental inserts and can be saved to / loaded from a .npz file.
+import numpy as np
+
+
+class ExactIndex:
+    kind = "exact"
+
+    def __init__(self):
+        self._vectors = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        if self._vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._vectors[:self._size]
+
+    def add(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        if self._vectors is None:
+            self._vectors = np.empty((16, vector.shape[0]), dtype=np.float32)
+        elif self._size == self._vectors.shape[0]:
+            # Grow by doubling, so inserting stays amortized O(1)
+            grown = np.empty((2 * self._size, self._vectors.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._vectors
+            self._vectors = grown
+        self._vectors[self._size] = vector
+        self._size += 1
+        return self._size - 1
+
+    @staticmethod
+    def _top_k(ids, scores, k):
+        if k < len(ids):
+            best = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        return ids[order], scores[order]
+
+    def search(self, query, k=1):
+        """Returns the ids of the (at most) k most similar stored vectors and their scores, best first"""
+        if not self._size:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.vectors @ np.asarray(query, dtype=np.float32)
+        return self._top_k(np.arange(self._size), scores, k)
+
+    def _state(self):
+        return {"vectors": self.vectors}
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, **self._state())
+
+    @classmethod
+    def _from_state(cls, state):
+        index = cls()
+        for vector in state["vectors"]:
+            index.add(vector)
+        return index
+
+
+class RandomProjectionIndex(ExactIndex):
+    kind = "random_projection"
+
+    def __init__(self, n_tables=8, n_bits=12, n_probe=1, seed=0):
+        super().__init__()
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probe = n_probe  # Buckets looked at per table: the query's own plus the n_probe - 1 nearest ones
+        self.seed = seed
+        self._planes = None  # (n_tables, n_bits, dim), created on the first insert when dim is known
+        self._buckets = [dict() for _ in range(n_tables)]
+        self._powers = 1 << np.arange(n_bits, dtype=np.int64)
+
+    def _projections(self, vector):
+        if self._planes is None:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.n_tables, self.n_bits, vector.shape[0])).astype(np.float32)
+        return self._planes @ vector
+
+    def add(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        vector_id = super().add(vector)
+        keys = (self._projections(vector) > 0) @ self._powers
+        for table, key in zip(self._buckets, keys.tolist()):
+            table.setdefault(key, []).append(vector_id)
+        return vector_id
+
+    def _probe_keys(self, projections):
+        keys = (projections > 0) @ self._powers
+        probes = [keys]
+        if self.n_probe > 1:
+            # Neighbouring buckets: flip the bits whose hyperplane the query is closest to
+            closest_bits = np.argsort(np.abs(projections), axis=1)[:, :self.n_probe - 1]
+            for column in range(closest_bits.shape[1]):
+                probes.append(keys ^ self._powers[closest_bits[:, column]])
+        return np.stack(probes, axis=1)  # (n_tables, n_probe)
+
+    def search(self, query, k=1):
+        if not self._size:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        candidates = set()
+        for table, keys in zip(self._buckets, self._probe_keys(self._projections(query)).tolist()):
+            for key in keys:
+                candidates.update(table.get(key, ()))
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        return self._top_k(ids, self._vectors[ids] @ query, k)
+
+    def _state(self):
+        planes = self._planes if self._planes is not None else np.empty((0, 0, 0), dtype=np.float32)
+        return {"vectors": self.vectors, "planes": planes,
+                "params": np.array([self.n_tables, self.n_bits, self.n_probe, self.seed])}
+
+    @classmethod
+    def _from_state(cls, state):
+        n_tables, n_bits, n_probe, seed = (int(x) for x in state["params"])
+        index = cls(n_tables=n_tables, n_bits=n_bits, n_probe=n_probe, seed=seed)
+        if state["planes"].size:
+            index._planes = state["planes"]
+        for vector in state["vectors"]:
+            index.add(vector)
+        return index
+
+
+INDEX_BACKENDS = {ExactIndex.kind: ExactIndex, RandomProjectionIndex.kind: RandomProjectionIndex}
+
+
+def load_index(path):
+    with np.load(path, allow_pickle=False) as data:
+        state = {name: data[name] for name in data.files}
+    return INDEX_BACKENDS[str(state.pop("kind"))]._from_state(state)
@@ -0,0 +1,115 @@
+
+# Section / statement segmentation of judgment text
+# A Segmenter finds the section between the first start heading and the following end heading, and cuts it into
+# numbered paragraphs: a paragraph begins on every line whose first non-blank character matches paragraph_pattern
+# ("[" for "[12] The applicant ..."), and the text before the first one is a paragraph of its own. Every pattern is
+# compiled once and the text is scanned a single time.
+#   spans(text): (start, end) offsets of the paragraphs of the section, into text (nothing is copied)
+#   iter_statements(chunks): the same paragraphs as whitespace-normalized statements, yielded as soon as the next
+#       paragraph starts, from text arriving in pieces (e.g. PDF pages). Stops reading chunks at the end heading.
+#       utils/pdf_text.py read_section() / iter_statements() feed it the pages of a PDF.
+# Start and end patterns are regular expressions, several of them can be given (the first match of any of them is
+# used); a match must not span a line break.
+import re
+
+PARAGRAPH_PATTERN = r"\["
+
+
+def _any_of(patterns):
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class Segmenter:
+    def __init__(self, start_patterns, end_patterns, paragraph_pattern=PARAGRAPH_PATTERN):
+        self.start_re = _any_of(start_patterns)
+        self.end_re = _any_of(end_patterns)
+        # A new paragraph starts after a line break followed by blanks and the marker
+        self.next_paragraph_re = re.compile(rf"\n(?=[^\S\n]*(?:{paragraph_pattern}))")
+
+    def find_section(self, text):
+        # (start, end) of the section, or None if no start heading is found
+        start = self.start_re.search(text)
+        if start is None:
+            return None
+        end = self.end_re.search(text, start.start())
+        return start.start(), end.start() if end is not None else len(text)
+
+    def paragraph_spans(self, text, start=0, end=None):
+        """Offsets of the paragraphs of text[start:end], which is treated as a whole section"""
+        end = len(text) if end is None else end
+        paragraph_start = start
+        for marker in self.next_paragraph_re.finditer(text, start, end):
+            yield paragraph_start, marker.end()
+            paragraph_start = marker.end()
+        yield paragraph_start, end
+
+    def spans(self, text):
+        section = self.find_section(text)
+        if section is None:
+            return iter(())
+        return self.paragraph_spans(text, *section)
+
+    @staticmethod
+    def statement(text, span=None):
+        # Paragraph text on one line: every line stripped, joined by single spaces
+        start, end = span if span is not None else (0, len(text))
+        return " ".join(line.strip() for line in text[start:end].split("\n")).strip()
+
+    def statements(self, section_text):
+        return [self.statement(section_text, span) for span in self.paragraph_spans(section_text)]
+
+    def _raw_paragraphs(self, chunks):
+        # Only whole lines are scanned (a heading or marker is never cut in half); what is left of the last line waits
+        # for the next chunk. Yields the raw text of each paragraph, the last one always (possibly empty).
+        pending = ""
+        section = None  # Text of the section not yielded yet, from the start of the current paragraph
+        scanned = 0  # Position in section from where paragraph markers still have to be looked for
+        chunks = iter(chunks)
+        try:
+            while True:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    lines, pending = pending, ""
+                else:
+                    pending += chunk
+                    cut = pending.rfind("\n") + 1
+                    lines, pending = pending[:cut], pending[cut:]
+
+                if section is None and lines:
+                    start = self.start_re.search(lines)
+                    if start is not None:
+                        section, end_from = lines[start.start():], 0
+                elif lines:
+                    section, end_from = section + lines, len(section)
+
+                if section is not None and lines:
+                    end = self.end_re.search(section, end_from)
+                    limit = end.start() if end is not None else len(section)
+                    paragraph_start = 0
+                    for marker in self.next_paragraph_re.finditer(section, scanned, limit):
+                        yield section[paragraph_start:marker.end()]
+                        paragraph_start = marker.end()
+                    if end is not None:
+                        yield section[paragraph_start:limit]
+                        return
+                    # Drop what has been yielded; the last line break is looked at again once the next line is known
+                    section = section[paragraph_start:]
+                    scanned = max(0, len(section) - 1)
+
+                if chunk is None:
+                    break
+            if section is not None:
+                yield section
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def iter_statements(self, chunks):
+        """Yields the statements of the section found in the text chunks, as soon as each one is complete"""
+        for paragraph in self._raw_paragraphs(chunks):
+            yield self.statement(paragraph)
+
+    def read_section(self, chunks):
+        # Section text (same as text[start:end] for the find_section span of the whole text), or [] if there is none
+        paragraphs = list(self._raw_paragraphs(chunks))
+        return "".join(paragraphs) if paragraphs else []